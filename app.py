@@ -1,12 +1,19 @@
 # app.py
 import os
-import time
 from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
 from slack_bolt.async_app import AsyncApp
 import boto3
+from botocore.config import Config
 import weave
-from typing import Union
+from typing import Optional, Union
 import asyncio
+import uuid
+from slack_agent.job_queue import FairJobQueue, QueueFullError
+from slack_agent.sessions import AgentSessionStore, new_session_id
+from slack_agent.intent_router import ActionFailed, ActionInvoker, ActionNotStarted, Intent, fast_path_enabled, route_intent
+from slack_agent.loop_monitor import EventLoopLagMonitor
+from slack_agent.prefetch import SpeculativeTranslator, prefetch_channels
+from slack_agent.status_message import StatusMessage, follow_translation
 
 SLACK_BOT_TOKEN = os.environ["SLACK_BOT_TOKEN"]
 SLACK_APP_TOKEN = os.environ["SLACK_APP_TOKEN"]
@@ -14,118 +21,170 @@ AGENT_ID        = os.environ["AGENT_ID"]
 AGENT_ALIAS_ID  = os.environ["AGENT_ALIAS_ID"]
 REGION          = os.getenv("AWS_REGION")
 
+QUEUE_METRICS_INTERVAL = int(os.getenv("AGENT_QUEUE_METRICS_INTERVAL", "60"))
+# Seconds between translation progress queries while a fast-path translation runs (0 to disable)
+PROGRESS_POLL_SECONDS = float(os.getenv("AGENT_PROGRESS_POLL_SECONDS", "5"))
+
 app = AsyncApp(token=SLACK_BOT_TOKEN)
 br_client = boto3.client("bedrock-agent-runtime", region_name=REGION)
+# Mentions are run through a bounded queue so that bursts do not hit the agent all at once
+job_queue = FairJobQueue()
+# Agent sessions per Slack thread, so follow-up messages reuse the agent's context
+agent_sessions = AgentSessionStore()
+# Translations can take minutes, hence the long read timeout
+lambda_client = boto3.client("lambda", region_name=REGION, config=Config(read_timeout=900, retries={"max_attempts": 0}))
+# Translate and show-prompt requests call the action-group Lambdas directly, skipping agent orchestration
+action_invoker = ActionInvoker(lambda_client) if fast_path_enabled() else None
+# Reports posted in watched channels are pre-translated while the job queue is idle
+prefetcher = SpeculativeTranslator(action_invoker or ActionInvoker(lambda_client), job_queue) if prefetch_channels() else None
+# Logs when a handler blocks the event loop (and with it every other Slack event)
+loop_monitor = EventLoopLagMonitor()
 
 @weave.op()
-async def invoke_bedrock_agent(user_input: str, mode: str = "normal") -> Union[str, dict]:
+async def invoke_bedrock_agent(
+    user_input: str, mode: str = "normal", session_id: Optional[str] = None, history: Optional[list] = None
+) -> Union[str, dict]:
     """Invoke Bedrock agent and return the response.
     
     Args:
         user_input: The user's input text
         mode: The mode of operation ("normal" or "eval")
+        session_id: Agent session to continue. A new session is started if omitted.
+        history: Earlier messages of the thread the agent has not seen (fast-path exchanges),
+            passed as the session's conversation history
         
     Returns:
         Union[str, dict]: The agent's response, either as a string or a dict containing result and eval info
     """
+    if session_id is None:
+        session_id = new_session_id()
+    session_state = {"sessionState": {"conversationHistory": {"messages": history}}} if history else {}
     try:
-        if mode == "normal":
-            stream = br_client.invoke_agent(
-                agentId=AGENT_ID,
-                agentAliasId=AGENT_ALIAS_ID,
-                sessionId=str(time.time()),
-                inputText=user_input,
-                enableTrace=False
-            )
-        elif mode == "eval":
-            stream = br_client.invoke_agent(
-                agentId=AGENT_ID,
-                agentAliasId=AGENT_ALIAS_ID,
-                sessionId=str(time.time()),
-                inputText=user_input,
-                enableTrace=True
-            )
-        else:
-            raise ValueError(f"Invalid mode: {mode}")
+        # boto3 blocks while the agent answers and while its stream is read; run both off the event loop
+        return await asyncio.to_thread(_run_agent, user_input, mode, session_id, session_state)
+    except Exception as e:
+        error_message = f"Error invoking Bedrock agent: {str(e)}"
+        print(error_message)
+        # Return a user-friendly error message
+        return f"申し訳ありません。エラーが発生しました: {str(e)}"
 
-        chunks = []
-        eval_info = []
-        
-        def extract_action_info(event):
-            if not event or "trace" not in event:
-                return None
+def _run_agent(user_input: str, mode: str, session_id: str, session_state: dict) -> Union[str, dict]:
+    """Call the agent and read its response stream (blocking; see invoke_bedrock_agent)."""
+    if mode == "normal":
+        stream = br_client.invoke_agent(
+            agentId=AGENT_ID,
+            agentAliasId=AGENT_ALIAS_ID,
+            sessionId=session_id,
+            inputText=user_input,
+            enableTrace=False,
+            **session_state
+        )
+    elif mode == "eval":
+        stream = br_client.invoke_agent(
+            agentId=AGENT_ID,
+            agentAliasId=AGENT_ALIAS_ID,
+            sessionId=session_id,
+            inputText=user_input,
+            enableTrace=True,
+            **session_state
+        )
+    else:
+        raise ValueError(f"Invalid mode: {mode}")
+
+    chunks = []
+    eval_info = []
+    
+    def extract_action_info(event):
+        if not event or "trace" not in event:
+            return None
+            
+        try:
+            trace_data = event["trace"]
+            if "trace" in trace_data and "orchestrationTrace" in trace_data["trace"]:
+                trace = trace_data["trace"]["orchestrationTrace"]
                 
-            try:
-                trace_data = event["trace"]
-                if "trace" in trace_data and "orchestrationTrace" in trace_data["trace"]:
-                    trace = trace_data["trace"]["orchestrationTrace"]
-                    
-                    if "invocationInput" in trace:
-                        invocation = trace["invocationInput"]
-                        if "actionGroupInvocationInput" in invocation:
-                            action_input = invocation["actionGroupInvocationInput"]
-                            return {
-                                "type": "action",
-                                "action_group": action_input["actionGroupName"],
-                                "function": action_input["function"],
-                                "parameters": action_input["parameters"]
-                            }
-                    
-                    if "modelInvocationInput" in trace:
-                        model_input = trace["modelInvocationInput"]
+                if "invocationInput" in trace:
+                    invocation = trace["invocationInput"]
+                    if "actionGroupInvocationInput" in invocation:
+                        action_input = invocation["actionGroupInvocationInput"]
                         return {
-                            "type": "model",
-                            "model": model_input["foundationModel"],
-                            "config": model_input["inferenceConfiguration"]
+                            "type": "action",
+                            "action_group": action_input["actionGroupName"],
+                            "function": action_input["function"],
+                            "parameters": action_input["parameters"]
                         }
-            except Exception as e:
-                print(f"Error extracting action info: {e}")
-            return None
-
-        for event in stream["completion"]:
-            if not event:  # Skip None chunks
-                continue
                 
-            try:
-                if mode == "eval":
-                    action_info = extract_action_info(event)
-                    if action_info:
-                        if action_info["type"] == "action":
-                            info_str = "\n=== Action Info ===\n"
-                            info_str += f"Action Group: {action_info['action_group']}\n"
-                            info_str += f"Function: {action_info['function']}\n"
-                            info_str += "Parameters:\n"
-                            for param in action_info['parameters']:
-                                info_str += f"  - {param['name']}: {param['value']}\n"
-                            info_str += "==================\n"
-                            eval_info.append(info_str)
-
-                if "chunk" in event:
-                    chunk_data = event["chunk"]["bytes"].decode("utf-8")
-                    if chunk_data:  # Only append non-empty chunks
-                        chunks.append(chunk_data)
-                elif "content" in event:
-                    content = event["content"]
-                    if content:  # Only append non-empty content
-                        chunks.append(content)
-            except Exception as e:
-                print(f"Error processing chunk: {e}")
-                continue
+                if "modelInvocationInput" in trace:
+                    model_input = trace["modelInvocationInput"]
+                    return {
+                        "type": "model",
+                        "model": model_input["foundationModel"],
+                        "config": model_input["inferenceConfiguration"]
+                    }
+        except Exception as e:
+            print(f"Error extracting action info: {e}")
+        return None
 
-        result = "".join(chunks)
-        if not result.strip():
-            raise ValueError("Empty response from Bedrock agent")
+    for event in stream["completion"]:
+        if not event:  # Skip None chunks
+            continue
+            
+        try:
+            if mode == "eval":
+                action_info = extract_action_info(event)
+                if action_info:
+                    if action_info["type"] == "action":
+                        info_str = "\n=== Action Info ===\n"
+                        info_str += f"Action Group: {action_info['action_group']}\n"
+                        info_str += f"Function: {action_info['function']}\n"
+                        info_str += "Parameters:\n"
+                        for param in action_info['parameters']:
+                            info_str += f"  - {param['name']}: {param['value']}\n"
+                        info_str += "==================\n"
+                        eval_info.append(info_str)
 
-        if mode == "eval" and eval_info:
-            return {"result": result, "eval_info": eval_info}
-        else:
-            return result
+            if "chunk" in event:
+                chunk_data = event["chunk"]["bytes"].decode("utf-8")
+                if chunk_data:  # Only append non-empty chunks
+                    chunks.append(chunk_data)
+            elif "content" in event:
+                content = event["content"]
+                if content:  # Only append non-empty content
+                    chunks.append(content)
+        except Exception as e:
+            print(f"Error processing chunk: {e}")
+            continue
+
+    result = "".join(chunks)
+    if not result.strip():
+        raise ValueError("Empty response from Bedrock agent")
+
+    if mode == "eval" and eval_info:
+        return {"result": result, "eval_info": eval_info}
+    else:
+        return result
+
+@weave.op()
+async def invoke_fast_path(intent: Intent) -> Optional[str]:
+    """Run a recognized request directly.
 
+    Returns None if the call was rejected before the action ran, so the agent can take over.
+    Once the action has been accepted, a failure or timeout is reported to the user instead:
+    the agent would run it a second time (e.g. translate and save the report twice).
+    """
+    try:
+        return await asyncio.to_thread(action_invoker.invoke, intent)
+    except ActionNotStarted as e:
+        print(f"Fast path for {intent.function} was not started, falling back to the agent: {e}")
+        return None
     except Exception as e:
-        error_message = f"Error invoking Bedrock agent: {str(e)}"
-        print(error_message)
-        # Return a user-friendly error message
-        return f"申し訳ありません。エラーが発生しました: {str(e)}"
+        print(f"Fast path for {intent.function} failed: {e}")
+        if isinstance(e, ActionFailed) and e.timed_out:
+            return (
+                "The request is taking longer than expected and I stopped waiting for it. "
+                "It may still finish; please check again in a few minutes before retrying."
+            )
+        return f"Sorry, the request failed: {e}"
 
 @app.event("app_mention")
 async def handle_app_mention(event, say):
@@ -135,18 +194,67 @@ async def handle_app_mention(event, say):
     channel = event["channel"]
     thread_ts = event.get("thread_ts", event["ts"])
 
-    # 対応中のメッセージをすぐに送信
-    await say(
-        text="Handling your request...",
-        channel=channel,
-        thread_ts=thread_ts
-    )
-
     # bot のメンション部分を取り除く
     cleaned_text = text.split("<@", 1)[-1].split(">", 1)[-1].strip()
 
-    # Bedrock Agent へ送信
-    agent_response = await invoke_bedrock_agent(cleaned_text)
+    # The reply below is kept as the request's status message and edited as it progresses
+    status = StatusMessage(app.client, channel, thread_ts)
+
+    async def process():
+        await respond_to_mention(cleaned_text, channel, thread_ts, say, status)
+
+    # キューに積む（上限を超えた場合は丁寧に断る）
+    try:
+        job = job_queue.submit(process, user=user, channel=channel)
+    except QueueFullError as e:
+        if e.reason == "user_limit":
+            message = "You already have several requests waiting. Please wait for them to finish before sending more."
+        else:
+            message = "Sorry, I'm handling too many requests right now. Please try again in a few minutes."
+        await say(text=message, channel=channel, thread_ts=thread_ts)
+        return
+
+    # 対応中 or 待ち順のメッセージをすぐに送信
+    position = job_queue.position(job)
+    if position:
+        status_text = f"Your request is queued (position {position}). I'll start on it shortly."
+    else:
+        status_text = "Handling your request..."
+    try:
+        await status.post(status_text)
+    except Exception as e:
+        print(f"Error posting the status message: {e}")
+
+async def respond_to_mention(cleaned_text: str, channel: str, thread_ts: str, say, status: Optional[StatusMessage] = None):
+    """Run one queued mention: answer through the fast path or the agent and reply in the thread."""
+    if status:
+        await status.update("Handling your request...", force=True)
+    agent_response = None
+    intent = route_intent(cleaned_text) if action_invoker else None
+    if intent and action_invoker.supports(intent):
+        if intent.function == "translate_report" and prefetcher:
+            # 同じ翻訳の先読みが走っていれば、その結果（翻訳キャッシュ）を使う
+            await prefetcher.take_over(intent.parameters["original_report_url"], intent.parameters["language"])
+        watcher = None
+        if intent.function == "translate_report" and status and PROGRESS_POLL_SECONDS > 0:
+            # The translator reports its progress under this id; show it in the status message
+            job_id = uuid.uuid4().hex
+            intent = Intent(intent.function, dict(intent.parameters, job_id=job_id))
+            watcher = asyncio.create_task(follow_translation(action_invoker, job_id, status, PROGRESS_POLL_SECONDS))
+        try:
+            agent_response = await invoke_fast_path(intent)
+        finally:
+            if watcher:
+                watcher.cancel()
+
+    if agent_response is None:
+        # Bedrock Agent へ送信（ファストパスで答えたやり取りも会話履歴として渡す）
+        session_id = agent_sessions.session_id(channel, thread_ts)
+        history = agent_sessions.take_history(channel, thread_ts)
+        agent_response = await invoke_bedrock_agent(cleaned_text, session_id=session_id, history=history)
+    else:
+        # ファストパスの応答をスレッドのセッションに記録する
+        agent_sessions.record_exchange(channel, thread_ts, cleaned_text, agent_response)
 
     # Slack に返信（必ずスレッドに返信）
     response = await say(
@@ -154,7 +262,9 @@ async def handle_app_mention(event, say):
         channel=channel,
         thread_ts=thread_ts
     )
-    
+    if status:
+        await status.update("Done. See the reply below.", force=True)
+
     try:
         # Add reactions to the response message
         await app.client.reactions_add(
@@ -210,9 +320,41 @@ async def handle_reaction(event):
             except Exception as e:
                 print(f"Error in reaction handling: {e}")
 
+@app.event("message")
+async def handle_message(event):
+    """Queue pre-translations of report URLs posted in watched channels, and end the sessions of deleted threads."""
+    if event.get("subtype") == "message_deleted" and event.get("channel") and event.get("deleted_ts"):
+        # スレッドの親メッセージが消えたら、そのスレッドのエージェントセッションも破棄する
+        agent_sessions.forget(event["channel"], event["deleted_ts"])
+    elif prefetcher and not event.get("subtype") and event.get("channel"):
+        prefetcher.offer(event.get("text", ""), event["channel"])
+
+async def log_queue_metrics():
+    """Periodically log queue depth and wait time."""
+    while True:
+        await asyncio.sleep(QUEUE_METRICS_INTERVAL)
+        print("Job queue metrics:", job_queue.metrics())
+        print("Event loop lag:", loop_monitor.metrics())
+        if prefetcher:
+            print("Speculative translations:", prefetcher.metrics())
+
 async def main():
+    job_queue.start()
+    if prefetcher:
+        prefetcher.start()
+    if loop_monitor.threshold > 0:
+        loop_monitor.start()
+    metrics_task = None
+    if QUEUE_METRICS_INTERVAL > 0:
+        # Keep a reference: the loop only holds tasks weakly, and the task is cancelled on shutdown
+        metrics_task = asyncio.create_task(log_queue_metrics())
     handler = AsyncSocketModeHandler(app, SLACK_APP_TOKEN)
-    await handler.start_async()
+    try:
+        await handler.start_async()
+    finally:
+        if metrics_task:
+            metrics_task.cancel()
+            await asyncio.gather(metrics_task, return_exceptions=True)
 
 if __name__ == "__main__":
     weave.init(os.environ["WANDB_ENTITY"] + "/" + os.environ["WANDB_PROJECT"])
@@ -0,0 +1,3 @@
+"""
+Helpers for the Slack Socket Mode app (app.py).
+"""
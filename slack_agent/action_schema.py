@@ -0,0 +1,113 @@
+"""
+Local snapshots of the Bedrock agent's action-group schema.
+
+src/print_action_groups.py fetches the action groups of an agent version and saves
+them here as JSON, one file per agent version plus latest.json. The Slack app's fast
+path and the evaluation harness read the functions, their parameters and Lambda
+functions from the snapshot instead of querying the Bedrock control plane.
+"""
+
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+SCHEMA_VERSION = 1
+LATEST = "latest"
+
+DEFAULT_SCHEMA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agent_schema")
+
+
+def schema_dir() -> str:
+    """Snapshot directory: AGENT_SCHEMA_DIR, or agent_schema/ at the repository root."""
+    return os.getenv("AGENT_SCHEMA_DIR", DEFAULT_SCHEMA_DIR)
+
+
+def snapshot_path(agent_version: str = LATEST, directory: Optional[str] = None) -> str:
+    return os.path.join(directory or schema_dir(), f"{agent_version}.json")
+
+
+def _write_json(path: str, data: dict):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def save_snapshot(snapshot: dict, directory: Optional[str] = None) -> str:
+    """Save a snapshot under its agent version and as latest.json. Returns the versioned path."""
+    directory = directory or schema_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = snapshot_path(snapshot["agent_version"], directory)
+    _write_json(path, snapshot)
+    _write_json(snapshot_path(LATEST, directory), snapshot)
+    return path
+
+
+def load_snapshot(agent_version: str = LATEST, directory: Optional[str] = None) -> Optional[dict]:
+    """Load the snapshot of an agent version, or None if there is none (or it has an unknown format)."""
+    try:
+        with open(snapshot_path(agent_version, directory), encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("schema_version") != SCHEMA_VERSION:
+        return None
+    return snapshot
+
+
+def function_index(snapshot: Optional[dict]) -> Dict[str, dict]:
+    """Map each function (or API operation) name to its action group name, Lambda and parameters."""
+    index: Dict[str, dict] = {}
+    for group_name, group in ((snapshot or {}).get("action_groups") or {}).items():
+        for action in group.get("actions", []):
+            index[action["name"]] = {
+                "action_group": group_name,
+                "lambda": group.get("lambda"),
+                "parameters": action.get("parameters", {}),
+            }
+    return index
+
+
+def diff_snapshots(old: dict, new: dict) -> List[str]:
+    """Describe the changes to action groups, actions and parameters between two snapshots."""
+    changes: List[str] = []
+    old_groups = old.get("action_groups") or {}
+    new_groups = new.get("action_groups") or {}
+    for name in sorted(old_groups.keys() - new_groups.keys()):
+        changes.append(f"Removed action group {name}")
+    for name in sorted(new_groups.keys() - old_groups.keys()):
+        changes.append(f"Added action group {name}")
+    for group_name in sorted(old_groups.keys() & new_groups.keys()):
+        old_group, new_group = old_groups[group_name], new_groups[group_name]
+        if old_group.get("lambda") != new_group.get("lambda"):
+            changes.append(f"{group_name}: Lambda {old_group.get('lambda')} -> {new_group.get('lambda')}")
+        old_actions = {a["name"]: a for a in old_group.get("actions", [])}
+        new_actions = {a["name"]: a for a in new_group.get("actions", [])}
+        for name in sorted(old_actions.keys() - new_actions.keys()):
+            changes.append(f"{group_name}: removed action {name}")
+        for name in sorted(new_actions.keys() - old_actions.keys()):
+            changes.append(f"{group_name}: added action {name}")
+        for name in sorted(old_actions.keys() & new_actions.keys()):
+            changes.extend(f"{group_name}.{name}: {change}" for change in _diff_action(old_actions[name], new_actions[name]))
+    return changes
+
+
+def _diff_action(old: dict, new: dict) -> List[str]:
+    changes = []
+    if old.get("description", "") != new.get("description", ""):
+        changes.append("description changed")
+    old_params, new_params = old.get("parameters") or {}, new.get("parameters") or {}
+    for name in sorted(old_params.keys() - new_params.keys()):
+        changes.append(f"removed parameter {name}")
+    for name in sorted(new_params.keys() - old_params.keys()):
+        param = new_params[name]
+        required = "required" if param.get("required") else "optional"
+        changes.append(f"added parameter {name} ({param.get('type', 'unknown')}, {required})")
+    for name in sorted(old_params.keys() & new_params.keys()):
+        for field in ("type", "required", "in"):
+            if old_params[name].get(field) != new_params[name].get(field):
+                changes.append(f"parameter {name}: {field} {old_params[name].get(field)} -> {new_params[name].get(field)}")
+        if old_params[name].get("description", "") != new_params[name].get("description", ""):
+            changes.append(f"parameter {name}: description changed")
+    return changes
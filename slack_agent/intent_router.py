@@ -0,0 +1,214 @@
+"""
+Deterministic fast path for the most common Slack requests.
+
+"Translate <report URL> to Japanese" and "show me the current prompt" always end in
+the same action-group call. route_intent() recognizes these requests locally, and
+ActionInvoker calls the action-group Lambda directly with the same event the agent
+would send, saving the agent's orchestration round trip. Anything ambiguous (no
+report URL, several URLs or languages, prompt updates, other questions) is left to
+the agent.
+"""
+
+import json
+import os
+import re
+import urllib.error
+import urllib.request
+from typing import Dict, Optional
+
+from botocore.exceptions import ConnectionClosedError, ReadTimeoutError
+
+from slack_agent.action_schema import function_index, load_snapshot
+
+REPORT_URL_PATTERN = re.compile(r"https?://(?:[\w-]+\.)?wandb\.ai/[^\s<>|]+/reports/[^\s<>|]+")
+
+# Slack wraps links as <url> or <url|label>
+SLACK_LINK_PATTERN = re.compile(r"<(https?://[^>|]+)(?:\|[^>]*)?>")
+
+LANGUAGE_PATTERNS = {
+    "jp": re.compile(r"\b(?:japanese|jp|ja|jpn)\b|日本語|和訳", re.IGNORECASE),
+    "ko": re.compile(r"\b(?:korean|ko|kr|kor)\b|韓国語|한국어", re.IGNORECASE),
+    "en": re.compile(r"\b(?:english|en|eng)\b|英語|英訳|영어", re.IGNORECASE),
+}
+
+TRANSLATE_PATTERN = re.compile(
+    r"\btranslat|\b(?:to|into|in)\s+(?:japanese|korean|english)\b|翻訳|訳して|和訳|英訳|語に|語で|번역|어로",
+    re.IGNORECASE,
+)
+
+SHOW_PROMPT_PATTERN = re.compile(
+    r"\b(?:show|display|print|see|view|get)\b.*\bprompt\b"
+    r"|\b(?:current|latest|active)\s+(?:translation\s+)?prompt\b"
+    r"|\bwhat(?:'s|\s+is)\s+the\s+(?:current\s+|latest\s+)?(?:translation\s+)?prompt\b"
+    r"|(?:現在|今|最新)の(?:翻訳)?プロンプト|プロンプトを(?:見せ|表示|教え|確認)|현재\s*프롬프트|프롬프트\s*(?:보여|확인)",
+    re.IGNORECASE,
+)
+
+# Requests that mention these go to the agent even if they also look like a fast-path request
+AGENT_ONLY_PATTERN = re.compile(
+    r"\b(?:update|change|edit|modify|set|replace|diff|versions?|history)\b|更新|変更|修正|差分|履歴|수정|변경",
+    re.IGNORECASE,
+)
+
+
+class ActionNotStarted(Exception):
+    """The call was rejected before the action ran (e.g. throttled, unreachable), so the agent can take over."""
+
+
+class ActionFailed(Exception):
+    """The action was accepted and then failed or timed out.
+
+    It may have had side effects (a translation can still finish and save its report), so the
+    request is not handed to the agent, which would run it a second time.
+    """
+
+    def __init__(self, message: str, timed_out: bool = False):
+        super().__init__(message)
+        self.timed_out = timed_out
+
+
+class Intent:
+    """A request recognized by the fast path: an action-group function and its parameters."""
+
+    __slots__ = ("function", "parameters")
+
+    def __init__(self, function: str, parameters: Dict[str, str]):
+        self.function = function
+        self.parameters = parameters
+
+    def __eq__(self, other):
+        return isinstance(other, Intent) and (self.function, self.parameters) == (other.function, other.parameters)
+
+    def __repr__(self):
+        return f"Intent({self.function!r}, {self.parameters!r})"
+
+
+def route_intent(text: str) -> Optional[Intent]:
+    """Recognize a translate or show-prompt request, or return None to let the agent handle it."""
+    text = SLACK_LINK_PATTERN.sub(r"\1", text or "")
+    urls = list(dict.fromkeys(REPORT_URL_PATTERN.findall(text)))
+    rest = REPORT_URL_PATTERN.sub(" ", text)
+
+    if "prompt" in rest.lower() or "プロンプト" in rest or "프롬프트" in rest:
+        if urls or AGENT_ONLY_PATTERN.search(rest) or not SHOW_PROMPT_PATTERN.search(rest):
+            return None
+        return Intent("show_prompt", {"action": "show_prompt"})
+
+    if len(urls) != 1:
+        return None
+    languages = [language for language, pattern in LANGUAGE_PATTERNS.items() if pattern.search(rest)]
+    if len(languages) != 1:
+        return None
+    # Without a translation cue, only a bare "<url> <language>" message counts as a translate request
+    if not TRANSLATE_PATTERN.search(rest) and re.sub(r"[\W_]+", "", LANGUAGE_PATTERNS[languages[0]].sub("", rest)):
+        return None
+    return Intent("translate_report", {"original_report_url": urls[0], "language": languages[0]})
+
+
+class ActionInvoker:
+    """Calls action-group Lambda functions directly with the Bedrock agent event format.
+
+    Lambda functions and action-group names are read from the agent schema snapshot
+    (slack_agent/action_schema.py) when there is one. Environment variables take precedence:
+      - FAST_PATH_TRANSLATE_FUNCTION: translator Lambda (default "fc-agent-wandb-translator")
+      - FAST_PATH_PROMPT_FUNCTION: prompt manager Lambda (default "fc-agent-prompt-manager")
+      - TRANSLATION_SERVICE_URL: translation service (src/wandb_translator/service.py) that takes
+        the translator's functions instead of its Lambda, e.g. a sidecar at http://localhost:8080
+      - TRANSLATION_SERVICE_TOKEN: bearer token sent to the translation service, if it requires one
+    """
+
+    def __init__(
+        self,
+        lambda_client,
+        functions: Optional[Dict[str, str]] = None,
+        snapshot: Optional[dict] = None,
+        service_url: Optional[str] = None,
+    ):
+        self.lambda_client = lambda_client
+        self.service_url = service_url if service_url is not None else os.getenv("TRANSLATION_SERVICE_URL")
+        self.service_timeout = float(os.getenv("TRANSLATION_SERVICE_TIMEOUT", "900"))
+        self.service_token = os.getenv("TRANSLATION_SERVICE_TOKEN")
+        index = function_index(snapshot if snapshot is not None else load_snapshot())
+        self.action_groups = {name: entry["action_group"] for name, entry in index.items()}
+        self.functions = functions or {
+            "translate_report": os.getenv("FAST_PATH_TRANSLATE_FUNCTION")
+            or (index.get("translate_report") or {}).get("lambda")
+            or "fc-agent-wandb-translator",
+            "show_prompt": os.getenv("FAST_PATH_PROMPT_FUNCTION")
+            or (index.get("show_prompt") or {}).get("lambda")
+            or "fc-agent-prompt-manager",
+        }
+        if index:
+            # The agent no longer offers a function: leave those requests to the agent
+            self.functions = {name: target for name, target in self.functions.items() if name in index}
+        if "translate_report" in self.functions and "translation_status" not in self.functions:
+            # Progress queries go to the translator Lambda, whether or not the agent offers them
+            self.functions = dict(self.functions, translation_status=self.functions["translate_report"])
+
+    def supports(self, intent: Intent) -> bool:
+        return intent.function in self.functions
+
+    def invoke(self, intent: Intent) -> str:
+        """Run the intent's Lambda and return the text of its response body.
+
+        Raises:
+            ActionNotStarted: The call was rejected before the action ran
+            ActionFailed: The action ran and failed, or did not answer in time
+        """
+        event = {
+            "messageVersion": "1.0",
+            "actionGroup": self.action_groups.get(intent.function, "fast_path"),
+            "function": intent.function,
+            "parameters": [{"name": k, "type": "string", "value": v} for k, v in intent.parameters.items()],
+            "sessionAttributes": {},
+            "promptSessionAttributes": {},
+        }
+        if self.service_url and self.functions[intent.function] == self.functions.get("translate_report"):
+            return self._invoke_service(intent, event)
+        try:
+            response = self.lambda_client.invoke(
+                FunctionName=self.functions[intent.function],
+                InvocationType="RequestResponse",
+                Payload=json.dumps(event).encode("utf-8"),
+            )
+        except (ReadTimeoutError, ConnectionClosedError) as e:
+            # The request was sent: the function may still be running
+            raise ActionFailed(f"{intent.function} did not answer: {e}", timed_out=True) from e
+        except Exception as e:
+            raise ActionNotStarted(f"{intent.function} was not invoked: {e}") from e
+        try:
+            payload = json.loads(response["Payload"].read())
+            if response.get("FunctionError"):
+                raise ActionFailed(f"{intent.function} failed: {payload.get('errorMessage', payload)}")
+            return payload["response"]["functionResponse"]["responseBody"]["TEXT"]["body"]
+        except ActionFailed:
+            raise
+        except Exception as e:
+            raise ActionFailed(f"{intent.function} returned an unexpected response: {e}") from e
+
+    def _invoke_service(self, intent: Intent, event: dict) -> str:
+        headers = {"Content-Type": "application/json"}
+        if self.service_token:
+            headers["Authorization"] = f"Bearer {self.service_token}"
+        request = urllib.request.Request(
+            self.service_url.rstrip("/") + "/invoke",
+            data=json.dumps(event).encode("utf-8"),
+            headers=headers,
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.service_timeout) as response:
+                payload = json.loads(response.read())
+            return payload["response"]["functionResponse"]["responseBody"]["TEXT"]["body"]
+        except urllib.error.HTTPError as e:
+            raise ActionFailed(f"{intent.function} failed: {e.read().decode('utf-8', 'replace')}") from e
+        except urllib.error.URLError as e:
+            # Raised while connecting (refused, unknown host, connect timeout): the service never got the request
+            raise ActionNotStarted(f"{intent.function} was not invoked: {e.reason}") from e
+        except TimeoutError as e:
+            raise ActionFailed(f"{intent.function} did not answer within {self.service_timeout:.0f}s", timed_out=True) from e
+        except Exception as e:
+            raise ActionFailed(f"{intent.function} returned an unexpected response: {e}") from e
+
+
+def fast_path_enabled() -> bool:
+    return os.getenv("AGENT_FAST_PATH", "true").lower() not in ("0", "false", "no", "off")
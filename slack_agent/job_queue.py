@@ -0,0 +1,210 @@
+"""
+Bounded, fair work queue for Slack requests.
+
+Jobs are async callables run by a fixed number of worker tasks. Pending jobs are
+kept per user and dispatched round-robin across users, with caps on how many jobs
+of one user or one channel may run at the same time. Once the number of pending
+jobs reaches the high-water mark, new jobs are rejected.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+from slack_agent.stats import percentile
+
+
+class QueueFullError(Exception):
+    """Raised when a job is rejected because the queue is at its high-water mark."""
+
+    def __init__(self, message: str, reason: str = "queue_full"):
+        super().__init__(message)
+        self.reason = reason
+
+
+class QueuedJob:
+    """A job waiting in (or taken from) the queue."""
+
+    __slots__ = ("func", "user", "channel", "enqueued_at", "started_at", "done")
+
+    def __init__(self, func: Callable[[], Awaitable[None]], user: str, channel: str):
+        self.func = func
+        self.user = user
+        self.channel = channel
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.done = asyncio.Event()
+
+
+class FairJobQueue:
+    """In-process job queue with a fixed worker count and per-user/per-channel fairness.
+
+    Settings default to environment variables:
+      - AGENT_QUEUE_WORKERS: number of jobs run concurrently (default 4)
+      - AGENT_QUEUE_HIGH_WATER: pending jobs above which new work is rejected (default 20)
+      - AGENT_QUEUE_MAX_PENDING_PER_USER: pending jobs allowed per user (default 5)
+      - AGENT_QUEUE_MAX_RUNNING_PER_USER: jobs of one user run at the same time (default 1)
+      - AGENT_QUEUE_MAX_RUNNING_PER_CHANNEL: jobs of one channel run at the same time (default: worker count)
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        high_water: Optional[int] = None,
+        max_pending_per_user: Optional[int] = None,
+        max_running_per_user: Optional[int] = None,
+        max_running_per_channel: Optional[int] = None,
+        wait_window: int = 500,
+    ):
+        self.workers = workers or int(os.getenv("AGENT_QUEUE_WORKERS", "4"))
+        self.high_water = high_water or int(os.getenv("AGENT_QUEUE_HIGH_WATER", "20"))
+        self.max_pending_per_user = max_pending_per_user or int(os.getenv("AGENT_QUEUE_MAX_PENDING_PER_USER", "5"))
+        self.max_running_per_user = max_running_per_user or int(os.getenv("AGENT_QUEUE_MAX_RUNNING_PER_USER", "1"))
+        self.max_running_per_channel = max_running_per_channel or int(
+            os.getenv("AGENT_QUEUE_MAX_RUNNING_PER_CHANNEL", str(self.workers))
+        )
+        # Pending jobs per user; the order of the keys is the round-robin order
+        self._pending: "OrderedDict[str, Deque[QueuedJob]]" = OrderedDict()
+        self._running_by_user: Dict[str, int] = {}
+        self._running_by_channel: Dict[str, int] = {}
+        self._running = 0
+        self._wakeup: Optional[asyncio.Condition] = None
+        self._tasks: List[asyncio.Task] = []
+        # Metrics
+        self._wait_times: Deque[float] = deque(maxlen=wait_window)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    # ---- Lifecycle ----
+
+    def start(self):
+        """Start the worker tasks. Must be called from the running event loop."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Condition()
+        for n in range(self.workers):
+            self._tasks.append(asyncio.get_running_loop().create_task(self._worker(), name=f"job-queue-worker-{n}"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ---- Submission ----
+
+    @property
+    def depth(self) -> int:
+        return sum(len(jobs) for jobs in self._pending.values())
+
+    @property
+    def idle(self) -> bool:
+        """No job is running or waiting."""
+        return self._running == 0 and self.depth == 0
+
+    def submit(self, func: Callable[[], Awaitable[None]], user: str, channel: str) -> QueuedJob:
+        """Queue a job.
+
+        Raises:
+            QueueFullError: If the queue is at its high-water mark or the user has too many pending jobs.
+        """
+        self.start()
+        if self.depth >= self.high_water:
+            self.rejected += 1
+            raise QueueFullError("The request queue is full.", reason="queue_full")
+        if len(self._pending.get(user, ())) >= self.max_pending_per_user:
+            self.rejected += 1
+            raise QueueFullError("Too many pending requests for this user.", reason="user_limit")
+        job = QueuedJob(func, user, channel)
+        self._pending.setdefault(user, deque()).append(job)
+        self.submitted += 1
+        asyncio.get_running_loop().create_task(self._notify())
+        return job
+
+    def position(self, job: QueuedJob) -> int:
+        """Position of a pending job in line for a worker, or 0 if it can start right away.
+
+        Users are served round-robin, so a job that is k-th in its user's line waits for
+        up to k+1 jobs of each user ahead of it in the rotation and k jobs of the others.
+        """
+        jobs = self._pending.get(job.user)
+        if not jobs or job not in jobs:
+            return 0
+        k = list(jobs).index(job)
+        ahead = k
+        before_user = True
+        for user, other in self._pending.items():
+            if user == job.user:
+                before_user = False
+                continue
+            ahead += min(len(other), k + 1 if before_user else k)
+        return max(0, ahead + 1 - (self.workers - self._running))
+
+    # ---- Dispatch ----
+
+    async def _notify(self):
+        async with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _next_job(self) -> Optional[QueuedJob]:
+        for user in list(self._pending.keys()):
+            jobs = self._pending[user]
+            job = jobs[0]
+            if self._running_by_user.get(user, 0) >= self.max_running_per_user:
+                continue
+            if self._running_by_channel.get(job.channel, 0) >= self.max_running_per_channel:
+                continue
+            jobs.popleft()
+            # Rotate the user to the end of the round-robin order
+            del self._pending[user]
+            if jobs:
+                self._pending[user] = jobs
+            return job
+        return None
+
+    async def _worker(self):
+        while True:
+            async with self._wakeup:
+                job = self._next_job()
+                while job is None:
+                    await self._wakeup.wait()
+                    job = self._next_job()
+                self._running += 1
+                self._running_by_user[job.user] = self._running_by_user.get(job.user, 0) + 1
+                self._running_by_channel[job.channel] = self._running_by_channel.get(job.channel, 0) + 1
+            job.started_at = time.monotonic()
+            self._wait_times.append(job.started_at - job.enqueued_at)
+            try:
+                await job.func()
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Error running queued job for user {job.user}: {e}")
+            finally:
+                self._running -= 1
+                self._running_by_user[job.user] -= 1
+                self._running_by_channel[job.channel] -= 1
+                job.done.set()
+                await self._notify()
+
+    # ---- Metrics ----
+
+    def metrics(self) -> dict:
+        waits = list(self._wait_times)
+        return {
+            "queue_depth": self.depth,
+            "running": self._running,
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_seconds_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_seconds_p50": percentile(waits, 0.5),
+            "wait_seconds_p95": percentile(waits, 0.95),
+            "wait_seconds_max": max(waits) if waits else 0.0,
+        }
@@ -0,0 +1,90 @@
+"""
+Event-loop lag monitor for the Slack app.
+
+A task sleeps for a short interval and measures how late it wakes up. The delay is
+the time the loop was busy with something else: a blocking call inside a handler
+delays every other mention, reaction and Socket Mode ping by the same amount. Lag
+above a threshold is logged.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Optional
+
+from slack_agent.stats import percentile
+
+
+class EventLoopLagMonitor:
+    """Samples event-loop lag and logs when the loop was blocked for too long.
+
+    Settings default to environment variables:
+      - AGENT_LOOP_LAG_INTERVAL_MS: time between samples (default 100)
+      - AGENT_LOOP_LAG_THRESHOLD_MS: lag above which a blocked loop is logged (default 250)
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        threshold: Optional[float] = None,
+        window: int = 1000,
+        log: Callable[[str], None] = print,
+    ):
+        """
+        Args:
+            interval: Seconds between samples
+            threshold: Lag in seconds above which the loop is reported as blocked
+            window: Number of recent samples kept for the percentiles
+            log: Where blocked-loop messages go
+        """
+        self.interval = interval if interval is not None else int(os.getenv("AGENT_LOOP_LAG_INTERVAL_MS", "100")) / 1000
+        self.threshold = threshold if threshold is not None else int(os.getenv("AGENT_LOOP_LAG_THRESHOLD_MS", "250")) / 1000
+        self._log = log
+        self._lags: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self.samples = 0
+        self.blocked = 0
+        self.max_lag = 0.0
+
+    def start(self):
+        """Start sampling. Must be called from the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.record(time.monotonic() - started - self.interval)
+
+    def record(self, lag: float):
+        lag = max(0.0, lag)
+        self.samples += 1
+        self._lags.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag > self.threshold:
+            self.blocked += 1
+            self._log(f"Event loop blocked for {lag * 1000:.0f} ms (threshold {self.threshold * 1000:.0f} ms)")
+
+    def reset(self):
+        self._lags.clear()
+        self.samples = 0
+        self.blocked = 0
+        self.max_lag = 0.0
+
+    def metrics(self) -> dict:
+        lags = list(self._lags)
+        return {
+            "samples": self.samples,
+            "blocked": self.blocked,
+            "lag_p50_ms": round(percentile(lags, 0.5) * 1000, 1),
+            "lag_p99_ms": round(percentile(lags, 0.99) * 1000, 1),
+            "lag_max_ms": round(self.max_lag * 1000, 1),
+        }
@@ -0,0 +1,170 @@
+"""
+Speculative pre-translation of reports posted in watched Slack channels.
+
+Report URLs usually appear in announcement channels long before anyone asks for a
+translation. SpeculativeTranslator picks them up from channel messages and asks the
+translator Lambda to translate them into the configured languages, so that the
+translation is in the translation cache when the request comes.
+
+Pre-translations never take a slot of the interactive job queue: they run one at a
+time, only start while the queue is idle, and the Lambda translates them with fewer
+parallel Bedrock calls than an interactive job. When someone asks for a report that
+is still waiting for its pre-translation, the pre-translation is dropped; if it is
+already running, the request waits for it and then finds its result in the
+translation cache (the translation service instead cancels the pre-translation and
+resumes from its checkpoint).
+"""
+
+import asyncio
+import os
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from slack_agent.intent_router import REPORT_URL_PATTERN, SLACK_LINK_PATTERN, Intent
+
+
+def prefetch_channels() -> List[str]:
+    return [c.strip() for c in os.getenv("PREFETCH_CHANNELS", "").split(",") if c.strip()]
+
+
+class SpeculativeTranslator:
+    """Queue of low-priority translations of reports posted in watched channels.
+
+    Settings default to environment variables:
+      - PREFETCH_CHANNELS: comma separated ids of the watched channels
+      - PREFETCH_LANGUAGES: target languages (default "jp,ko")
+      - PREFETCH_MAX_PENDING: pre-translations waiting at most; further URLs are dropped (default 50)
+      - PREFETCH_POLL_SECONDS: how often to check whether the job queue is idle (default 5)
+    """
+
+    def __init__(
+        self,
+        invoker,
+        job_queue,
+        channels: Optional[List[str]] = None,
+        languages: Optional[List[str]] = None,
+        max_pending: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+        seen_size: int = 1000,
+    ):
+        """
+        Args:
+            invoker: ActionInvoker that calls the translator Lambda
+            job_queue: Interactive FairJobQueue; pre-translations only start while it is idle
+            seen_size: Number of (URL, language) pairs remembered, so a URL posted again is not translated twice
+        """
+        self.invoker = invoker
+        self.job_queue = job_queue
+        self.channels = set(channels if channels is not None else prefetch_channels())
+        self.languages = languages or [
+            language.strip() for language in os.getenv("PREFETCH_LANGUAGES", "jp,ko").split(",") if language.strip()
+        ]
+        self.max_pending = max_pending or int(os.getenv("PREFETCH_MAX_PENDING", "50"))
+        self.poll_seconds = poll_seconds if poll_seconds is not None else float(os.getenv("PREFETCH_POLL_SECONDS", "5"))
+        self._seen_size = seen_size
+        self._seen: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._pending: Deque[Tuple[str, str]] = deque()
+        self._running: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.taken_over = 0
+
+    def start(self):
+        """Start the background task. Must be called from the running event loop."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="speculative-translator")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def offer(self, text: str, channel: str) -> int:
+        """Queue pre-translations of the report URLs in a message of a watched channel. Returns how many were queued."""
+        if channel not in self.channels:
+            return 0
+        text = SLACK_LINK_PATTERN.sub(r"\1", text or "")
+        queued = 0
+        for url in dict.fromkeys(REPORT_URL_PATTERN.findall(text)):
+            for language in self.languages:
+                key = (url, language)
+                if key in self._seen:
+                    continue
+                if len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    continue
+                self._seen[key] = None
+                while len(self._seen) > self._seen_size:
+                    self._seen.popitem(last=False)
+                self._pending.append(key)
+                queued += 1
+        if queued:
+            self.queued += queued
+            self.start()
+            self._wakeup.set()
+        return queued
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Interactive requests always go first
+            while not self.job_queue.idle:
+                await asyncio.sleep(self.poll_seconds)
+            if not self._pending:
+                # Taken over by an interactive request while waiting
+                continue
+            url, language = self._pending.popleft()
+            intent = Intent("translate_report", {"original_report_url": url, "language": language, "speculative": "true"})
+            running = self._running[(url, language)] = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.to_thread(self.invoker.invoke, intent)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Speculative translation of {url} ({language}) failed: {e}")
+            finally:
+                del self._running[(url, language)]
+                running.set_result(None)
+
+    async def take_over(self, url: str, language: str) -> bool:
+        """Hand the pre-translation of a report over to an interactive request for the same translation.
+
+        A pre-translation that has not started is dropped. A running one is waited for, so that
+        the interactive request finds its result in the translation cache instead of translating
+        the report a second time; with the translation service, which cancels the pre-translation
+        itself and resumes from its checkpoint, the request is not held back.
+
+        Returns:
+            Whether a pre-translation of the report was dropped or waited for.
+        """
+        key = (url, language)
+        if key in self._pending:
+            self._pending.remove(key)
+            self.taken_over += 1
+            return True
+        running = self._running.get(key)
+        if running is None:
+            return False
+        self.taken_over += 1
+        if not getattr(self.invoker, "service_url", None):
+            await asyncio.shield(running)
+        return True
+
+    def metrics(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "queued": self.queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "taken_over": self.taken_over,
+        }
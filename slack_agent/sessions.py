@@ -0,0 +1,108 @@
+"""
+Thread-scoped Bedrock agent sessions.
+
+Each Slack thread, identified by (channel, thread_ts), gets its own agent session id
+so that follow-up messages in the thread reuse the agent's context. Sessions are kept
+in a bounded LRU and expire after a period of inactivity, or are dropped as soon as the
+thread's parent message is deleted.
+
+Requests answered by the fast path never reach the agent. Their exchanges are recorded
+in the thread's session and handed to the agent as conversation history on the next
+agent call in the thread, so a follow-up such as "now do Korean too" has its context.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+ThreadKey = Tuple[str, str]
+# Exchanges kept per thread until the next agent call
+MAX_PENDING_EXCHANGES = 10
+
+
+class AgentSessionStore:
+    """Bounded LRU of agent session ids keyed by Slack thread.
+
+    Settings default to environment variables:
+      - AGENT_SESSION_MAX_THREADS: threads remembered at once (default 1000)
+      - AGENT_SESSION_IDLE_SECONDS: idle time after which a thread starts a new session (default 3600)
+    """
+
+    def __init__(self, max_size: Optional[int] = None, idle_seconds: Optional[float] = None):
+        self.max_size = max_size or int(os.getenv("AGENT_SESSION_MAX_THREADS", "1000"))
+        self.idle_seconds = idle_seconds if idle_seconds is not None else float(
+            os.getenv("AGENT_SESSION_IDLE_SECONDS", "3600")
+        )
+        # Per thread: (session id, last used, messages not yet seen by the agent)
+        self._sessions: "OrderedDict[ThreadKey, Tuple[str, float, List[dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, key: ThreadKey) -> Tuple[str, float, List[dict]]:
+        now = time.monotonic()
+        entry = self._sessions.pop(key, None)
+        if entry is not None and now - entry[1] <= self.idle_seconds:
+            entry = (entry[0], now, entry[2])
+        else:
+            entry = (new_session_id(*key), now, [])
+        self._sessions[key] = entry
+        self._evict(now)
+        return entry
+
+    def session_id(self, channel: str, thread_ts: str) -> str:
+        """Return the session id for a thread, starting a new session if needed."""
+        with self._lock:
+            return self._touch((channel, thread_ts))[0]
+
+    def record_exchange(self, channel: str, thread_ts: str, user_text: str, reply: str):
+        """Record a request answered outside the agent (the fast path) in the thread's session."""
+        with self._lock:
+            pending = self._touch((channel, thread_ts))[2]
+            pending.append({"role": "user", "content": [{"text": user_text}]})
+            pending.append({"role": "assistant", "content": [{"text": reply}]})
+            del pending[:-2 * MAX_PENDING_EXCHANGES]
+
+    def take_history(self, channel: str, thread_ts: str) -> List[dict]:
+        """Exchanges recorded since the thread's last agent call, as Bedrock conversationHistory messages.
+
+        The history is cleared once taken; the agent keeps it in its session from then on.
+        """
+        with self._lock:
+            entry = self._sessions.get((channel, thread_ts))
+            if entry is None:
+                return []
+            history = list(entry[2])
+            entry[2].clear()
+            return history
+
+    def forget(self, channel: str, thread_ts: str):
+        """Drop a thread's session and its pending exchanges (e.g. when the thread was deleted)."""
+        with self._lock:
+            self._sessions.pop((channel, thread_ts), None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self, now: float):
+        # Oldest entries are at the front: drop expired ones, then trim to size
+        while self._sessions:
+            _, (_, last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used > self.idle_seconds or len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+            else:
+                break
+
+
+def new_session_id(channel: Optional[str] = None, thread_ts: Optional[str] = None) -> str:
+    """Build an agent session id (Bedrock allows [0-9a-zA-Z._:-]+, up to 100 chars).
+
+    The id is derived from the thread so it is easy to trace, with a random suffix so
+    that a thread that restarts after expiry, or two requests sent in the same instant,
+    never share a session by accident.
+    """
+    suffix = uuid.uuid4().hex[:12]
+    if channel and thread_ts:
+        return f"{channel}-{thread_ts}-{suffix}"[-100:]
+    return uuid.uuid4().hex
@@ -0,0 +1,13 @@
+"""
+Small statistics helpers shared by the Slack app's metrics.
+"""
+
+from typing import Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank value at quantile q (0-1) of values, or 0.0 if there are none."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
@@ -0,0 +1,129 @@
+"""
+A single Slack status message per request, edited as the request progresses.
+
+The first reply to a mention ("queued", "Handling your request...") is kept and
+edited in place instead of posting new messages, so users can see that a long
+translation is moving and do not post it again. Edits are rate limited: Slack allows
+about one chat.update per second per channel, and the status of a translation does
+not need more. An edit held back by the limit is sent once the interval has passed,
+unless a newer edit replaces it first.
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Optional
+
+from slack_agent.intent_router import Intent
+
+
+class StatusMessage:
+    """One Slack message, posted once and then edited at most every `min_interval` seconds.
+
+    Settings default to environment variables:
+      - AGENT_STATUS_UPDATE_SECONDS: minimum time between edits (default 3)
+    """
+
+    def __init__(self, client, channel: str, thread_ts: str, min_interval: Optional[float] = None, clock=time.monotonic):
+        """
+        Args:
+            client: Slack AsyncWebClient
+            channel: Channel of the message
+            thread_ts: Thread the message is posted in
+            min_interval: Seconds between edits; an edit that comes sooner is held back until the next one
+        """
+        self.client = client
+        self.channel = channel
+        self.thread_ts = thread_ts
+        self.min_interval = min_interval if min_interval is not None else float(os.getenv("AGENT_STATUS_UPDATE_SECONDS", "3"))
+        self._clock = clock
+        self._posted = asyncio.Event()
+        self.ts: Optional[str] = None
+        self.text: Optional[str] = None
+        self._pending: Optional[str] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_edit: Optional[float] = None
+        self.edits = 0
+
+    async def post(self, text: str):
+        try:
+            response = await self.client.chat_postMessage(channel=self.channel, thread_ts=self.thread_ts, text=text)
+            self.ts = response["ts"]
+            self.text = text
+        finally:
+            # Updates wait for the message; without one they are dropped
+            self._posted.set()
+
+    async def update(self, text: str, force: bool = False) -> bool:
+        """Edit the message unless the text is unchanged or the last edit was too recent. Returns whether it was edited."""
+        await self._posted.wait()
+        if self.ts is None or text == self.text:
+            self._drop_pending()
+            return False
+        now = self._clock()
+        if not force and self._last_edit is not None and now - self._last_edit < self.min_interval:
+            self._pending = text
+            if self._flush_task is None:
+                # Send the latest held-back text once the interval has passed
+                delay = self.min_interval - (now - self._last_edit)
+                self._flush_task = asyncio.create_task(self._flush_after(delay))
+            return False
+        try:
+            await self.client.chat_update(channel=self.channel, ts=self.ts, text=text)
+        except Exception as e:
+            print(f"Error updating the status message: {e}")
+            return False
+        self.text = text
+        self._drop_pending()
+        self._last_edit = now
+        self.edits += 1
+        return True
+
+    async def flush(self) -> bool:
+        """Send an edit that was held back by the rate limit."""
+        if self._pending is None:
+            return False
+        return await self.update(self._pending, force=True)
+
+    async def _flush_after(self, delay: float):
+        await asyncio.sleep(delay)
+        self._flush_task = None
+        await self.flush()
+
+    def _drop_pending(self):
+        """Forget the held-back edit, e.g. because a newer one (such as the final status) was sent."""
+        self._pending = None
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+
+
+async def follow_translation(invoker, job_id: str, status: StatusMessage, poll_seconds: Optional[float] = None):
+    """Poll the translator's translation_status function and show the progress in the status message.
+
+    Runs until cancelled; the caller cancels it when the translation returns. Stops on its own
+    when the translator answers without a progress event, i.e. it stores no progress that
+    status queries can read (no shared progress store).
+
+    Settings default to environment variables:
+      - AGENT_PROGRESS_POLL_SECONDS: time between status queries (default 5)
+    """
+    if poll_seconds is None:
+        poll_seconds = float(os.getenv("AGENT_PROGRESS_POLL_SECONDS", "5"))
+    intent = Intent("translation_status", {"job_id": job_id, "format": "json"})
+    while True:
+        await asyncio.sleep(poll_seconds)
+        try:
+            body = await asyncio.to_thread(invoker.invoke, intent)
+        except Exception as e:
+            print(f"Error reading translation progress of {job_id}: {e}")
+            continue
+        try:
+            event = json.loads(body)
+        except json.JSONDecodeError:
+            print(f"Not following the progress of {job_id}: {body}")
+            return
+        # Nothing stored yet (or progress kept where this query cannot see it)
+        if event.get("stage"):
+            await status.update(event["text"])
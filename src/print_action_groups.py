@@ -1,133 +1,291 @@
+import argparse
 import boto3
+import concurrent.futures
+import datetime
 import json
 import os
+import sys
 
-def list_agent_actions(agent_id, region_name='us-east-1'):
+# slack_agent パッケージ（スナップショットの保存形式）をインポートできるようにリポジトリのルートを追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slack_agent.action_schema import SCHEMA_VERSION, diff_snapshots, load_snapshot, save_snapshot
+
+
+def _parse_api_schema(api_schema):
+    """
+    OpenAPI形式のスキーマからアクションを抽出する関数
+    """
+    # get_agent_action_group は {"payload": "<JSON>"} を返す（古い形式ではJSON文字列そのもの）
+    if isinstance(api_schema, dict):
+        api_schema = api_schema.get('payload')
+    if not api_schema:
+        return []
+    try:
+        api_schema = json.loads(api_schema) if isinstance(api_schema, str) else api_schema
+    except ValueError:
+        print("OpenAPIスキーマがJSONではないため、アクションを抽出できませんでした。")
+        return []
+
+    actions = []
+    for path, methods in api_schema.get('paths', {}).items():
+        for method, details in methods.items():
+            if 'operationId' not in details:
+                continue
+            # パラメータ情報の抽出
+            parameters = {}
+            for param in details.get('parameters', []):
+                parameters[param['name']] = {
+                    'in': param['in'],
+                    'required': param.get('required', False),
+                    'type': param.get('schema', {}).get('type', 'unknown'),
+                    'description': param.get('description', ''),
+                }
+            actions.append({
+                'name': details['operationId'],
+                'path': path,
+                'method': method.upper(),
+                'description': details.get('description', ''),
+                'parameters': parameters,
+            })
+    return actions
+
+
+def _parse_function_schema(function_schema):
+    """
+    関数定義（functionSchema）形式のスキーマからアクションを抽出する関数
+    """
+    actions = []
+    for function in (function_schema or {}).get('functions', []):
+        parameters = {}
+        for name, param in (function.get('parameters') or {}).items():
+            parameters[name] = {
+                'in': 'function',
+                'required': param.get('required', False),
+                'type': param.get('type', 'unknown'),
+                'description': param.get('description', ''),
+            }
+        actions.append({
+            'name': function['name'],
+            'description': function.get('description', ''),
+            'parameters': parameters,
+        })
+    return actions
+
+
+def resolve_agent_version(client, agent_id, agent_alias_id=None):
+    """
+    スナップショットを取るエージェントのバージョンを解決する関数
+
+    get_agent の agentVersion は作業中のエージェントでは常に DRAFT なので使わない。
+    エイリアスが指定されていれば、そのエイリアスがルーティングしているバージョンを返す。
+    そうでなければ list_agent_versions から最新の公開バージョンを返す（公開バージョンがなければ DRAFT）。
+
+    Parameters:
+    client: bedrock-agent クライアント
+    agent_id (str): エージェントのID
+    agent_alias_id (str): エージェントのエイリアスID（省略可）
+
+    Returns:
+    str: エージェントのバージョン
+    """
+    if agent_alias_id:
+        alias_response = client.get_agent_alias(agentId=agent_id, agentAliasId=agent_alias_id)
+        alias = alias_response.get('agentAlias', alias_response)
+        for route in alias.get('routingConfiguration') or []:
+            if route.get('agentVersion'):
+                return route['agentVersion']
+
+    versions = []
+    paginator = client.get_paginator('list_agent_versions')
+    for page in paginator.paginate(agentId=agent_id):
+        for summary in page.get('agentVersionSummaries', []):
+            version = summary.get('agentVersion')
+            if version and version.isdigit():
+                versions.append(int(version))
+    return str(max(versions)) if versions else 'DRAFT'
+
+
+def fetch_action_schema(agent_id, region_name='us-east-1', agent_version=None, client=None, max_workers=8,
+                        agent_alias_id=None):
     """
-    Amazon Bedrock Agentに登録されたアクションを取得して出力する関数
-    
+    Amazon Bedrock Agentのアクショングループを取得してスナップショット形式で返す関数
+
+    アクショングループの詳細（get_agent_action_group）は並列に取得する。
+
     Parameters:
     agent_id (str): エージェントのID
     region_name (str): AWSリージョン名（デフォルト: 'us-east-1'）
-    
+    agent_version (str): エージェントのバージョン（デフォルト: エイリアスのバージョン、なければ最新の公開バージョン）
+    client: bedrock-agent クライアント（省略時は作成する）
+    max_workers (int): 詳細を並列に取得する数
+    agent_alias_id (str): バージョンを解決するエイリアスのID（省略可）
+
     Returns:
-    dict: アクショングループとアクションの一覧
+    dict: スナップショット（slack_agent/action_schema.py の形式）
     """
     # Bedrock Agentのクライアントを作成
-    bedrock_agent_client = boto3.client('bedrock-agent', region_name=region_name)
-    
-    # エージェントの最新バージョンを取得
-    agent_response = bedrock_agent_client.get_agent(
-        agentId=agent_id
-    )
-    # レスポンスの構造をデバッグ出力
-    print("Agent Response:", json.dumps(agent_response, indent=2))
-    agent_version = agent_response.get('agentStatus', {}).get('latestVersion', 'DRAFT')
-    
+    bedrock_agent_client = client or boto3.client('bedrock-agent', region_name=region_name)
+
+    # スナップショットを取るバージョンを解決（エイリアスのバージョン、なければ最新の公開バージョン）
+    if agent_version is None:
+        agent_version = resolve_agent_version(bedrock_agent_client, agent_id, agent_alias_id)
+
     # エージェントのアクショングループを取得
-    action_groups = []
+    summaries = []
     paginator = bedrock_agent_client.get_paginator('list_agent_action_groups')
     for page in paginator.paginate(agentId=agent_id, agentVersion=agent_version):
-        action_groups.extend(page['agentActionGroupSummaries'])
-    
-    # 各アクショングループの詳細な情報を取得
-    result = {}
-    for action_group in action_groups:
-        action_group_id = action_group['agentActionGroupId']
-        
-        # アクショングループの詳細を取得
-        action_group_detail = bedrock_agent_client.get_agent_action_group(
+        summaries.extend(page['agentActionGroupSummaries'])
+
+    # 各アクショングループの詳細な情報を並列に取得
+    def fetch_detail(summary):
+        response = bedrock_agent_client.get_agent_action_group(
             agentId=agent_id,
-            agentActionGroupId=action_group_id,
+            agentActionGroupId=summary['agentActionGroupId'],
             agentVersion=agent_version
         )
-        
-        # アクションスキーマの解析
-        action_group_name = action_group_detail['agentActionGroupName']
-        api_schema = json.loads(action_group_detail['apiSchema'])
-        
-        # OpenAPI形式のスキーマからアクションを抽出
-        actions = []
-        if 'paths' in api_schema:
-            for path, methods in api_schema['paths'].items():
-                for method, details in methods.items():
-                    if 'operationId' in details:
-                        action = {
-                            'operationId': details['operationId'],
-                            'path': path,
-                            'method': method.upper(),
-                            'description': details.get('description', ''),
-                            'parameters': []
-                        }
-                        
-                        # パラメータ情報の抽出
-                        if 'parameters' in details:
-                            for param in details['parameters']:
-                                param_info = {
-                                    'name': param['name'],
-                                    'in': param['in'],
-                                    'required': param.get('required', False),
-                                    'type': param.get('schema', {}).get('type', 'unknown')
-                                }
-                                action['parameters'].append(param_info)
-                        
-                        actions.append(action)
-        
-        result[action_group_name] = actions
-    
-    return result
+        return response.get('agentActionGroup', response)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(summaries)))) as executor:
+        details = list(executor.map(fetch_detail, summaries))
+
+    action_groups = {}
+    for detail in details:
+        if detail.get('apiSchema'):
+            actions = _parse_api_schema(detail['apiSchema'])
+        else:
+            actions = _parse_function_schema(detail.get('functionSchema'))
+        action_groups[detail['agentActionGroupName']] = {
+            'id': detail.get('agentActionGroupId'),
+            'state': detail.get('actionGroupState'),
+            'lambda': (detail.get('actionGroupExecutor') or {}).get('lambda'),
+            'description': detail.get('description', ''),
+            'actions': actions,
+        }
+
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'agent_id': agent_id,
+        'agent_version': agent_version,
+        'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'action_groups': action_groups,
+    }
+
+
+def list_agent_actions(agent_id, region_name='us-east-1'):
+    """
+    Amazon Bedrock Agentに登録されたアクションを取得する関数
+
+    Parameters:
+    agent_id (str): エージェントのID
+    region_name (str): AWSリージョン名（デフォルト: 'us-east-1'）
+
+    Returns:
+    dict: アクショングループとアクションの一覧
+    """
+    snapshot = fetch_action_schema(agent_id, region_name)
+    return {name: group['actions'] for name, group in snapshot['action_groups'].items()}
+
+
+def print_snapshot(snapshot):
+    """
+    スナップショットのアクションを整形して出力する関数
+    """
+    print(f"Agent ID: {snapshot['agent_id']} (version {snapshot['agent_version']}, fetched {snapshot['fetched_at']})\n")
+
+    if not snapshot['action_groups']:
+        print("アクショングループが見つかりませんでした。")
+        return
+
+    for group_name, group in snapshot['action_groups'].items():
+        print(f"===== アクショングループ: {group_name} =====")
+        if group.get('lambda'):
+            print(f"  Lambda: {group['lambda']}")
+
+        if not group['actions']:
+            print("  アクションが見つかりませんでした。")
+            continue
+
+        for i, action in enumerate(group['actions'], 1):
+            print(f"\nアクション {i}: {action['name']}")
+            if action.get('path'):
+                print(f"  パス: {action['path']}")
+                print(f"  メソッド: {action['method']}")
+
+            if action['description']:
+                print(f"  説明: {action['description']}")
+
+            if action['parameters']:
+                print("  パラメータ:")
+                for name, param in action['parameters'].items():
+                    required = "必須" if param['required'] else "任意"
+                    print(f"    - {name} ({param['in']}, {param['type']}, {required})")
+            else:
+                print("  パラメータ: なし")
+
+        print("\n")
+
 
 def print_agent_actions(agent_id, region_name='us-east-1'):
     """
     Amazon Bedrock Agentに登録されたアクションを取得して整形して出力する関数
-    
+
     Parameters:
     agent_id (str): エージェントのID
     region_name (str): AWSリージョン名（デフォルト: 'us-east-1'）
     """
     try:
-        # アクション一覧を取得
-        action_groups = list_agent_actions(agent_id, region_name)
-        
-        # 結果の整形と出力
-        print(f"Agent ID: {agent_id}\n")
-        
-        if not action_groups:
-            print("アクショングループが見つかりませんでした。")
-            return
-        
-        for group_name, actions in action_groups.items():
-            print(f"===== アクショングループ: {group_name} =====")
-            
-            if not actions:
-                print("  アクションが見つかりませんでした。")
-                continue
-            
-            for i, action in enumerate(actions, 1):
-                print(f"\nアクション {i}: {action['operationId']}")
-                print(f"  パス: {action['path']}")
-                print(f"  メソッド: {action['method']}")
-                
-                if action['description']:
-                    print(f"  説明: {action['description']}")
-                
-                if action['parameters']:
-                    print("  パラメータ:")
-                    for param in action['parameters']:
-                        required = "必須" if param['required'] else "任意"
-                        print(f"    - {param['name']} ({param['in']}, {param['type']}, {required})")
-                else:
-                    print("  パラメータ: なし")
-            
-            print("\n")
-    
+        print_snapshot(fetch_action_schema(agent_id, region_name))
     except Exception as e:
         print(f"エラーが発生しました: {str(e)}")
 
-# 使用例
-if __name__ == "__main__":
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bedrock Agentのアクショングループを表示・保存・比較する")
+    parser.add_argument("--agent-version", help="対象のエージェントバージョン（デフォルト: エイリアスのバージョン、なければ最新の公開バージョン）")
+    parser.add_argument("--agent-alias", default=os.getenv("AGENT_ALIAS_ID"),
+                        help="バージョンを解決するエイリアスのID（デフォルト: AGENT_ALIAS_ID）")
+    parser.add_argument("--save", action="store_true", help="スナップショットを AGENT_SCHEMA_DIR に保存する")
+    parser.add_argument("--cached", action="store_true", help="コントロールプレーンに問い合わせず、保存済みのスナップショットを表示する")
+    parser.add_argument("--diff", nargs="+", metavar="VERSION",
+                        help="スナップショット同士を比較する（1つだけ指定した場合は現在のエージェントと比較する）")
+    parser.add_argument("--json", action="store_true", help="スナップショットをJSONで出力する")
+    args = parser.parse_args(argv)
+
     # エージェントIDを指定して実行
     agent_id = os.environ["AGENT_ID"]
-    region_name = os.environ["AWS_REGION"] 
-    
-    print_agent_actions(agent_id, region_name)
\ No newline at end of file
+    region_name = os.environ["AWS_REGION"]
+
+    if args.diff:
+        old = load_snapshot(args.diff[0])
+        if old is None:
+            sys.exit(f"スナップショットが見つかりません: {args.diff[0]}")
+        if len(args.diff) > 1:
+            new = load_snapshot(args.diff[1])
+            if new is None:
+                sys.exit(f"スナップショットが見つかりません: {args.diff[1]}")
+        else:
+            new = fetch_action_schema(agent_id, region_name, args.agent_version, agent_alias_id=args.agent_alias)
+        changes = diff_snapshots(old, new)
+        print(f"{old['agent_version']} -> {new['agent_version']}: {len(changes)} change(s)")
+        for change in changes:
+            print(f"  {change}")
+        return
+
+    if args.cached:
+        snapshot = load_snapshot(args.agent_version or "latest")
+        if snapshot is None:
+            sys.exit("スナップショットが見つかりません。--save を付けて実行してください。")
+    else:
+        snapshot = fetch_action_schema(agent_id, region_name, args.agent_version, agent_alias_id=args.agent_alias)
+    if args.save:
+        print(f"スナップショットを保存しました: {save_snapshot(snapshot)}")
+    if args.json:
+        print(json.dumps(snapshot, ensure_ascii=False, indent=2))
+    else:
+        print_snapshot(snapshot)
+
+
+# 使用例
+if __name__ == "__main__":
+    main()
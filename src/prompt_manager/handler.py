@@ -1,26 +1,66 @@
 import os
+import sys
 import weave
 from dotenv import load_dotenv
 from pathlib import Path
 
+# Add src/prompt_manager to sys.path to allow module import
+sys.path.append(os.path.dirname(__file__))
+
+from prompt_registry import PromptRegistry, backend_from_env
+
 # Load environment variables from .env file
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(env_path)
-weave.init(os.environ["WANDB_ENTITY"] + "/" + os.environ["WANDB_PROJECT"])
 
 PROMPT_NAME = "translate_prompt"
 
+_weave_initialized = False
+_registry = None
+
+
+def _ensure_weave():
+    """Initialize Weave on first use, so requests served from the snapshot never touch it."""
+    global _weave_initialized
+    if not _weave_initialized:
+        weave.init(os.environ["WANDB_ENTITY"] + "/" + os.environ["WANDB_PROJECT"])
+        _weave_initialized = True
+
+
+def _fetch_prompt_from_weave():
+    _ensure_weave()
+    prompt = weave.ref(f"weave:///wandb-japan/fc-agent/object/{PROMPT_NAME}:latest").get()
+    # The resolved object carries a ref with the concrete digest (the requested ref only says "latest")
+    return prompt.content, getattr(getattr(prompt, "ref", None), "digest", None)
+
+
+def _publish_prompt_to_weave(new_prompt: str):
+    _ensure_weave()
+    prompt_obj = weave.StringPrompt(new_prompt)
+    ref = weave.publish(prompt_obj, name=PROMPT_NAME)
+    return getattr(ref, "digest", None)
+
+
+def get_registry() -> PromptRegistry:
+    global _registry
+    if _registry is None:
+        _registry = PromptRegistry(
+            PROMPT_NAME,
+            backend_from_env(),
+            fetch=_fetch_prompt_from_weave,
+            publish=_publish_prompt_to_weave,
+        )
+    return _registry
+
 # Get the latest prompt
 @weave.op()
 def get_current_prompt():
-    ref = weave.ref(f"weave:///wandb-japan/fc-agent/object/{PROMPT_NAME}:latest")
-    return ref.get().content
+    return get_registry().get()["content"]
 
 # Update the prompt
 @weave.op()
 def update_prompt(new_prompt: str):
-    prompt_obj = weave.StringPrompt(new_prompt)
-    weave.publish(prompt_obj, name=PROMPT_NAME)
+    get_registry().publish(new_prompt)
     return True
 
 @weave.op(call_display_name="lambda_handler_prompt_manager")
@@ -30,15 +70,22 @@ def lambda_handler(event, context):
     Expects instructions in event["parameters"]:
       - "show_prompt": Returns the latest prompt
       - "update_prompt": Updates the prompt with the new value
+      - "list_versions": Lists recent prompt versions (optional "limit")
+      - "diff_versions": Diffs two prompt versions (optional "version_a", "version_b"; defaults to the last two)
     """
     parameters = event.get("parameters", [])
     param_dict = {p["name"]: p["value"] for p in parameters}
     action = param_dict.get("action")
-    
+
     if action == "show_prompt":
-        prompt = get_current_prompt()
+        snapshot = get_registry().get()
+        prompt = snapshot["content"]
         prompt_url = f"weave:///wandb-japan/fc-agent/object/{PROMPT_NAME}:latest"
-        result_text = f"Current prompt:\n{prompt}\n\nCurrent prompt's Weave URL:\n{prompt_url}"
+        version = f" (version {snapshot['version']})" if snapshot["version"] is not None else ""
+        result_text = (
+            f"Current prompt{version}:\n{prompt}\n\n"
+            f"Current prompt's Weave URL:\n{prompt_url}"
+        )
     elif action == "update_prompt":
         new_prompt = param_dict.get("prompt")
         if not new_prompt:
@@ -47,8 +94,28 @@ def lambda_handler(event, context):
             update_prompt(new_prompt)
             prompt_url = f"weave:///{os.environ['WANDB_ENTITY']}/{os.environ['WANDB_PROJECT']}/object/{PROMPT_NAME}:latest"
             result_text = f"Prompt has been updated.\nNew Prompt URL: {prompt_url}\nUpdated Prompt:\n{new_prompt}"
+    elif action == "list_versions":
+        versions = get_registry().list_versions(limit=int(param_dict.get("limit") or 10))
+        if get_registry().backend is None:
+            result_text = "Prompt versions are not recorded: no snapshot store is configured (PROMPT_SNAPSHOT_BUCKET)."
+        elif not versions:
+            result_text = "No prompt versions have been recorded yet."
+        else:
+            lines = [
+                f"v{v['version']} ({v['published_at']}, {v['source']}, {v['size']} chars): {v['summary']}"
+                for v in versions
+            ]
+            result_text = "Recent prompt versions:\n" + "\n".join(lines)
+    elif action == "diff_versions":
+        try:
+            version_a = int(param_dict["version_a"]) if param_dict.get("version_a") else None
+            version_b = int(param_dict["version_b"]) if param_dict.get("version_b") else None
+            diff = get_registry().diff(version_a, version_b)
+            result_text = diff if diff else "No differences."
+        except (KeyError, ValueError) as e:
+            result_text = f"Error: {e}"
     else:
-        result_text = "Error: Please specify a valid action (show_prompt, update_prompt)."
+        result_text = "Error: Please specify a valid action (show_prompt, update_prompt, list_versions, diff_versions)."
 
     response_body = {"TEXT": {"body": result_text}}
     function_response = {
@@ -64,4 +131,4 @@ def lambda_handler(event, context):
         "sessionAttributes": session_attributes,
         "promptSessionAttributes": prompt_session_attributes
     }
-    return action_response 
\ No newline at end of file
+    return action_response
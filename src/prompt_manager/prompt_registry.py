@@ -0,0 +1,341 @@
+"""
+Write-through snapshot store for Weave prompts.
+
+The registry keeps a versioned snapshot of a prompt next to Weave:
+
+    <name>/index.json               version list (metadata only, no prompt bodies)
+    <name>/versions/<version>.json  one snapshot per published version
+
+Reads are served from an in-memory copy, validated against the ETag of index.json,
+so a read costs one HEAD request (S3) or one stat call (local disk). Publishing goes
+to Weave first and is then written through to the snapshot, which changes the ETag
+of index.json and invalidates every reader's copy straight away.
+
+Without a snapshot backend the registry reads the prompt live from Weave and keeps no
+versions.
+
+Writers in different Lambda containers may publish at the same time. A version file is
+only created if it does not exist yet (If-None-Match), and index.json is only replaced
+if it is still the one the writer read (If-Match); on a conflict the writer reads the
+index again and retries.
+"""
+
+import difflib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+# ---- Snapshot backends ----
+
+
+class SnapshotConflict(Exception):
+    """A conditional write failed: the key exists already, or changed since it was read."""
+
+
+class LocalSnapshotBackend:
+    """Stores snapshots as files under a local directory.
+
+    Creating a key with if_none_match is atomic across processes; the if_match check is
+    only atomic within one process.
+    """
+
+    _write_lock = threading.Lock()
+    _last_stamp = 0
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    @staticmethod
+    def _etag(st: os.stat_result) -> str:
+        return f"{st.st_mtime_ns}-{st.st_size}"
+
+    def head(self, key: str) -> Optional[str]:
+        try:
+            return self._etag(os.stat(self._path(key)))
+        except FileNotFoundError:
+            return None
+
+    def read(self, key: str) -> Optional[Tuple[bytes, str]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                # The ETag of the file that was read, even if it is replaced in the meantime
+                return f.read(), self._etag(os.fstat(f.fileno()))
+        except FileNotFoundError:
+            return None
+
+    def write(self, key: str, data: bytes, if_match: Optional[str] = None, if_none_match: bool = False) -> str:
+        """Write a key and return its new ETag.
+
+        Raises:
+            SnapshotConflict: if_none_match is set and the key exists, or if_match differs from its ETag
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._write_lock:
+            # The ETag is the mtime and size, and the file system clock is coarse: give every write its own mtime
+            stamp = max(time.time_ns(), LocalSnapshotBackend._last_stamp + 1)
+            LocalSnapshotBackend._last_stamp = stamp
+            os.utime(tmp_path, ns=(stamp, stamp))
+            if if_none_match:
+                # link() fails if the key exists, so only one writer creates it
+                try:
+                    os.link(tmp_path, path)
+                except FileExistsError:
+                    raise SnapshotConflict(f"{key} already exists") from None
+                finally:
+                    os.remove(tmp_path)
+            else:
+                if if_match is not None and self.head(key) != if_match:
+                    os.remove(tmp_path)
+                    raise SnapshotConflict(f"{key} changed since it was read")
+                os.replace(tmp_path, path)
+            return self.head(key)
+
+
+class S3SnapshotBackend:
+    """Stores snapshots in S3 so that every Lambda container shares them."""
+
+    def __init__(self, bucket: str, prefix: str = "", s3_client=None):
+        if s3_client is None:
+            import boto3
+            s3_client = boto3.client("s3")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.s3 = s3_client
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def head(self, key: str) -> Optional[str]:
+        try:
+            return self.s3.head_object(Bucket=self.bucket, Key=self._key(key))["ETag"]
+        except self.s3.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def read(self, key: str) -> Optional[Tuple[bytes, str]]:
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self._key(key))
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        return obj["Body"].read(), obj["ETag"]
+
+    def write(self, key: str, data: bytes, if_match: Optional[str] = None, if_none_match: bool = False) -> str:
+        """Write a key with an S3 conditional put and return its new ETag.
+
+        Raises:
+            SnapshotConflict: if_none_match is set and the key exists, or if_match differs from its ETag
+        """
+        conditions = {}
+        if if_none_match:
+            conditions["IfNoneMatch"] = "*"
+        elif if_match is not None:
+            conditions["IfMatch"] = if_match
+        try:
+            response = self.s3.put_object(
+                Bucket=self.bucket, Key=self._key(key), Body=data, ContentType="application/json", **conditions
+            )
+        except self.s3.exceptions.ClientError as e:
+            # 412 when the condition does not hold, 409 when another conditional write to the key is in progress
+            if e.response.get("Error", {}).get("Code") in ("PreconditionFailed", "ConditionalRequestConflict"):
+                raise SnapshotConflict(f"{key}: {e}") from e
+            raise
+        return response["ETag"]
+
+
+def backend_from_env():
+    """S3 backend if PROMPT_SNAPSHOT_BUCKET is set, a local directory if PROMPT_SNAPSHOT_DIR is set, else None.
+
+    Without a backend the registry reads the prompt live from Weave. A local directory is
+    not shared between Lambda containers, so each container would number its own versions;
+    it is meant for development and single-process deployments only.
+    """
+    bucket = os.getenv("PROMPT_SNAPSHOT_BUCKET")
+    if bucket:
+        return S3SnapshotBackend(bucket, os.getenv("PROMPT_SNAPSHOT_PREFIX", "prompt-snapshots"))
+    directory = os.getenv("PROMPT_SNAPSHOT_DIR")
+    if directory:
+        return LocalSnapshotBackend(directory)
+    return None
+
+
+# ---- Registry ----
+
+
+class PromptRegistry:
+    """Versioned, write-through snapshot of a single prompt.
+
+    Args:
+        name: Prompt name (e.g. "translate_prompt").
+        backend: Snapshot backend (LocalSnapshotBackend or S3SnapshotBackend). None reads the prompt live
+            from Weave on every get() and keeps no versions.
+        fetch: Returns (content, weave_digest) of the latest prompt in Weave. Used when no snapshot exists yet
+            and when the snapshot is older than max_age seconds.
+        publish: Publishes new content to Weave and returns its digest.
+        max_age: Seconds after which the snapshot is re-checked against Weave, to pick up prompts
+            published outside the registry. 0 disables the check.
+        max_attempts: Attempts to append a version when other writers update the index at the same time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        backend,
+        fetch: Callable[[], Tuple[str, Optional[str]]],
+        publish: Callable[[str], Optional[str]],
+        max_age: Optional[float] = None,
+        max_attempts: int = 10,
+    ):
+        self.name = name
+        self.backend = backend
+        self._fetch = fetch
+        self._publish = publish
+        self.max_age = max_age if max_age is not None else float(os.getenv("PROMPT_SNAPSHOT_MAX_AGE", "3600"))
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # In-memory copy: (index etag, latest version entry with content)
+        self._cached_etag: Optional[str] = None
+        self._cached: Optional[dict] = None
+        self._checked_at = 0.0
+
+    @property
+    def _index_key(self) -> str:
+        return f"{self.name}/index.json"
+
+    def _version_key(self, version: int) -> str:
+        return f"{self.name}/versions/{version:06d}.json"
+
+    def _read_index(self) -> Tuple[List[dict], Optional[str]]:
+        found = self.backend.read(self._index_key)
+        if found is None:
+            return [], None
+        data, etag = found
+        return json.loads(data.decode("utf-8"))["versions"], etag
+
+    def _read_version(self, version: int) -> dict:
+        found = self.backend.read(self._version_key(version))
+        if found is None:
+            raise KeyError(f"Prompt version {version} not found in snapshot store.")
+        return json.loads(found[0].decode("utf-8"))
+
+    def _claim_version(self, version: int, content: str, digest: Optional[str], source: str) -> dict:
+        """Create the snapshot file of the first free version from `version` on."""
+        entry = {
+            "digest": digest,
+            "published_at": datetime.now(timezone.utc).isoformat(),
+            "size": len(content),
+            "source": source,
+            "summary": content.strip().splitlines()[0][:120] if content.strip() else "",
+        }
+        while True:
+            snapshot = dict(entry, version=version, content=content)
+            try:
+                self.backend.write(
+                    self._version_key(version), json.dumps(snapshot, ensure_ascii=False).encode("utf-8"), if_none_match=True
+                )
+                return snapshot
+            except SnapshotConflict:
+                # Taken by a concurrent writer, or left by one that never updated the index
+                version += 1
+
+    def _append_version(self, content: str, digest: Optional[str], source: str) -> dict:
+        snapshot = None
+        for attempt in range(self.max_attempts):
+            versions, index_etag = self._read_index()
+            latest = versions[-1]["version"] if versions else 0
+            if snapshot is None or snapshot["version"] <= latest:
+                snapshot = self._claim_version(latest + 1, content, digest, source)
+            # Writing the index last publishes the version and changes the ETag readers validate against
+            versions.append({k: v for k, v in snapshot.items() if k != "content"})
+            try:
+                etag = self.backend.write(
+                    self._index_key,
+                    json.dumps({"name": self.name, "versions": versions}, ensure_ascii=False).encode("utf-8"),
+                    if_match=index_etag,
+                    if_none_match=index_etag is None,
+                )
+            except SnapshotConflict:
+                # Another writer updated the index since it was read; read it again and retry
+                time.sleep(random.uniform(0, 0.05 * (attempt + 1)))
+                continue
+            self._cached, self._cached_etag, self._checked_at = snapshot, etag, time.time()
+            return snapshot
+        raise SnapshotConflict(f"Could not update {self._index_key} after {self.max_attempts} attempts")
+
+    def get(self) -> dict:
+        """Return the latest snapshot: {"version", "digest", "published_at", "content", ...}."""
+        if self.backend is None:
+            content, digest = self._fetch()
+            return {"version": None, "digest": digest, "content": content, "source": "weave"}
+        with self._lock:
+            etag = self.backend.head(self._index_key)
+            if etag is None or etag != self._cached_etag:
+                versions, etag = self._read_index()
+                if not versions:
+                    content, digest = self._fetch()
+                    return self._append_version(content, digest, source="weave")
+                self._cached = self._read_version(versions[-1]["version"])
+                self._cached_etag = etag
+                if not self._checked_at:
+                    # Trust a fresh snapshot; re-check against Weave after max_age seconds
+                    self._checked_at = time.time()
+            if self._is_stale():
+                self._sync_with_weave()
+            return self._cached
+
+    def _is_stale(self) -> bool:
+        return bool(self.max_age) and time.time() - self._checked_at > self.max_age
+
+    def _sync_with_weave(self):
+        content, digest = self._fetch()
+        self._checked_at = time.time()
+        if content != self._cached.get("content"):
+            self._append_version(content, digest, source="weave")
+
+    def publish(self, content: str) -> dict:
+        """Publish a new prompt to Weave and write it through to the snapshot."""
+        with self._lock:
+            digest = self._publish(content)
+            if self.backend is None:
+                return {"version": None, "digest": digest, "content": content, "source": "update_prompt"}
+            return self._append_version(content, digest, source="update_prompt")
+
+    def list_versions(self, limit: int = 10) -> List[dict]:
+        """Most recent versions first, from the index only (prompt bodies are not downloaded)."""
+        if self.backend is None:
+            return []
+        versions, _ = self._read_index()
+        return list(reversed(versions[-limit:]))
+
+    def diff(self, version_a: Optional[int] = None, version_b: Optional[int] = None) -> str:
+        """Unified diff between two versions. Defaults to the previous and the latest version."""
+        if self.backend is None:
+            return ""
+        versions, _ = self._read_index()
+        if not versions:
+            return ""
+        latest = versions[-1]["version"]
+        version_b = version_b or latest
+        version_a = version_a or max(1, version_b - 1)
+        a = self._read_version(version_a)["content"]
+        b = self._read_version(version_b)["content"]
+        return "".join(
+            difflib.unified_diff(
+                a.splitlines(keepends=True),
+                b.splitlines(keepends=True),
+                fromfile=f"{self.name}:v{version_a}",
+                tofile=f"{self.name}:v{version_b}",
+            )
+        )
@@ -19,7 +19,7 @@ load_dotenv(env_path)
 # Initialize Weave with the project
 weave.init(os.environ["WANDB_ENTITY"] + "/" + os.environ["WANDB_PROJECT"])
 
-# Updated system prompt that handles both link and inline code placeholders
+# Updated system prompt that handles link, inline code and glossary term placeholders
 system_prompt = weave.StringPrompt(
     "Translate the following text to {prompt_language}."
     "\n ### Rules"
@@ -27,6 +27,7 @@ system_prompt = weave.StringPrompt(
     "\n- If it is written by Markdown, please translate it as Markdown."
     "\n- Please keep any parts like __INLINECODE_x__ unchanged during translation."
     "\n- Please keep any parts like __LINK_x__ unchanged during translation."
+    "\n- Please keep any parts like __TERM_x__ unchanged during translation."
 )
 
 # Publish the updated prompt
@@ -0,0 +1,284 @@
+"""
+Offline translation of report backlogs through Bedrock batch inference.
+
+Usage:
+python batch_inference.py export reports.jsonl --records records.jsonl --manifest manifest.jsonl
+    (upload records.jsonl to S3 and run a Bedrock batch inference job on it)
+python batch_inference.py import records.jsonl.out --manifest manifest.jsonl --output results.jsonl
+
+`export` walks each report with the same block logic as the online translator and
+writes every segment that needs translation as one batch-inference record. Record
+ids are stable: the same report, language, segment and prompt always give the same
+id. The manifest maps each record id back to its report, language and segment, and
+lists every exported job, including jobs with no records.
+
+`import` reads the batch output, restores inline-code and glossary placeholders, and assembles
+and saves the translated reports of all exported jobs. Segments missing from the output
+(failed records) are translated on demand.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Add src/wandb_translator to sys.path to allow module import
+sys.path.append(os.path.dirname(__file__))
+
+from batch_translate import ResultWriter, read_jobs
+from checkpoint import MemoryCheckpointStore, checkpoint_key, source_digest
+from handler import WandBReportTranslator
+from language_filter import needs_translation
+
+Job = Tuple[str, str]
+
+_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def record_id(url: str, language: str, segment, prompt_version: str) -> str:
+    """Stable 11-character alphanumeric record id, as expected by Bedrock batch inference."""
+    digest = int.from_bytes(hashlib.sha256(f"{url}\n{language}\n{segment}\n{prompt_version}".encode("utf-8")).digest(), "big")
+    chars = []
+    for _ in range(11):
+        digest, n = divmod(digest, len(_ALPHABET))
+        chars.append(_ALPHABET[n])
+    return "".join(chars)
+
+
+def _segment_key(value: str):
+    return int(value) if value.isdigit() else value
+
+
+# ---- Export ----
+
+
+def export_records(
+    jobs: Iterable[Job],
+    translator: WandBReportTranslator,
+    records_path: str,
+    manifest_path: str,
+) -> dict:
+    """Write batch-inference records and their manifest for every segment that needs translation.
+
+    Each loaded report also gets a job line in the manifest (without a recordId), so that
+    import assembles it even if none of its segments were exported.
+
+    Returns:
+        Counts of exported records, skipped segments and reports that failed to load.
+    """
+    counts = {"records": 0, "skipped": 0, "reports": 0, "failed_reports": 0}
+    seen = set()
+    with open(records_path, "w", encoding="utf-8") as records, open(manifest_path, "w", encoding="utf-8") as manifest:
+        for url, language in jobs:
+            try:
+                source_report = translator._load_source_report(url)
+                prompt_version = translator._prompt_version()
+            except Exception as e:
+                print(f"Error loading report {url}: {e}")
+                counts["failed_reports"] += 1
+                continue
+            counts["reports"] += 1
+            job_records = 0
+            for key, segment in translator._report_segments(source_report, url):
+                if not needs_translation(segment.text, language):
+                    counts["skipped"] += 1
+                    continue
+                rid = record_id(url, language, key, prompt_version)
+                if rid in seen:
+                    continue
+                seen.add(rid)
+                # Inline code placeholders stay in the output; they are restored when the block is rebuilt
+                flat, placeholders = translator.glossary.protect(segment.text, language)
+                records.write(json.dumps(
+                    {"recordId": rid, "modelInput": translator._build_payload(flat, language)}, ensure_ascii=False
+                ) + "\n")
+                manifest.write(json.dumps({
+                    "recordId": rid,
+                    "url": url,
+                    "language": language,
+                    "segment": str(key),
+                    "segment_type": segment.kind,
+                    "placeholders": placeholders,
+                    "prompt_version": prompt_version,
+                    "source": source_digest(segment.text),
+                }, ensure_ascii=False) + "\n")
+                counts["records"] += 1
+                job_records += 1
+            manifest.write(json.dumps({
+                "url": url, "language": language, "prompt_version": prompt_version, "records": job_records
+            }, ensure_ascii=False) + "\n")
+    return counts
+
+
+# ---- Import ----
+
+
+def _manifest_entries(manifest_path: str) -> List[dict]:
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def read_manifest(manifest_path: str) -> Dict[str, dict]:
+    """Record entries of a manifest, by record id."""
+    return {entry["recordId"]: entry for entry in _manifest_entries(manifest_path) if "recordId" in entry}
+
+
+def read_manifest_jobs(manifest_path: str) -> Dict[Job, str]:
+    """Every exported job of a manifest, with the prompt version it was exported with."""
+    # Record entries are included for manifests written before job lines were added
+    return {(entry["url"], entry["language"]): entry["prompt_version"] for entry in _manifest_entries(manifest_path)}
+
+
+def read_batch_output(output_paths: List[str], manifest: Dict[str, dict]) -> Tuple[Dict[Job, dict], List[dict]]:
+    """Collect translations per job from batch-inference output files.
+
+    Returns:
+        Tuple of ({(url, language): {segment key: (translated text, source digest)}}, [failed records]).
+    """
+    translations: Dict[Job, dict] = defaultdict(dict)
+    failed: List[dict] = []
+    for path in output_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                meta = manifest.get(entry.get("recordId"))
+                if meta is None:
+                    continue
+                output = entry.get("modelOutput") or {}
+                content = output.get("content") or []
+                if entry.get("error") or not content:
+                    failed.append({"recordId": entry.get("recordId"), "error": entry.get("error", "empty output")})
+                    continue
+                if output.get("stop_reason") == "max_tokens":
+                    # Cut off: translated online, where truncated output is split and translated in halves
+                    failed.append({"recordId": entry.get("recordId"), "error": "output stopped at max_tokens"})
+                    continue
+                placeholders = [tuple(p) for p in meta["placeholders"]]
+                if WandBReportTranslator._missing_placeholders(content[0]["text"], placeholders):
+                    # Left out, so the segment is translated online with retries
+                    failed.append({"recordId": entry.get("recordId"), "error": "placeholders lost"})
+                    continue
+                text = WandBReportTranslator._restore_placeholders(content[0]["text"], placeholders)
+                # The digest of the exported source text; segments edited since are translated again on import
+                translations[(meta["url"], meta["language"])][_segment_key(meta["segment"])] = (text, meta.get("source"))
+    return dict(translations), failed
+
+
+def assemble_reports(
+    translations: Dict[Job, dict],
+    output_path: str,
+    make_translator: Callable[[MemoryCheckpointStore], WandBReportTranslator],
+    prompt_versions: Optional[Dict[Job, str]] = None,
+    jobs: Optional[Iterable[Job]] = None,
+) -> dict:
+    """Save one translated report per job, using the batch translations as a preloaded checkpoint.
+
+    Args:
+        translations: Batch translations per job, as returned by read_batch_output
+        output_path: Result JSONL, appended to
+        make_translator: Builds a translator that uses the given checkpoint store
+        prompt_versions: Prompt version each job was exported with, to warn when the prompt has changed since
+        jobs: Exported jobs, as returned by read_manifest_jobs. Jobs without batch translations (all their
+            records failed, or none were exported) are reported and translated on demand. Defaults to the
+            jobs in `translations`
+
+    Returns:
+        Counts of saved, partially translated and failed reports, and of jobs that had no batch translations.
+    """
+    counts = {"ok": 0, "partial": 0, "error": 0, "missing": 0}
+    jobs = list(dict.fromkeys([*(jobs or []), *translations]))
+    writer = ResultWriter(output_path)
+    try:
+        for url, language in jobs:
+            segments = translations.get((url, language))
+            if not segments:
+                counts["missing"] += 1
+                print(f"No batch translations for {url} ({language}); translating it on demand")
+            store = MemoryCheckpointStore()
+            translator = make_translator(store)
+            exported_version = (prompt_versions or {}).get((url, language))
+            if exported_version and exported_version != translator._prompt_version():
+                print(f"Warning: the translation prompt changed since {url} ({language}) was exported")
+            store.preload(
+                checkpoint_key(url.replace("---", "--"), language, translator._prompt_version()),
+                {key: text for key, (text, _) in (segments or {}).items()},
+                {key: source for key, (_, source) in (segments or {}).items()},
+            )
+            new_report_url, new_report_title = translator._wandb_report_transformation(url, language)
+            entry = {"url": url, "language": language, "stats": translator.stats.to_dict()}
+            if new_report_title is None:
+                entry.update(status="error", error=str(new_report_url).splitlines()[0])
+            else:
+                # Blocks that failed for good were saved untranslated, as in batch_translate
+                status = "partial" if translator.stats.failed else "ok"
+                entry.update(status=status, new_report_url=new_report_url, title=new_report_title)
+            writer.write(entry)
+            counts[entry["status"]] += 1
+            print(f"{entry['status']}: {url} ({language})")
+    finally:
+        writer.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Translate report backlogs with Bedrock batch inference.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write batch-inference records for a list of reports")
+    export_parser.add_argument("input", help="JSONL of {url, languages} or text file of '<url> [languages]' lines")
+    export_parser.add_argument("--records", default="records.jsonl", help="Batch-inference input JSONL")
+    export_parser.add_argument("--manifest", default="manifest.jsonl", help="Manifest mapping record ids to segments")
+    export_parser.add_argument("--languages", default="jp", help="Default comma separated languages (default: jp)")
+    export_parser.add_argument("--model-id", default=None, help="Model the batch job will run (default: TRANSLATION_MODEL_ID)")
+
+    import_parser = subparsers.add_parser("import", help="Assemble and save reports from batch-inference output")
+    import_parser.add_argument("outputs", nargs="+", help="Batch-inference output JSONL files (*.jsonl.out)")
+    import_parser.add_argument("--manifest", default="manifest.jsonl", help="Manifest written by export")
+    import_parser.add_argument("--output", default="batch_results.jsonl", help="Result JSONL (appended)")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    if args.command == "export":
+        jobs = read_jobs(args.input, [lang.strip() for lang in args.languages.split(",") if lang.strip()])
+        # Batch records are independent requests, so the system prompt is not marked for caching
+        translator = WandBReportTranslator(notify=False, bedrock_client=_NoBedrock(), prompt_caching=False)
+        counts = export_records(jobs, translator, args.records, args.manifest)
+        model_id = args.model_id or translator.model_router.default_model_id
+        print(f"Exported {counts['records']} records from {counts['reports']} reports "
+              f"({counts['skipped']} segments need no translation, {counts['failed_reports']} reports failed to load).")
+        print(f"Run the batch inference job with model {model_id} on {args.records}.")
+        return 0 if counts["failed_reports"] == 0 else 1
+
+    manifest = read_manifest(args.manifest)
+    translations, failed = read_batch_output(args.outputs, manifest)
+    if failed:
+        print(f"{len(failed)} records failed in the batch job; those segments are translated on demand.")
+    prompt_versions = read_manifest_jobs(args.manifest)
+    counts = assemble_reports(
+        translations,
+        args.output,
+        lambda store: WandBReportTranslator(notify=False, checkpoint_store=store),
+        prompt_versions,
+        jobs=prompt_versions,
+    )
+    print(f"Done: {counts['ok']} reports saved, {counts['partial']} partially translated, {counts['error']} failed "
+          f"({counts['missing']} had no batch translations and were translated on demand)")
+    return 0 if counts["error"] == 0 and counts["partial"] == 0 else 1
+
+
+class _NoBedrock:
+    """Placeholder client for export, which never calls Bedrock."""
+
+    def invoke_model(self, **kwargs):
+        raise RuntimeError("Bedrock is not called during export")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Bulk translation of many W&B reports under one shared Bedrock budget.
+
+Usage:
+python batch_translate.py reports.jsonl --output results.jsonl
+python batch_translate.py reports.txt --languages jp,ko --report-workers 2 --max-concurrency 16 --rpm 200
+python batch_translate.py reports.jsonl --dry-run
+
+The input is either JSONL with one {"url": ..., "languages": ["jp", "ko"]} per line,
+or plain text with one "<url> [jp,ko]" per line. Every (url, language) pair is one job.
+Results and failures are appended to the output JSONL as each job finishes. A job whose
+report was saved with some blocks left untranslated is recorded as "partial". Re-running
+with the same output file skips the jobs that fully succeeded and runs the others again;
+a job that was cut short or partial resumes from its checkpoint. With --dry-run, every job is only planned: the
+estimated calls, tokens, cost and time are printed and nothing is translated.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+from typing import Iterable, List, Set, Tuple
+
+import weave
+from dotenv import load_dotenv
+
+# Add src/wandb_translator to sys.path to allow module import
+sys.path.append(os.path.dirname(__file__))
+
+from handler import WandBReportTranslator
+from planner import format_plan, plan_translation
+from region_pool import bedrock_client_from_env
+from hedging import hedged_client_from_env
+from scheduler import BedrockBudget, BudgetedBedrockClient
+
+Job = Tuple[str, str]
+
+
+def read_jobs(path: str, default_languages: List[str]) -> List[Job]:
+    """Read (url, language) jobs from a JSONL or plain-text list, dropping duplicates."""
+    jobs: List[Job] = []
+    seen: Set[Job] = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                entry = json.loads(line)
+                url = entry["url"]
+                languages = entry.get("languages") or entry.get("language") or default_languages
+            else:
+                parts = line.split()
+                url = parts[0]
+                languages = parts[1] if len(parts) > 1 else default_languages
+            if isinstance(languages, str):
+                languages = [lang.strip() for lang in languages.split(",") if lang.strip()]
+            for language in languages:
+                if (url, language) not in seen:
+                    seen.add((url, language))
+                    jobs.append((url, language))
+    return jobs
+
+
+def completed_jobs(output_path: str) -> Set[Job]:
+    """Jobs that already succeeded according to an existing output file. Partial and failed jobs are run again."""
+    done: Set[Job] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("status") == "ok":
+                done.add((entry["url"], entry["language"]))
+    return done
+
+
+class ResultWriter:
+    """Appends one JSON line per finished job, flushed immediately."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, entry: dict):
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def make_bedrock_client(budget: BedrockBudget):
+    """bedrock-runtime client (or regional pool) with connection pools sized to the shared concurrency."""
+    # Hedges go through the budget like any other request
+    return hedged_client_from_env(BudgetedBedrockClient(bedrock_client_from_env(budget.max_concurrency), budget))
+
+
+def translate_job(job: Job, bedrock_client) -> dict:
+    url, language = job
+    started = time.monotonic()
+    entry = {"url": url, "language": language}
+    try:
+        translator = WandBReportTranslator(notify=False, bedrock_client=bedrock_client, init_weave=False)
+        new_report_url, new_report_title = translator._wandb_report_transformation(url, language)
+        if new_report_title is None:
+            entry.update(status="error", error=str(new_report_url).splitlines()[0])
+        else:
+            # Blocks that failed for good were saved untranslated; the job is retried on the next run
+            status = "partial" if translator.stats.failed else "ok"
+            entry.update(status=status, new_report_url=new_report_url, title=new_report_title)
+        entry["stats"] = translator.stats.to_dict()
+    except Exception as e:
+        traceback.print_exc()
+        entry.update(status="error", error=str(e))
+    entry["seconds"] = round(time.monotonic() - started, 1)
+    entry["finished_at"] = datetime.now(timezone.utc).isoformat()
+    return entry
+
+
+def run_batch(jobs: Iterable[Job], output_path: str, report_workers: int, bedrock_client) -> dict:
+    """Translate jobs with report-level parallelism, appending results to output_path."""
+    done = completed_jobs(output_path)
+    todo = [job for job in jobs if job not in done]
+    print(f"{len(todo)} jobs to run ({len(done)} already completed)")
+    writer = ResultWriter(output_path)
+    counts = {"ok": 0, "partial": 0, "error": 0, "skipped": len(done)}
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=report_workers) as executor:
+            futures = {executor.submit(translate_job, job, bedrock_client): job for job in todo}
+            for n, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                entry = future.result()
+                writer.write(entry)
+                counts[entry["status"]] += 1
+                print(f"[{n}/{len(todo)}] {entry['status']}: {entry['url']} ({entry['language']})")
+    finally:
+        writer.close()
+    return counts
+
+
+def plan_batch(jobs: Iterable[Job], report_workers: int, bedrock_client) -> dict:
+    """Plan every job and return the totals; nothing is translated."""
+    totals = {"jobs": 0, "calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "wall_seconds": 0.0}
+    for url, language in jobs:
+        try:
+            translator = WandBReportTranslator(notify=False, bedrock_client=bedrock_client, init_weave=False)
+            plan = plan_translation(translator, url, language)
+        except Exception as e:
+            print(f"Could not plan {url} ({language}): {e}")
+            continue
+        print(format_plan(plan) + "\n")
+        totals["jobs"] += 1
+        for field in ("calls", "input_tokens", "output_tokens", "cost_usd", "wall_seconds"):
+            totals[field] += plan[field]
+    # Reports run report_workers at a time; a rough bound that ignores the shared Bedrock budget
+    totals["wall_seconds"] = round(totals["wall_seconds"] / max(1, report_workers), 1)
+    totals["cost_usd"] = round(totals["cost_usd"], 4)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Translate many W&B reports under one shared Bedrock budget.")
+    parser.add_argument("input", help="JSONL of {url, languages} or text file of '<url> [languages]' lines")
+    parser.add_argument("--output", default="translation_results.jsonl", help="Output JSONL (appended, used to resume)")
+    parser.add_argument("--languages", default="jp", help="Default comma separated languages (default: jp)")
+    parser.add_argument("--report-workers", type=int, default=2, help="Reports translated in parallel (default: 2)")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="Bedrock requests in flight across all reports")
+    parser.add_argument("--rpm", type=float, default=None, help="Bedrock requests per minute across all reports")
+    parser.add_argument("--dry-run", action="store_true", help="Only estimate calls, tokens, cost and time")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    # Weave is initialized once for the batch; the translators of the jobs reuse that client
+    weave.init(f"{os.environ['WANDB_ENTITY']}/{os.environ['WANDB_PROJECT']}")
+    jobs = read_jobs(args.input, [lang.strip() for lang in args.languages.split(",") if lang.strip()])
+    budget = BedrockBudget(max_concurrency=args.max_concurrency, requests_per_minute=args.rpm)
+    if args.dry_run:
+        totals = plan_batch(jobs, args.report_workers, make_bedrock_client(budget))
+        print(
+            f"Total for {totals['jobs']} jobs: {totals['calls']} calls, input {totals['input_tokens']} and "
+            f"output {totals['output_tokens']} tokens, ${totals['cost_usd']:.4f}, about {totals['wall_seconds']:.0f}s"
+        )
+        return 0
+    counts = run_batch(jobs, args.output, args.report_workers, make_bedrock_client(budget))
+    print(
+        f"Done: {counts['ok']} succeeded, {counts['partial']} partially translated, {counts['error']} failed, "
+        f"{counts['skipped']} already completed"
+    )
+    return 0 if counts["error"] == 0 and counts["partial"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Checkpoints of partially translated reports.
+
+Completed segments are appended to a checkpoint as they finish, keyed by source
+report, target language and prompt version. A retried job reloads the checkpoint
+and only translates the segments that are still missing.
+
+Each entry also records a digest of the segment's source text. A report edited
+between two attempts keeps its URL, so entries whose source text has changed since
+are left out on load and those segments are translated again.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+SegmentKey = Union[int, str]
+
+
+def checkpoint_key(report_url: str, language: str, prompt_version: str) -> str:
+    raw = f"{report_url}\n{language}\n{prompt_version}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def source_digest(text: Optional[str]) -> str:
+    """Short digest of a segment's source text, recorded with its translation."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _matching(entries: Dict[SegmentKey, Tuple[Optional[str], Optional[str]]], sources) -> Dict[SegmentKey, str]:
+    """Translations of the entries whose recorded source digest is the current one."""
+    if sources is None:
+        return {segment: text for segment, (text, _) in entries.items()}
+    return {
+        segment: text for segment, (text, source) in entries.items()
+        if source is not None and sources.get(segment) == source
+    }
+
+
+class CheckpointStore:
+    """Interface of a checkpoint store. Implementations must be safe to call from worker threads."""
+
+    def load(self, key: str, sources: Optional[Dict[SegmentKey, str]] = None) -> Dict[SegmentKey, str]:
+        """Return the completed segments of a job, or an empty dict if there is no live checkpoint.
+
+        Args:
+            key: Job key (see checkpoint_key)
+            sources: source_digest of every segment of the current source report. Entries recorded
+                for another source text, or without a digest, are left out. None returns every entry.
+        """
+        raise NotImplementedError
+
+    def record(self, key: str, segment: SegmentKey, translated: Optional[str], source: Optional[str] = None):
+        """Save one completed segment, with the source_digest of the text it was translated from."""
+        raise NotImplementedError
+
+    def clear(self, key: str):
+        """Drop a checkpoint once the job has finished."""
+        raise NotImplementedError
+
+
+class LocalCheckpointStore(CheckpointStore):
+    """Append-only JSONL checkpoints in a local directory.
+
+    The first line of each file is a header with the creation time; checkpoints older
+    than ttl_seconds are discarded on load. A line cut short by a crash is ignored.
+    """
+
+    def __init__(self, root: str, ttl_seconds: float = 86400):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.jsonl")
+
+    def load(self, key: str, sources: Optional[Dict[SegmentKey, str]] = None) -> Dict[SegmentKey, str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return {}
+        done: Dict[SegmentKey, Tuple[Optional[str], Optional[str]]] = {}
+        for n, line in enumerate(lines):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if n == 0:
+                if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+                    self.clear(key)
+                    return {}
+                continue
+            segment = entry["segment"]
+            done[int(segment) if str(segment).isdigit() else segment] = (entry["text"], entry.get("source"))
+        return _matching(done, sources)
+
+    def record(self, key: str, segment: SegmentKey, translated: Optional[str], source: Optional[str] = None):
+        path = self._path(key)
+        line = json.dumps({"segment": str(segment), "text": translated, "source": source}, ensure_ascii=False)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(self.root, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(json.dumps({"created_at": time.time()}) + "\n")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def clear(self, key: str):
+        with self._lock:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """In-memory checkpoints. Can be preloaded with translations produced elsewhere (e.g. batch inference)."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[SegmentKey, Tuple[Optional[str], Optional[str]]]] = {}
+        self._lock = threading.Lock()
+
+    def preload(
+        self, key: str, translations: Dict[SegmentKey, str], sources: Optional[Dict[SegmentKey, str]] = None
+    ):
+        """Add translations of a job, with the source_digest of the text each was translated from."""
+        sources = sources or {}
+        with self._lock:
+            self._jobs.setdefault(key, {}).update(
+                {segment: (text, sources.get(segment)) for segment, text in translations.items()}
+            )
+
+    def load(self, key: str, sources: Optional[Dict[SegmentKey, str]] = None) -> Dict[SegmentKey, str]:
+        with self._lock:
+            return _matching(self._jobs.get(key, {}), sources)
+
+    def record(self, key: str, segment: SegmentKey, translated: Optional[str], source: Optional[str] = None):
+        with self._lock:
+            self._jobs.setdefault(key, {})[segment] = (translated, source)
+
+    def clear(self, key: str):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+
+def checkpoint_store_from_env() -> Optional[CheckpointStore]:
+    """Local store under TRANSLATION_CHECKPOINT_DIR, or None if TRANSLATION_CHECKPOINT is turned off."""
+    if os.getenv("TRANSLATION_CHECKPOINT", "true").lower() in ("0", "false", "no", "off"):
+        return None
+    return LocalCheckpointStore(
+        os.getenv("TRANSLATION_CHECKPOINT_DIR", "/tmp/translation_checkpoints"),
+        ttl_seconds=float(os.getenv("TRANSLATION_CHECKPOINT_TTL", "86400")),
+    )
@@ -0,0 +1,83 @@
+"""
+Failure policy for block translations.
+
+A failing segment is retried with exponential backoff. If it still fails, the policy
+either keeps the source text with a marker (so the rest of the report is still saved)
+or aborts the whole job.
+"""
+
+import os
+import random
+import time
+from typing import Callable, Optional
+
+KEEP_SOURCE = "keep_source"
+ABORT = "abort"
+
+# Bedrock error codes that fail the same way on every attempt
+NON_RETRYABLE_CODES = {"ValidationException", "AccessDeniedException", "ResourceNotFoundException"}
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether another attempt can succeed.
+
+    An exception can say so itself with a `retryable` attribute (e.g. OutputTruncated,
+    which comes back at the same size every time); Bedrock errors are judged by their code.
+    """
+    retryable = getattr(error, "retryable", None)
+    if retryable is not None:
+        return bool(retryable)
+    response = getattr(error, "response", None)
+    if isinstance(response, dict) and (response.get("Error") or {}).get("Code") in NON_RETRYABLE_CODES:
+        return False
+    return True
+
+
+class FailurePolicy:
+    """Retry and fallback settings for failed segments.
+
+    Settings default to environment variables:
+      - TRANSLATION_BLOCK_RETRIES: retries per segment after the first attempt (default 2)
+      - TRANSLATION_RETRY_BACKOFF: base backoff in seconds, doubled on every retry (default 1.0)
+      - TRANSLATION_ON_BLOCK_FAILURE: "keep_source" or "abort" (default "keep_source")
+      - TRANSLATION_MAX_FAILED_BLOCKS: abort anyway once more blocks than this have failed (default 10)
+      - TRANSLATION_FAILURE_MARKER: text put in front of a block kept in the source language
+    """
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        on_failure: Optional[str] = None,
+        max_failed_blocks: Optional[int] = None,
+        marker: Optional[str] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("TRANSLATION_BLOCK_RETRIES", "2"))
+        self.backoff_seconds = backoff_seconds if backoff_seconds is not None else float(
+            os.getenv("TRANSLATION_RETRY_BACKOFF", "1.0")
+        )
+        self.on_failure = on_failure or os.getenv("TRANSLATION_ON_BLOCK_FAILURE", KEEP_SOURCE)
+        if self.on_failure not in (KEEP_SOURCE, ABORT):
+            raise ValueError(f"Invalid failure policy: {self.on_failure}")
+        self.max_failed_blocks = max_failed_blocks if max_failed_blocks is not None else int(
+            os.getenv("TRANSLATION_MAX_FAILED_BLOCKS", "10")
+        )
+        self.marker = marker if marker is not None else os.getenv("TRANSLATION_FAILURE_MARKER", "[Translation failed] ")
+        self._sleep = sleep
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Call func, retrying on retryable exceptions. The last exception is re-raised."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt) * (0.5 + random.random())
+                print(f"Retrying after error ({attempt + 1}/{self.max_retries}) in {delay:.1f}s: {e}")
+                self._sleep(delay)
+
+    def keep_going(self, failed_count: int) -> bool:
+        """Whether the job should continue after failed_count blocks have failed for good."""
+        return self.on_failure == KEEP_SOURCE and failed_count <= self.max_failed_blocks
@@ -0,0 +1,206 @@
+"""
+Glossary of protected terms for translation.
+
+Product names, code identifiers and customer names must come out of every translation
+the same way. Before a segment is sent to Bedrock, each glossary term in it is
+replaced by a __TERM_i__ placeholder (next to the __INLINECODE_i__ placeholders of
+inline code); after translation the placeholder is replaced by the term itself or by
+its fixed rendering in the target language.
+
+All terms are compiled into one Aho-Corasick automaton, so a segment is scanned once,
+in time linear in its length, however many terms the glossary has.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Tuple, Union
+
+# W&B product names that are never translated
+DEFAULT_TERMS = ("Weights & Biases", "W&B", "Weave", "Artifacts", "Sweeps", "Registry")
+
+# Terms are not replaced inside code, URLs or existing placeholders
+_EXCLUDED = re.compile(r"```.*?```|`[^`]*`|(?:https?://|www\.)\S+|__[A-Z]+_\d+__", re.DOTALL)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and (ch.isalnum() or ch == "_")
+
+
+class TermMatcher:
+    """Aho-Corasick automaton that finds the leftmost-longest, non-overlapping occurrences of a set of terms.
+
+    Terms that start or end with a Latin letter or digit only match as whole words, so
+    "Weave" does not match in "Weaver".
+    """
+
+    def __init__(self, terms: List[str], case_sensitive: bool = True):
+        self.case_sensitive = case_sensitive
+        self.terms = list(terms)
+        # State 0 is the root; goto[s] maps a character to the next state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Index of the longest term that ends in each state (directly or through its failure links), or -1
+        self._longest: List[int] = [-1]
+        for index, term in enumerate(self.terms):
+            state = 0
+            for ch in self._fold(term):
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._longest.append(-1)
+                state = nxt
+            if term and (self._longest[state] < 0 or len(term) > len(self.terms[self._longest[state]])):
+                self._longest[state] = index
+        self._build_failure_links()
+
+    def _fold(self, text: str) -> str:
+        if self.case_sensitive:
+            return text
+        folded = text.lower()
+        # Lower-casing must keep offsets; the few characters that change length are left as they are
+        return folded if len(folded) == len(text) else "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+    def _build_failure_links(self):
+        # Breadth-first, so that the failure state of every state is finished before its children
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0) if state else 0
+                if self._longest[nxt] < 0:
+                    # A state's own term is longer than any term that ends in its failure state
+                    self._longest[nxt] = self._longest[self._fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """Return (start, end, term index) of each match, in order and without overlaps."""
+        selected: List[Tuple[int, int, int]] = []
+        state = 0
+        folded = self._fold(text)
+        for position, ch in enumerate(folded):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            index = self._longest[state]
+            if index < 0:
+                continue
+            end = position + 1
+            start = end - len(self.terms[index])
+            if not self._whole_word(text, start, end):
+                continue
+            # A longer match that starts at or before earlier ones replaces them; one that starts inside is dropped
+            while selected and selected[-1][1] > start and start <= selected[-1][0]:
+                selected.pop()
+            if selected and selected[-1][1] > start:
+                continue
+            selected.append((start, end, index))
+        return selected
+
+    @staticmethod
+    def _whole_word(text: str, start: int, end: int) -> bool:
+        if start > 0 and _is_word_char(text[start]) and _is_word_char(text[start - 1]):
+            return False
+        if end < len(text) and _is_word_char(text[end - 1]) and _is_word_char(text[end]):
+            return False
+        return True
+
+
+class Glossary:
+    """Protected terms and their fixed renderings per target language.
+
+    Args:
+        terms: Term -> rendering. A rendering of None keeps the term as it is; a dict gives
+            the rendering per target language ("jp", "ko", "en") and keeps the term for the others.
+        case_sensitive: Whether terms only match with the same capitalization.
+    """
+
+    def __init__(self, terms: Dict[str, Union[None, str, Dict[str, str]]], case_sensitive: bool = True):
+        self.renderings = {term: rendering for term, rendering in terms.items() if term}
+        self.case_sensitive = case_sensitive
+        self._matcher = TermMatcher(list(self.renderings), case_sensitive)
+        self._terms = self._matcher.terms
+
+    def __len__(self) -> int:
+        return len(self.renderings)
+
+    def version(self) -> str:
+        """Short digest of the glossary; part of the checkpoint key, since it changes the translation."""
+        data = json.dumps([self.renderings, self.case_sensitive], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+    def rendering(self, term: str, language: str) -> str:
+        rendering = self.renderings.get(term)
+        if isinstance(rendering, dict):
+            rendering = rendering.get(language)
+        return rendering if rendering else term
+
+    def protect(self, text: str, language: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """Replace glossary terms in text with __TERM_i__ placeholders.
+
+        Returns:
+            Tuple of (text with placeholders, [(placeholder, rendering in the target language), ...]).
+        """
+        if not self._terms or not text:
+            return text, []
+        excluded = [m.span() for m in _EXCLUDED.finditer(text)]
+        parts = []
+        placeholders = []
+        last = 0
+        e = 0
+        for start, end, index in self._matcher.find(text):
+            while e < len(excluded) and excluded[e][1] <= start:
+                e += 1
+            if e < len(excluded) and excluded[e][0] < end:
+                continue
+            source = text[start:end]
+            ph = f"__TERM_{len(placeholders)}__"
+            parts.append(text[last:start])
+            parts.append(ph)
+            rendering = self.rendering(self._terms[index], language)
+            # Without a fixed rendering the term is kept as written in the source
+            placeholders.append((ph, source if rendering == self._terms[index] else rendering))
+            last = end
+        if not placeholders:
+            return text, []
+        parts.append(text[last:])
+        return "".join(parts), placeholders
+
+
+def load_glossary(path: str, include_defaults: bool = True) -> Glossary:
+    """Load a glossary file.
+
+    The file is JSON: either a list of terms to keep as they are, or an object of
+    term -> rendering (null, a string, or {"jp": ..., "ko": ..., "en": ...}). An object
+    may instead have "terms" and "case_sensitive" keys.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    case_sensitive = True
+    if isinstance(data, dict) and "terms" in data:
+        case_sensitive = bool(data.get("case_sensitive", True))
+        data = data["terms"]
+    terms: Dict[str, Union[None, str, Dict[str, str]]] = {term: None for term in DEFAULT_TERMS} if include_defaults else {}
+    if isinstance(data, list):
+        terms.update({term: None for term in data})
+    else:
+        terms.update(data)
+    return Glossary(terms, case_sensitive)
+
+
+def glossary_from_env() -> Glossary:
+    """Glossary from TRANSLATION_GLOSSARY (path to a glossary file), plus the W&B product names
+    unless TRANSLATION_GLOSSARY_DEFAULTS is false. TRANSLATION_GLOSSARY=false disables the glossary."""
+    path = os.getenv("TRANSLATION_GLOSSARY", "")
+    if path.lower() in ("0", "false", "no", "off"):
+        return Glossary({})
+    include_defaults = os.getenv("TRANSLATION_GLOSSARY_DEFAULTS", "true").lower() not in ("0", "false", "no", "off")
+    if path:
+        return load_glossary(path, include_defaults)
+    return Glossary({term: None for term in DEFAULT_TERMS} if include_defaults else {})
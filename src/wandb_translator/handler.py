@@ -1,67 +1,179 @@
 import os
-import wandb
 import weave
 import re
 import wandb_workspaces.reports.v2 as wr
-import slack_sdk
 import sys
-import boto3
 import json
-from typing import Tuple, Optional, List, Dict, Any
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
+from typing import Tuple, Optional
 import concurrent.futures
+import hashlib
+import threading
+import time
 import traceback
+import urllib.request
 
 
 # Add src/wandb_translator to sys.path to allow module import
 sys.path.append(os.path.dirname(__file__))
 
-@weave.op(call_display_name="lambda_handler_translate_report")
+from model_router import ModelRouter
+from job_stats import JobStats
+from language_filter import needs_translation, segment_text
+from checkpoint import checkpoint_key, checkpoint_store_from_env, source_digest
+from failure_policy import FailurePolicy
+from region_pool import bedrock_client_from_env
+from hedging import hedged_client_from_env
+from report_cache import report_cache_from_env
+from planner import expected_seconds, format_plan, latency_model, plan_translation
+from tracing import segment_span, trace_inputs, trace_output
+from streaming import OutputTruncated, stream_message
+from glossary import glossary_from_env
+from report_ir import MARKDOWN_BLOCK_TYPES, build_block, normalize_report, restore_code
+from translation_cache import cache_entry, report_updated_at, translation_cache_from_env
+from progress import ProgressTracker, StoredProgress, format_progress, load_progress, progress_job_id, progress_store_from_env
+
+TRANSLATE_PROMPT_REF = "weave:///wandb-japan/fc-agent/object/translate_prompt:latest"
+# How many times a truncated segment may be halved again
+MAX_SPLIT_DEPTH = 3
+
+# Appended to prompt templates published before glossary terms were shielded
+TERM_PLACEHOLDER_RULE = "\n- Please keep any parts like __TERM_x__ unchanged during translation."
+
+
+class TranslationCancelled(Exception):
+    """The job was cancelled (see WandBReportTranslator.cancelled). Finished segments stay in the checkpoint."""
+
+
+class PlaceholderLost(Exception):
+    """The model dropped or altered a placeholder, so the original text cannot be put back."""
+
+    # The segment was already translated again, another retry is unlikely to help
+    retryable = False
+
 def lambda_handler(event, context):
     """
     Lambda handler compatible with Bedrock function details schema
+
+    With TRANSLATION_SERVICE_URL set, the Lambda is a thin shim that forwards the event
+    to the long-running translation service (service.py) and returns its response.
+    """
+    # Status queries are polled every few seconds while a translation runs; they are not traced
+    if event.get("function") == "translation_status":
+        return _dispatch(event)
+    return _traced_lambda_handler(event, context)
+
+
+@weave.op(call_display_name="lambda_handler_translate_report", postprocess_inputs=trace_inputs, postprocess_output=trace_output)
+def _traced_lambda_handler(event, context):
+    return _dispatch(event)
+
+
+def _dispatch(event):
+    service_url = os.getenv("TRANSLATION_SERVICE_URL")
+    if service_url:
+        return forward_to_service(service_url, event)
+    # Other containers cannot read a container's /tmp, so progress is only stored where every status query sees it
+    return handle_action(event, WandBReportTranslator, progress_store_from_env(shared_only=True))
+
+
+def forward_to_service(service_url, event, timeout: Optional[float] = None):
+    """POST an action-group event to the translation service and return its action response."""
+    timeout = timeout if timeout is not None else float(os.getenv("TRANSLATION_SERVICE_TIMEOUT", "890"))
+    headers = {"Content-Type": "application/json"}
+    if os.getenv("TRANSLATION_SERVICE_TOKEN"):
+        headers["Authorization"] = f"Bearer {os.environ['TRANSLATION_SERVICE_TOKEN']}"
+    request = urllib.request.Request(
+        service_url.rstrip("/") + "/invoke",
+        data=json.dumps(event).encode("utf-8"),
+        headers=headers,
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except Exception as e:
+        # The service keeps translating after a timeout; the result lands in the translation cache
+        return _action_response(event, f"Error calling the translation service: {e}")
+
+
+def handle_action(event, make_translator, progress_store):
+    """Run one action-group event and return its response.
+
+    Args:
+        event: Bedrock action-group event
+        make_translator: Called without arguments to create the WandBReportTranslator of a translation
+        progress_store: Store of the progress of each translation, or None if progress is turned off
+    """
+    result_text, _ = run_action(event, make_translator, progress_store)
+    return _action_response(event, result_text)
+
+
+def run_action(event, make_translator, progress_store) -> Tuple[str, bool]:
+    """Run one action-group event (see handle_action).
+
+    Returns:
+        Tuple of (response text, whether the action failed)
     """
-    
     # Get original_report_url and language from event["parameters"]
     parameters = event.get("parameters", [])
     param_dict = {p["name"]: p["value"] for p in parameters}
     original_report_url = param_dict.get("original_report_url")
     language = param_dict.get("language")
+    # Estimate only, either through the dry_run parameter or a separate plan_translation function
+    dry_run = str(param_dict.get("dry_run", "")).lower() in ("1", "true", "yes") or event.get("function") == "plan_translation"
+    # Pre-translation of a report posted in a watched channel, filling the translation cache at low priority
+    speculative = str(param_dict.get("speculative", "")).lower() in ("1", "true", "yes")
+
+    # Status query of a running or finished translation
+    if event.get("function") == "translation_status":
+        return translation_status(param_dict, progress_store), False
 
     if not original_report_url:
-        return {
-            "messageVersion": "1.0",
-            "response": {
-                "actionGroup": event.get("actionGroup", ""),
-                "function": event.get("function", ""),
-                "functionResponse": {
-                    "responseBody": {
-                        "TEXT": {
-                            "body": "Error: original_report_url is required."
-                        }
-                    }
-                }
-            },
-            "sessionAttributes": event.get("sessionAttributes", {}),
-            "promptSessionAttributes": event.get("promptSessionAttributes", {})
-        }
+        return "Error: original_report_url is required.", True
 
     # Fix malformed URLs: replace '---' with '--' if present
     if original_report_url and '---' in original_report_url:
         original_report_url = original_report_url.replace('---', '--')
 
     # Report translation process
-    translator = WandBReportTranslator()
+    translator = make_translator()
+    if progress_store is not None and not dry_run:
+        job_id = param_dict.get("job_id") or progress_job_id(original_report_url, language)
+        translator.progress_callback = StoredProgress(progress_store, job_id)
+        translator.job_id = job_id
+    if speculative:
+        # Leave most of the Bedrock concurrency to interactive requests
+        translator.block_workers = int(os.getenv("TRANSLATION_SPECULATIVE_WORKERS", "2"))
+    failed = False
     try:
-        new_report_url, new_report_title = translator._wandb_report_transformation(
-            original_report_url, language
-        )
-        result_text = f"Translation completed!\nTitle: {new_report_title}\nURL: {new_report_url}"
+        if speculative and translator.translation_cache is None:
+            result_text = "Speculative translation skipped: the translation cache is turned off."
+        elif speculative and not translator.translation_cache.shared:
+            # A later request in another Lambda container would not see the result and translate again
+            result_text = "Speculative translation skipped: the translation cache is not shared (set TRANSLATION_CACHE_BUCKET)."
+        elif dry_run:
+            result_text = format_plan(plan_translation(translator, original_report_url, language))
+        else:
+            new_report_url, new_report_title = translator._wandb_report_transformation(
+                original_report_url, language
+            )
+            if new_report_title is None:
+                # The translator returns (error message, None) when it fails
+                failed = True
+                result_text = str(new_report_url).splitlines()[0]
+            else:
+                result_text = f"Translation completed!\nTitle: {new_report_title}\nURL: {new_report_url}"
+                summary = translator.stats.summary()
+                if summary:
+                    result_text += f"\n{summary}"
     except Exception as e:
+        failed = True
         result_text = f"Error during translation: {str(e)}"
 
-    # Return response according to Bedrock function details schema
+    return result_text, failed
+
+
+def _action_response(event, result_text):
+    """Response according to Bedrock function details schema"""
     response_body = {
         "TEXT": {
             "body": result_text
@@ -82,19 +194,102 @@ def lambda_handler(event, context):
         "sessionAttributes": session_attributes,
         "promptSessionAttributes": prompt_session_attributes
     }
-    return action_response 
+    return action_response
+
+
+def translation_status(param_dict, store):
+    """Latest progress of a translation, by job_id or by original_report_url and language.
+
+    With format=json the body is the progress event as JSON, with its text under "text".
+    """
+    if store is None:
+        return "Error: translation progress is turned off (set TRANSLATION_PROGRESS_BUCKET to store it)."
+    job_id = param_dict.get("job_id")
+    if not job_id:
+        if not param_dict.get("original_report_url") or not param_dict.get("language"):
+            return "Error: job_id, or original_report_url and language, is required."
+        job_id = progress_job_id(param_dict["original_report_url"].replace("---", "--"), param_dict["language"])
+    try:
+        event = load_progress(store, job_id)
+    except Exception as e:
+        return f"Error reading translation progress: {e}"
+    if param_dict.get("format") == "json":
+        return json.dumps(dict(event or {}, text=format_progress(event)), ensure_ascii=False)
+    return format_progress(event)
+
 
 class WandBReportTranslator:
-    def __init__(self, notify: bool = True):
-        """Initialize the translator with credentials from environment variables."""
+    def __init__(
+        self,
+        notify: bool = True,
+        bedrock_client=None,
+        prompt_caching: Optional[bool] = None,
+        checkpoint_store=None,
+        failure_policy: Optional[FailurePolicy] = None,
+        report_cache=None,
+        glossary=None,
+        translation_cache=None,
+        progress_callback=None,
+        job_id: Optional[str] = None,
+        init_weave: bool = True,
+    ):
+        """Initialize the translator with credentials from environment variables.
+
+        Args:
+            notify: Kept for compatibility with existing callers.
+            bedrock_client: bedrock-runtime client to use. Created from BEDROCK_REGIONS or AWS_REGION if omitted
+                (see region_pool.bedrock_client_from_env).
+            prompt_caching: Mark the system prompt as cacheable (Bedrock prompt caching).
+                Defaults to the TRANSLATION_PROMPT_CACHE environment variable, which is on by default.
+            checkpoint_store: Store for completed segments, so that a retried job resumes where it stopped.
+                Defaults to a local store (see checkpoint.checkpoint_store_from_env).
+            failure_policy: Retry and fallback policy for failed segments. Defaults to FailurePolicy().
+            report_cache: Snapshot cache of source reports (report_cache.ReportSnapshotCache).
+                Defaults to a local cache (see report_cache.report_cache_from_env).
+            glossary: Protected terms and fixed renderings (glossary.Glossary).
+                Defaults to the W&B product names plus TRANSLATION_GLOSSARY (see glossary.glossary_from_env).
+            translation_cache: Cache of finished translations (translation_cache.TranslationCache).
+                Defaults to TRANSLATION_CACHE_BUCKET or a local directory (see translation_cache.translation_cache_from_env).
+            progress_callback: Called with a progress event (see progress.ProgressTracker) at every stage
+                change and finished block. The Lambda handler stores them for translation_status queries.
+            job_id: Id put in the progress events.
+            init_weave: Call weave.init for WANDB_ENTITY/WANDB_PROJECT. The translation service initializes
+                Weave once for the process and turns this off.
+        """
         # Initialize AWS Bedrock client
-        session = boto3.Session(region_name=os.getenv("AWS_REGION"))
-        self.bedrock_client = session.client('bedrock-runtime')
+        if bedrock_client is None:
+            bedrock_client = hedged_client_from_env(bedrock_client_from_env())
+        self.bedrock_client = bedrock_client
+        if prompt_caching is None:
+            prompt_caching = os.getenv("TRANSLATION_PROMPT_CACHE", "true").lower() not in ("0", "false", "no", "off")
+        self.prompt_caching = prompt_caching
+        self._prompt_template = None
+        # Model routing by segment type and size
+        self.model_router = ModelRouter()
+        self.stats = JobStats()
+        self.checkpoint_store = checkpoint_store if checkpoint_store is not None else checkpoint_store_from_env()
+        self.failure_policy = failure_policy or FailurePolicy()
+        self.report_cache = report_cache if report_cache is not None else report_cache_from_env()
+        self.glossary = glossary if glossary is not None else glossary_from_env()
+        self.translation_cache = translation_cache if translation_cache is not None else translation_cache_from_env()
+        self.progress_callback = progress_callback
+        self.job_id = job_id
+        # Set to stop the job before its next segment, e.g. a speculative job giving way to an interactive one
+        self.cancelled = threading.Event()
+        # Blocks translated in parallel
+        self.block_workers = int(os.getenv("TRANSLATION_BLOCK_WORKERS", "8"))
+        # Streamed responses with time-to-first-token and stall timeouts
+        self.streaming = os.getenv("TRANSLATION_STREAMING", "false").lower() in ("1", "true", "yes", "on")
+        self.first_token_timeout = float(os.getenv("TRANSLATION_FIRST_TOKEN_TIMEOUT", "30"))
+        self.stall_timeout = float(os.getenv("TRANSLATION_STALL_TIMEOUT", "15"))
+        # A streamed output this many times longer than the input is treated as truncated
+        self.runaway_ratio = float(os.getenv("TRANSLATION_RUNAWAY_RATIO", "4"))
         # Initialize Weave
         self.target_project = f"{os.environ['WANDB_ENTITY']}/{os.environ['WANDB_PROJECT']}"
-        weave.init(self.target_project)
+        if init_weave:
+            weave.init(self.target_project)
         
-    @weave.op()
+    @weave.op(postprocess_inputs=trace_inputs, postprocess_output=trace_output)
     def _wandb_report_transformation(
         self,
         original_report_url: str,
@@ -112,163 +307,431 @@ class WandBReportTranslator:
         if original_report_url and '---' in original_report_url:
             original_report_url = original_report_url.replace('---', '--')
 
+        self.stats = JobStats()
+        progress = ProgressTracker(self.progress_callback, self.job_id)
+
         # Copy the report and translation
+        progress.stage("loading")
         try:
-            source_report = wr.Report.from_url(original_report_url)
+            source_report = self._load_source_report(original_report_url)
         except Exception as e:
             tb = traceback.format_exc()
             print(f"Error loading report from URL: {e}")
+            progress.stage("failed", error=f"Error loading report: {e}")
             return f"Error loading report: {e}\n{tb}", None
 
+        # The same translation of the unchanged source report may already exist (e.g. from a speculative job)
+        cache_key, updated_at, cached = self._cached_translation(original_report_url, language, source_report)
+        if cached:
+            self.stats.record_cached_translation()
+            progress.stage("cached", url=cached["url"], title=cached["title"])
+            return cached["url"], cached["title"]
+
         try:
-            if hasattr(source_report, "_model"):
-                original_title = source_report._model.title
-                original_desc = source_report._model.description
-            else:
-                original_title = getattr(source_report, "title", "Cloned Report")
-                original_desc = getattr(source_report, "description", "Cloned from " + original_report_url)
+            # Translation runs on the compact IR; the SDK objects of the source report are not needed after this
+            report_ir = self._normalize(source_report, original_report_url)
+            source_report = None
 
-            translated_title = self._translation(original_title, language)
-            translated_desc = self._translation(original_desc, language)
+            # Reload segments finished by an earlier attempt of the same job, unless their source text changed since
+            job_key = checkpoint_key(original_report_url, language, self._prompt_version())
+            sources = {key: source_digest(segment.text) for key, segment in report_ir.segments()}
+            done = self.checkpoint_store.load(job_key, sources) if self.checkpoint_store else {}
+            if done:
+                print(f"Resuming from checkpoint: {len(done)} segments already translated")
 
-            new_report = wr.Report(
-                project=os.getenv("WANDB_PROJECT"),
-                entity=os.getenv("WANDB_ENTITY"),
-                title=translated_title,
-                description=translated_desc
-            )
+            def translate_cached(key, segment):
+                if key in done:
+                    self.stats.record_resumed(key)
+                    return done[key]
+                if self.cancelled.is_set():
+                    raise TranslationCancelled("Translation cancelled")
+                # Per-segment ops are traced according to the tracing policy (see tracing.py)
+                with segment_span():
+                    translated = self.failure_policy.call(self._translate_segment, key, segment.text, language, segment.kind)
+                if self.checkpoint_store:
+                    self.checkpoint_store.record(job_key, key, translated, sources[key])
+                return translated
+
+            def translate_or_keep_source(key, segment):
+                # Title and description fall back to the source text without a marker
+                try:
+                    return restore_code(translate_cached(key, segment), segment.code)
+                except TranslationCancelled:
+                    raise
+                except Exception as e:
+                    print(f"Error translating {key}: {e}")
+                    if not self._record_failure(key, e):
+                        raise
+                    return segment.source_text()
+
+            def translate_block(i, segment):
+                if not segment.translatable:
+                    return build_block(segment)
+                dropped = []
+                block = build_block(segment, translate_cached(i, segment), dropped)
+                if dropped:
+                    urls = [url for _, url in dropped]
+                    print(f"Block {i}: link text was translated, links not restored: {', '.join(urls)}")
+                    self.stats.record_dropped_links(i, urls)
+                return block
+
+            # Blocks restored from the checkpoint or with nothing to translate are rebuilt
+            # right away; the title, the description and the missing blocks are scheduled
+            new_blocks = [None] * len(report_ir.blocks)
+            work = [("title", report_ir.title), ("description", report_ir.description)]
+            for i, segment in enumerate(report_ir.blocks):
+                if i in done or not segment.translatable:
+                    new_blocks[i] = translate_block(i, segment)
+                else:
+                    work.append((i, segment))
+            progress.start_blocks(len(new_blocks), len(new_blocks) - len(work) + 2)
+
+            # One pool for all segments, longest expected call first: the job then takes about
+            # as long as its longest segment instead of whatever block happens to come last
+            def expected(item):
+                key, segment = item
+                return 0.0 if key in done else expected_seconds(self, segment.text, segment.kind, language)
 
-            def translate_block(i):
-                block = source_report.blocks[i]
-                block_type = type(block).__name__
-                if block_type == "UnknownBlock":
-                    if block.type in ["image", "image "]:
-                        return i, block
-                    elif block.type == "default":
-                        translated_text = self._translation(self.unknownblock_children_to_list(block.children), language)
-                        return i, wr.P(text=translated_text)
-                    else:
-                        return i, block
-                elif block_type in ["P", "H1", "H2", "H3", "BlockQuote", "CalloutBlock", "MarkdownBlock", "MarkdownPanel"]:
-                    block.text = self._translation(block.text, language)
-                    return i, block
-                # CheckedListItem, OrderedListItem, UnorderedListItemはそのまま
-                return i, block
-
-            # Parallel translation of blocks with as_completed
-            new_blocks = [None] * len(source_report.blocks)
-            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-                futures = {executor.submit(translate_block, i): i for i in range(len(source_report.blocks))}
+            work.sort(key=expected, reverse=True)
+            header = {}
+            new_report = None
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.block_workers) as executor:
+                futures = {}
+                for key, segment in work:
+                    task = translate_or_keep_source if key in ("title", "description") else translate_block
+                    futures[executor.submit(task, key, segment)] = key
                 for future in concurrent.futures.as_completed(futures):
+                    i = futures[future]
+                    if i in ("title", "description"):
+                        try:
+                            header[i] = future.result()
+                        except Exception:
+                            for f in futures:
+                                f.cancel()
+                            raise
+                        if len(header) == 2:
+                            # The report shell is ready while the blocks are still being translated
+                            new_report = wr.Report(
+                                project=os.getenv("WANDB_PROJECT"),
+                                entity=os.getenv("WANDB_ENTITY"),
+                                title=header["title"],
+                                description=header["description"]
+                            )
+                        continue
                     try:
-                        i, block = future.result()
-                        new_blocks[i] = block
+                        block = future.result()
+                    except TranslationCancelled:
+                        for f in futures:
+                            f.cancel()
+                        raise
                     except Exception as e:
                         tb = traceback.format_exc()
                         print(f"Error translating block {i}: {e}")
-                        return f"Error translating block {i}: {e}\n{tb}", None
+                        if not self._record_failure(i, e):
+                            # Stop: drop the segments that have not started yet
+                            for f in futures:
+                                f.cancel()
+                            progress.stage("failed", error=f"Error translating block {i}: {e}")
+                            return f"Error translating block {i}: {e}\n{tb}", None
+                        block = self._keep_source_block(report_ir.blocks[i])
+                    new_blocks[i] = block
+                    progress.block_done()
 
+            progress.stage("saving")
             new_report.blocks = new_blocks
             new_report.save()
+            # With failed blocks the checkpoint is kept, so a retry only translates those again
+            if self.checkpoint_store and not self.stats.failed:
+                self.checkpoint_store.clear(job_key)
+            # Only complete translations are reused
+            if cache_key and updated_at and not self.stats.failed:
+                try:
+                    self.translation_cache.put(cache_key, cache_entry(new_report.url, new_report.title, updated_at))
+                except Exception as e:
+                    print(f"Could not store the translation in the cache: {e}")
 
+            progress.stage("done", url=new_report.url, title=new_report.title)
             return new_report.url, new_report.title
+        except TranslationCancelled as e:
+            print(f"Translation of {original_report_url} ({language}) cancelled")
+            progress.stage("failed", error=str(e))
+            return str(e), None
         except Exception as e:
             tb = traceback.format_exc()
             print(f"Error during translation: {e}")
+            progress.stage("failed", error=f"Error during translation: {e}")
             return f"Error during translation: {e}\n{tb}", None
     
-    @weave.op()
-    def unknownblock_children_to_list(self, children):
-        if not isinstance(children, list):
-            return [children]
-        list_incline = []
-        for child in children:
-            if isinstance(child, dict):
-                if child.get("inlineCode"):
-                    list_incline.append(wr.InlineCode(child.get("text", "")))
-                elif child.get("type") == "link":
-                    # Extract text from link children
-                    for link_child in child.get("children", []):
-                        if isinstance(link_child, dict) and "text" in link_child:
-                            list_incline.append(link_child["text"])
-                elif "text" in child:
-                    list_incline.append(child["text"])
-                else:
-                    list_incline.append(str(child))
-            else:
-                list_incline.append(str(child))
-        return list_incline
+    def _cached_translation(self, original_report_url, language, source_report):
+        """Look up a finished translation of the loaded source report.
+
+        The report's updatedAt comes with the loaded report (or snapshot, which the report
+        cache has already revalidated), so the lookup adds no request to W&B.
+
+        Returns:
+            Tuple of (cache key, source updatedAt, cache entry if it can be reused). The key and
+            updatedAt are None when there is no cache or the source report's updatedAt is unknown.
+        """
+        if self.translation_cache is None:
+            return None, None, None
+        updated_at = report_updated_at(source_report)
+        if updated_at is None:
+            return None, None, None
+        try:
+            cache_key = checkpoint_key(original_report_url, language, self._prompt_version())
+            entry = self.translation_cache.get(cache_key)
+        except Exception as e:
+            print(f"Could not read the translation cache: {e}")
+            return None, None, None
+        if entry and entry.get("source_updated_at") == updated_at:
+            return cache_key, updated_at, entry
+        return cache_key, updated_at, None
+
+    def _load_source_report(self, original_report_url):
+        if self.report_cache is None:
+            return wr.Report.from_url(original_report_url)
+        source_report, outcome = self.report_cache.load(original_report_url)
+        self.stats.record_source_cache(outcome)
+        return source_report
+
+    @staticmethod
+    def _title_and_description(source_report, original_report_url):
+        if hasattr(source_report, "_model"):
+            return source_report._model.title, source_report._model.description
+        return (
+            getattr(source_report, "title", "Cloned Report"),
+            getattr(source_report, "description", "Cloned from " + original_report_url),
+        )
+
+    def _normalize(self, source_report, original_report_url):
+        """Compact IR of the source report (see report_ir.py)."""
+        title, description = self._title_and_description(source_report, original_report_url)
+        return normalize_report(source_report, title, description)
+
+    def _report_segments(self, source_report, original_report_url):
+        """Yield (key, BlockIR) for the title, the description and every translatable block."""
+        return self._normalize(source_report, original_report_url).segments()
+
+    def _record_failure(self, key, error):
+        """Record a segment that failed for good. Returns True if the job should continue."""
+        self.stats.record_failed(key, str(error))
+        return self.failure_policy.keep_going(len(self.stats.failed))
+
+    def _keep_source_block(self, segment):
+        """Rebuild a block that failed to translate from its source text, with the failure marker.
+
+        In Markdown blocks the marker is a paragraph of its own, so that leading syntax
+        (a heading, list or code fence) still renders.
+        """
+        marker = self.failure_policy.marker
+        if segment.kind in MARKDOWN_BLOCK_TYPES:
+            marker = marker.strip() + "\n\n"
+        return build_block(segment, marker + (segment.text or ""))
+
+    @staticmethod
+    def _segment_as_text(text):
+        """The text a segment stands for, with inline code items restored as plain text."""
+        if isinstance(text, list) and text:
+            return "".join(item.text if isinstance(item, wr.InlineCode) else str(item) for item in text if item is not None)
+        return text
+
+    def _prompt_version(self):
+        """Short digest of the prompt template and glossary, used to key checkpoints."""
+        self._get_system_prompt("en")
+        version = self._prompt_template
+        if len(self.glossary):
+            version += "\n" + self.glossary.version()
+        return hashlib.sha256(version.encode("utf-8")).hexdigest()[:16]
+
+    def _translate_segment(self, key, text, language, segment_type):
+        """Route a segment to a model, record the choice and translate it.
+
+        Segments that are already in the target language or have nothing to translate
+        are passed through without calling Bedrock.
+        """
+        if not needs_translation(text, language):
+            if segment_text(text).strip():
+                self.stats.record_skipped(key)
+            return self._segment_as_text(text)
+        model_id = self.model_router.select(text, segment_type)
+        self.stats.record_model(key, model_id)
+        return self._translation(text, language, model_id=model_id)
     
-    @weave.op()
-    def _translation(self, text, language):
+    @weave.op(postprocess_inputs=trace_inputs, postprocess_output=trace_output)
+    def _translation(self, text, language, model_id=None):
         # If text is empty, whitespace only, or an empty list, return as is
         if text is None or (isinstance(text, str) and not text.strip()) or (isinstance(text, list) and (not text or all((isinstance(t, str) and not t.strip()) or t is None for t in text))):
             return text
         
-        if isinstance(text, list):
-            # Convert all items to string, handling InlineCode specially
-            placeholders = []
-            flat = ""
-            
-            for i, item in enumerate(text):
-                if isinstance(item, wr.InlineCode):
-                    ph = f"__INLINECODE_{i}__"
-                    flat += ph
-                    placeholders.append((ph, item.text))
-                else:
-                    flat += str(item)
-            
-            # Translate the flattened text
-            translated = self._call_translation_api(flat, language)
-            
-            # If we had placeholders, restore them but keep everything as a single string
-            if placeholders:
-                ph_dict = dict(placeholders)
-                parts = re.split("(" + "|".join(re.escape(ph) for ph, _ in placeholders) + ")", translated)
-                final_text = ""
-                for p in parts:
-                    if p in ph_dict:
-                        final_text += ph_dict[p]
-                    elif p:
-                        final_text += p
-                return final_text
-            
+        # Convert all items to string, handling InlineCode specially
+        flat, placeholders = self._flatten_segment(text)
+        # Translate the flattened text, once more if a placeholder did not come back
+        protected, terms = self.glossary.protect(flat, language)
+        for _ in range(2):
+            translated = self._translate_or_split(protected, language, model_id)
+            missing = self._missing_placeholders(translated, placeholders + terms)
+            if not missing:
+                # If we had placeholders, restore them but keep everything as a single string
+                return self._restore_placeholders(translated, placeholders + terms)
+            print(f"Translation lost placeholders {missing}")
+        if terms:
+            # Give up on shielding glossary terms rather than lose them
+            print("Translating without glossary placeholders")
+            translated = self._translate_or_split(flat, language, model_id)
+            missing = self._missing_placeholders(translated, placeholders)
+            if not missing:
+                return self._restore_placeholders(translated, placeholders)
+        raise PlaceholderLost(f"Translation lost placeholders {missing}")
+
+    def _translate_or_split(self, text, language, model_id, depth=0):
+        """Translate text; if the output is cut off at max_tokens, split the text in two and translate the halves."""
+        try:
+            return self._call_translation_api(text, language, model_id=model_id)
+        except OutputTruncated:
+            parts = self._split_text(text) if depth < MAX_SPLIT_DEPTH else None
+            if parts is None:
+                raise
+            head, separator, tail = parts
+            print(f"Translation output truncated, splitting a segment of {len(text)} characters")
+            self.stats.record_split()
+            return (
+                self._translate_or_split(head, language, model_id, depth + 1)
+                + separator
+                + self._translate_or_split(tail, language, model_id, depth + 1)
+            )
+
+    @staticmethod
+    def _split_text(text):
+        """Split text near its middle at a paragraph, line, sentence or word boundary.
+
+        Placeholders such as __INLINECODE_i__ contain no whitespace, so they are never cut.
+
+        Returns:
+            Tuple of (head, separator, tail), or None if the text has no boundary to split at.
+        """
+        middle = len(text) // 2
+        for pattern in (r"\n\s*\n", r"\n", r"(?<=[.!?。！？])\s+|(?<=[。！？])", r"\s+"):
+            cuts = [m for m in re.finditer(pattern, text) if 0 < m.start() and m.end() < len(text)]
+            if cuts:
+                cut = min(cuts, key=lambda m: abs(m.start() - middle))
+                return text[:cut.start()], cut.group(0), text[cut.end():]
+        return None
+
+    @staticmethod
+    def _flatten_segment(text):
+        """Flatten a list segment to a string, replacing InlineCode items with __INLINECODE_i__ placeholders.
+
+        Returns:
+            Tuple of (flat text, [(placeholder, original text), ...]).
+        """
+        if not isinstance(text, list):
+            return text, []
+        placeholders = []
+        flat = ""
+        for i, item in enumerate(text):
+            if isinstance(item, wr.InlineCode):
+                ph = f"__INLINECODE_{i}__"
+                flat += ph
+                placeholders.append((ph, item.text))
+            else:
+                flat += str(item)
+        return flat, placeholders
+
+    @staticmethod
+    def _missing_placeholders(translated, placeholders):
+        """Return the placeholders that do not appear in the translated text."""
+        return [ph for ph, _ in placeholders if ph not in (translated or "")]
+
+    @staticmethod
+    def _restore_placeholders(translated, placeholders):
+        """Put the original text back in place of the placeholders of a translated segment."""
+        if not placeholders:
             return translated
-        
-        # If text is a string
-        return self._call_translation_api(text, language)
+        ph_dict = dict(placeholders)
+        parts = re.split("(" + "|".join(re.escape(ph) for ph, _ in placeholders) + ")", translated)
+        final_text = ""
+        for p in parts:
+            if p in ph_dict:
+                final_text += ph_dict[p]
+            elif p:
+                final_text += p
+        return final_text
 
-    @weave.op()
-    def _call_translation_api(self, text, language):
+    @weave.op(postprocess_inputs=trace_inputs, postprocess_output=trace_output)
+    def _call_translation_api(self, text, language, model_id=None):
         """
         Args:
             text: The text to translate. Either a str or a list of [str, wr.InlineCode, ...].
             language: Target language (e.g., 'jp', 'ko', 'en').
+            model_id: Bedrock model id. Defaults to the router's high-quality model.
         Returns:
             Translated text. Returns a list if input is a list, or a str if input is a str.
         """
         # If text is empty, return as is without calling the API
         if text is None or (isinstance(text, str) and not text.strip()):
             return text
+        model_id = model_id or self.model_router.default_model_id
+        payload = self._build_payload(text, language)
+        try:
+            started = time.monotonic()
+            if self.streaming:
+                translated, usage, stop_reason = stream_message(
+                    self.bedrock_client,
+                    model_id,
+                    json.dumps(payload),
+                    first_token_timeout=self.first_token_timeout,
+                    stall_timeout=self.stall_timeout,
+                    max_output_chars=max(int(len(text) * self.runaway_ratio), 2000),
+                )
+            else:
+                response = self.bedrock_client.invoke_model(
+                    modelId=model_id,
+                    contentType="application/json",
+                    accept="application/json",
+                    body=json.dumps(payload)
+                )
+                response_body = json.loads(response["body"].read().decode("utf-8"))
+                usage = response_body.get("usage", {})
+                stop_reason = response_body.get("stop_reason")
+                translated = response_body["content"][0]["text"]
+            self.stats.record_usage(model_id, usage)
+            if stop_reason == "max_tokens":
+                raise OutputTruncated(f"Output of {model_id} stopped at max_tokens", translated)
+            # Measured latency feeds the wall-time estimates of dry runs
+            latency_model.record(model_id, int(usage.get("output_tokens") or 0), time.monotonic() - started)
+            return translated
+        except Exception as e:
+            print(f"Error invoking Bedrock model: {e}")
+            raise
+
+    def _get_system_prompt(self, language):
+        """Return the formatted system prompt. The template is fetched from Weave once per translator."""
+        if self._prompt_template is None:
+            self._prompt_template = weave.ref(TRANSLATE_PROMPT_REF).get().content
+            if len(self.glossary) and "__TERM_" not in self._prompt_template:
+                self._prompt_template += TERM_PLACEHOLDER_RULE
         prompt_language = {"jp": "Japanese", "ko": "Korean", "en": "English"}.get(language, language)
-        system_prompt = weave.ref("weave:///wandb-japan/fc-agent/object/translate_prompt:latest").get().content
-        payload = {
+        return self._prompt_template.format(prompt_language=prompt_language)
+
+    def _build_payload(self, text, language):
+        """Build the Anthropic Messages payload for one segment.
+
+        With prompt caching on, the system prompt is sent as a content block with a
+        cache_control breakpoint so that every block after the first reads the static
+        prefix from the Bedrock prompt cache. Bedrock only caches prefixes above the
+        model's minimum size (1,024 tokens for Claude 3.7 Sonnet), so short prompts are
+        billed as regular input tokens either way.
+        """
+        system_prompt = self._get_system_prompt(language)
+        if self.prompt_caching:
+            system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+        else:
+            system = system_prompt
+        return {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": 2000,
             "temperature": 0.1,
             "top_p": 0.5,
-            "system": system_prompt.format(prompt_language=prompt_language),
+            "system": system,
             "messages": [{"role": "user", "content": text}]
-        }
-        try:
-            response = self.bedrock_client.invoke_model(
-                modelId="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-                contentType="application/json",
-                accept="application/json",
-                body=json.dumps(payload)
-            )
-            response_body = json.loads(response["body"].read().decode("utf-8"))
-            return response_body["content"][0]["text"]
-        except Exception as e:
-            print(f"Error invoking Bedrock model: {e}")
-            raise
\ No newline at end of file
+        }
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+Hedged Bedrock requests.
+
+A report is only done when its slowest block is done, and now and then one
+invoke_model call takes many times longer than the others. HedgedBedrockClient
+tracks the recent latency of each model and request size; when a call runs past a
+high percentile of the latencies of similar-sized calls, it sends the same request
+again and returns whichever answer comes first. Sizes are bucketed by powers of two,
+so a long block is compared with other long blocks and is not hedged merely for
+being long. The clock starts when the primary call is actually running, not when it
+is queued for a worker, and no hedge is sent while other calls are still waiting for
+one: time spent in the queue is not a slow model, and a second request would only
+lengthen the queue. The number of hedges is capped as a share of all requests, so the
+extra cost stays bounded.
+"""
+
+import concurrent.futures
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+def size_bucket(kwargs: dict) -> int:
+    """Size class of an invoke_model request: 0 below 256 characters of messages, then one per doubling."""
+    try:
+        messages = json.loads(kwargs.get("body") or "{}").get("messages") or []
+    except (TypeError, ValueError, AttributeError):
+        return 0
+    chars = 0
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            chars += sum(len(block.get("text", "")) for block in content if isinstance(block, dict))
+        else:
+            chars += len(str(content))
+    return max(0, chars.bit_length() - 8)
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies per key (model, or model and request size)."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_id: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(model_id, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model_id: str, q: float) -> Optional[float]:
+        """Latency at quantile q (0-1), or None until min_samples calls have been seen."""
+        with self._lock:
+            samples = sorted(self._samples.get(model_id, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(round(q * (len(samples) - 1))))]
+
+
+# Shared by all clients in the process, so latency history survives from one job to the next
+_shared_tracker = LatencyTracker()
+_shared_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _default_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _shared_executor
+    with _executor_lock:
+        if _shared_executor is None:
+            # Primary calls run on the pool so the caller can watch the clock; hedges need room too
+            max_workers = 2 * int(os.getenv("BEDROCK_MAX_CONCURRENCY", "16"))
+            _shared_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="bedrock-hedge"
+            )
+        return _shared_executor
+
+
+# Calls submitted to each executor that no worker has picked up yet
+_waiting: Dict[int, int] = {}
+_waiting_lock = threading.Lock()
+
+
+def _add_waiting(executor, n: int):
+    with _waiting_lock:
+        count = _waiting.get(id(executor), 0) + n
+        if count:
+            _waiting[id(executor)] = count
+        else:
+            _waiting.pop(id(executor), None)
+
+
+def _has_backlog(executor) -> bool:
+    with _waiting_lock:
+        return _waiting.get(id(executor), 0) > 0
+
+
+class HedgedBedrockClient:
+    """bedrock-runtime client that re-sends straggling model invocations.
+
+    Settings default to environment variables:
+      - BEDROCK_HEDGE_PERCENTILE: latency percentile after which a call is hedged (default 95)
+      - BEDROCK_HEDGE_MAX_PERCENT: hedges allowed as a percentage of all requests (default 5)
+      - BEDROCK_HEDGE_MIN_DELAY: never hedge a call earlier than this many seconds (default 2)
+
+    Other attributes are passed through to the wrapped client.
+    """
+
+    def __init__(
+        self,
+        client,
+        percentile: Optional[float] = None,
+        max_hedge_percent: Optional[float] = None,
+        min_delay: Optional[float] = None,
+        tracker: Optional[LatencyTracker] = None,
+        executor: Optional[concurrent.futures.Executor] = None,
+    ):
+        self._client = client
+        self.percentile = percentile if percentile is not None else float(os.getenv("BEDROCK_HEDGE_PERCENTILE", "95"))
+        self.max_hedge_percent = max_hedge_percent if max_hedge_percent is not None else float(
+            os.getenv("BEDROCK_HEDGE_MAX_PERCENT", "5")
+        )
+        self.min_delay = min_delay if min_delay is not None else float(os.getenv("BEDROCK_HEDGE_MIN_DELAY", "2"))
+        self.tracker = tracker or _shared_tracker
+        self._executor = executor or _default_executor()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def _submit(self, key: str, kwargs: dict):
+        """Run the call on the pool; returns the future and an event set once a worker starts it."""
+        running = threading.Event()
+
+        def call():
+            _add_waiting(self._executor, -1)
+            running.set()
+            return self._timed_call(key, kwargs)
+
+        _add_waiting(self._executor, 1)
+        try:
+            return self._executor.submit(call), running
+        except BaseException:
+            _add_waiting(self._executor, -1)
+            raise
+
+    def _timed_call(self, key: str, kwargs: dict):
+        started = time.monotonic()
+        response = self._client.invoke_model(**kwargs)
+        self.tracker.record(key, time.monotonic() - started)
+        return response
+
+    def _hedge_delay(self, key: str) -> Optional[float]:
+        threshold = self.tracker.percentile(key, self.percentile / 100.0)
+        if threshold is None:
+            return None
+        return max(self.min_delay, threshold)
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.requests * self.max_hedge_percent / 100.0:
+                return False
+            self.hedges += 1
+            return True
+
+    def invoke_model(self, **kwargs):
+        model_id = kwargs.get("modelId", "")
+        # Latency grows with the request, so calls are only compared with calls of a similar size
+        key = f"{model_id}#{size_bucket(kwargs)}"
+        with self._lock:
+            self.requests += 1
+        primary, running = self._submit(key, kwargs)
+        delay = self._hedge_delay(key)
+        if delay is None:
+            return primary.result()
+        # The delay counts from when a worker picks the call up, not from when it was queued
+        running.wait()
+        done, _ = concurrent.futures.wait([primary], timeout=delay)
+        if done or _has_backlog(self._executor) or not self._take_hedge():
+            return primary.result()
+
+        print(f"Hedging a {model_id} call that has been running for {delay:.1f}s")
+        hedge, _ = self._submit(key, kwargs)
+        pending = {primary, hedge}
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    # The other call keeps running in the background and its answer is dropped
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+                first_error = first_error or error
+        raise first_error
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def hedged_client_from_env(client):
+    """Wrap client in a HedgedBedrockClient if BEDROCK_HEDGE is turned on (off by default)."""
+    if os.getenv("BEDROCK_HEDGE", "false").lower() in ("1", "true", "yes", "on"):
+        return HedgedBedrockClient(client)
+    return client
@@ -0,0 +1,155 @@
+"""
+Per-job statistics for a report translation.
+
+Block translations run on worker threads, so every update goes through a lock.
+"""
+
+import threading
+from typing import Dict, List, Optional, Union
+
+SegmentKey = Union[int, str]
+
+# Token counters reported in the "usage" field of an Anthropic Messages response
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens",
+)
+
+
+class JobStats:
+    """Collects what happened while translating one report."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Model used for each translated segment, keyed by block index or "title"/"description"
+        self.models: Dict[SegmentKey, str] = {}
+        # Token usage per model id
+        self.usage: Dict[str, Dict[str, int]] = {}
+        self.calls = 0
+        # Segments passed through without a Bedrock call
+        self.skipped: List[SegmentKey] = []
+        # Segments restored from a checkpoint of an earlier attempt
+        self.resumed: List[SegmentKey] = []
+        # Segments that still failed after retries, with the last error
+        self.failed: Dict[SegmentKey, str] = {}
+        # How the source report was loaded: "hit", "miss" or "stale" (None without a snapshot cache)
+        self.source_cache: Optional[str] = None
+        # The job returned an earlier translation of the unchanged source report
+        self.cached_translation = False
+        # Segments split in two after a translation was cut off at max_tokens
+        self.splits = 0
+        # URLs of links whose text was translated, so they could not be put back, per block
+        self.dropped_links: Dict[SegmentKey, List[str]] = {}
+
+    def record_model(self, key: SegmentKey, model_id: str):
+        with self._lock:
+            self.models[key] = model_id
+
+    def record_skipped(self, key: SegmentKey):
+        with self._lock:
+            self.skipped.append(key)
+
+    def record_resumed(self, key: SegmentKey):
+        with self._lock:
+            self.resumed.append(key)
+
+    def record_failed(self, key: SegmentKey, error: str):
+        with self._lock:
+            self.failed[key] = error
+
+    def record_source_cache(self, outcome: str):
+        with self._lock:
+            self.source_cache = outcome
+
+    def record_cached_translation(self):
+        with self._lock:
+            self.cached_translation = True
+
+    def record_split(self):
+        with self._lock:
+            self.splits += 1
+
+    def record_dropped_links(self, key: SegmentKey, urls: List[str]):
+        with self._lock:
+            self.dropped_links.setdefault(key, []).extend(urls)
+
+    def record_usage(self, model_id: str, usage: dict):
+        """Add the token counts of one Bedrock response."""
+        with self._lock:
+            self.calls += 1
+            totals = self.usage.setdefault(model_id, {field: 0 for field in USAGE_FIELDS})
+            for field in USAGE_FIELDS:
+                totals[field] += int((usage or {}).get(field) or 0)
+
+    def model_counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for model_id in self.models.values():
+                counts[model_id] = counts.get(model_id, 0) + 1
+            return counts
+
+    def usage_totals(self) -> Dict[str, int]:
+        with self._lock:
+            totals = {field: 0 for field in USAGE_FIELDS}
+            for per_model in self.usage.values():
+                for field in USAGE_FIELDS:
+                    totals[field] += per_model[field]
+            return totals
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            models = {str(k): v for k, v in self.models.items()}
+            usage = {model_id: dict(totals) for model_id, totals in self.usage.items()}
+            calls = self.calls
+            skipped = [str(k) for k in self.skipped]
+            resumed = [str(k) for k in self.resumed]
+            failed = {str(k): v for k, v in self.failed.items()}
+            dropped_links = {str(k): list(v) for k, v in self.dropped_links.items()}
+        return {
+            "models": models,
+            "model_counts": self.model_counts(),
+            "calls": calls,
+            "usage": usage,
+            "usage_totals": self.usage_totals(),
+            "skipped": skipped,
+            "resumed": resumed,
+            "failed": failed,
+            "source_cache": self.source_cache,
+            "splits": self.splits,
+            "dropped_links": dropped_links,
+            "cached_translation": self.cached_translation,
+        }
+
+    def summary(self) -> str:
+        """Short human-readable summary for the job result."""
+        lines = []
+        if self.cached_translation:
+            lines.append("Source report unchanged since it was last translated: returned the saved translation")
+        counts = self.model_counts()
+        if counts:
+            lines.append("Models: " + ", ".join(f"{model_id} x{n}" for model_id, n in sorted(counts.items())))
+        if self.calls:
+            totals = self.usage_totals()
+            lines.append(
+                f"Tokens: input {totals['input_tokens']}"
+                f" (cache read {totals['cache_read_input_tokens']}, cache write {totals['cache_creation_input_tokens']}),"
+                f" output {totals['output_tokens']}"
+            )
+        if self.skipped:
+            lines.append(f"Skipped (already in target language or nothing to translate): {len(self.skipped)}")
+        if self.source_cache == "hit":
+            lines.append("Source report: unchanged, loaded from the snapshot cache")
+        if self.splits:
+            lines.append(f"Split after truncated output: {self.splits}")
+        if self.dropped_links:
+            count = sum(len(urls) for urls in self.dropped_links.values())
+            keys = ", ".join(str(k) for k in sorted(self.dropped_links, key=lambda k: (isinstance(k, int), k)))
+            lines.append(f"Links lost because their text was translated: {count} (blocks {keys})")
+        if self.resumed:
+            lines.append(f"Resumed from checkpoint: {len(self.resumed)}")
+        if self.failed:
+            keys = ", ".join(str(k) for k in sorted(self.failed, key=lambda k: (isinstance(k, int), k)))
+            lines.append(f"Kept in the source language after errors: {keys}")
+        return "\n".join(lines)
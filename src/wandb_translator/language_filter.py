@@ -0,0 +1,141 @@
+"""
+Local pre-filter that decides whether a segment needs to be sent to Bedrock.
+
+A segment is passed through untranslated when it is already written in the target
+language (judged by Unicode script ratios) or when it has nothing to translate:
+only URLs, numbers, emoji, punctuation, placeholders or a single code identifier.
+"""
+
+import os
+import re
+from typing import Optional
+
+# Minimum share of target-script units for a segment to count as already translated.
+# Latin words count as one unit each and CJK/Hangul characters as one unit each, so
+# Japanese or Korean text that mentions English product names still scores high.
+# Latin words only count as English next to a common English word (French, German or
+# Spanish use the same letters), and Japanese needs kana (Han alone may be Chinese).
+DEFAULT_THRESHOLDS = {"jp": 0.5, "ko": 0.5, "en": 0.9}
+LANGUAGE_ALIASES = {"ja": "jp", "japanese": "jp", "korean": "ko", "english": "en"}
+
+_FENCED_CODE = re.compile(r"```.*?```", re.DOTALL)
+_INLINE_CODE = re.compile(r"`[^`]*`")
+_PLACEHOLDER = re.compile(r"__[A-Z]+_\d+__")
+_MARKDOWN_LINK_TARGET = re.compile(r"\]\([^)]*\)")
+_URL = re.compile(r"(?:https?://|www\.)\S+")
+_LATIN_WORD = re.compile(r"[A-Za-zÀ-ɏ]+")
+# Common English words; Latin text without any of them is not known to be English
+# ("a", "an", "in", "was" and the like are left out: they are words in French or German too)
+_ENGLISH_STOPWORDS = {
+    "and", "are", "as", "at", "be", "by", "can", "for", "from", "has", "have", "how", "is", "it",
+    "its", "of", "or", "our", "that", "the", "this", "to", "we", "what", "which", "with", "you", "your",
+}
+_IDENTIFIER = re.compile(
+    r"^(?:[A-Za-z_][A-Za-z0-9]*_[A-Za-z0-9_]*"              # snake_case
+    r"|[a-z_][a-z0-9_]*(?:/[a-z0-9_-]+)*(?:[.:][a-z_][a-z0-9_]*)+"  # dotted.module, module:attr, path/file.py
+    r"|[a-z]+[A-Z][A-Za-z0-9]*"                          # camelCase
+    r"|[A-Za-z_][A-Za-z0-9_.]*\([^()\s]*\)"               # call() or f(x)
+    r"|--?[A-Za-z][\w-]*)$"                              # --cli-flag
+)
+
+
+def _is_kana(ch: str) -> bool:
+    cp = ord(ch)
+    return 0x3040 <= cp <= 0x30FF or 0x31F0 <= cp <= 0x31FF or 0xFF66 <= cp <= 0xFF9F
+
+
+def _is_han(ch: str) -> bool:
+    cp = ord(ch)
+    return 0x4E00 <= cp <= 0x9FFF or 0x3400 <= cp <= 0x4DBF or 0xF900 <= cp <= 0xFAFF
+
+
+def _is_hangul(ch: str) -> bool:
+    cp = ord(ch)
+    return 0xAC00 <= cp <= 0xD7AF or 0x1100 <= cp <= 0x11FF or 0x3130 <= cp <= 0x318F
+
+
+def segment_text(text) -> str:
+    """Flatten a segment (str or list of [str, wr.InlineCode, ...]) to the text that would be translated.
+
+    Inline code items are left out since they are never translated.
+    """
+    if text is None:
+        return ""
+    if isinstance(text, list):
+        parts = []
+        for item in text:
+            if item is None or type(item).__name__ == "InlineCode":
+                continue
+            parts.append(item if isinstance(item, str) else str(getattr(item, "text", item)))
+        return " ".join(parts)
+    return str(text)
+
+
+def _strip_untranslatable(text: str) -> str:
+    text = _FENCED_CODE.sub(" ", text)
+    text = _INLINE_CODE.sub(" ", text)
+    text = _PLACEHOLDER.sub(" ", text)
+    text = _MARKDOWN_LINK_TARGET.sub("] ", text)
+    return _URL.sub(" ", text)
+
+
+def script_units(text: str) -> dict:
+    """Count script units: Latin words (ASCII-only and with accented letters), kana, Han and Hangul characters."""
+    words = _LATIN_WORD.findall(text)
+    ascii_words = sum(1 for w in words if w.isascii())
+    counts = {"latin": ascii_words, "latin_accented": len(words) - ascii_words, "kana": 0, "han": 0, "hangul": 0, "other": 0}
+    for ch in text:
+        if _is_kana(ch):
+            counts["kana"] += 1
+        elif _is_han(ch):
+            counts["han"] += 1
+        elif _is_hangul(ch):
+            counts["hangul"] += 1
+        elif ch.isalpha() and ord(ch) > 0x024F:
+            counts["other"] += 1
+    return counts
+
+
+def needs_translation(text, language: str, threshold: Optional[float] = None) -> bool:
+    """Return False when a segment can be passed through without calling Bedrock.
+
+    Args:
+        text: The segment. Either a str or a list of [str, wr.InlineCode, ...].
+        language: Target language ('jp', 'ko' or 'en').
+        threshold: Minimum target-script share. Defaults to TRANSLATION_SKIP_RATIO or a per-language default.
+    """
+    stripped = _strip_untranslatable(segment_text(text)).strip()
+    # Numbers, emoji, punctuation and markup only
+    if not any(ch.isalpha() for ch in stripped):
+        return False
+    tokens = stripped.split()
+    if len(tokens) == 1 and (_IDENTIFIER.match(tokens[0]) or _IDENTIFIER.match(tokens[0].strip(".,;:!?\"'()[]"))):
+        return False
+
+    language = LANGUAGE_ALIASES.get(str(language).lower(), language)
+    if threshold is None:
+        env_threshold = os.getenv("TRANSLATION_SKIP_RATIO")
+        threshold = float(env_threshold) if env_threshold else DEFAULT_THRESHOLDS.get(language)
+    if threshold is None:
+        return True
+
+    units = script_units(stripped)
+    total = sum(units.values())
+    if total == 0:
+        return False
+    if language == "jp":
+        # Han alone is just as likely Chinese; Japanese text has kana
+        if units["hangul"] or not units["kana"]:
+            return True
+        target = units["kana"] + units["han"]
+    elif language == "ko":
+        target = units["hangul"]
+    elif language == "en":
+        # French, German, Spanish... use the same letters: Latin text needs an English word in it,
+        # and then accented words count as English loanwords
+        if not any(w.lower() in _ENGLISH_STOPWORDS for w in _LATIN_WORD.findall(stripped)):
+            return True
+        target = units["latin"] + units["latin_accented"]
+    else:
+        return True
+    return target / total < threshold
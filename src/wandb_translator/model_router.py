@@ -0,0 +1,85 @@
+"""
+Model routing for translation segments.
+
+Short, low-risk segments (report titles, descriptions, headings, captions) are
+sent to a faster model; everything else stays on the high-quality model.
+"""
+
+import os
+from typing import Iterable, Optional
+
+DEFAULT_MODEL_ID = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+DEFAULT_FAST_MODEL_ID = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
+
+# Segment types that are safe to hand to the fast model when they are short
+DEFAULT_FAST_SEGMENT_TYPES = ("title", "description", "caption", "H1", "H2", "H3")
+# Segment types that always stay on the high-quality model, whatever their size
+DEFAULT_QUALITY_SEGMENT_TYPES = ("MarkdownBlock", "MarkdownPanel")
+
+
+def _segment_length(text) -> int:
+    if text is None:
+        return 0
+    if isinstance(text, list):
+        return sum(len(t if isinstance(t, str) else str(getattr(t, "text", t))) for t in text if t is not None)
+    return len(str(text))
+
+
+def _env_list(name: str, default: Iterable[str]) -> tuple:
+    value = os.getenv(name)
+    if value is None:
+        return tuple(default)
+    return tuple(v.strip() for v in value.split(",") if v.strip())
+
+
+class ModelRouter:
+    """Pick a Bedrock model id for a segment based on its type and size.
+
+    Every setting can be overridden with an environment variable:
+      - TRANSLATION_MODEL_ID: high-quality model (default: Claude 3.7 Sonnet)
+      - TRANSLATION_FAST_MODEL_ID: fast model; set to an empty string to disable routing
+      - TRANSLATION_FAST_MAX_CHARS: max size of a low-risk segment routed to the fast model
+      - TRANSLATION_SHORT_MAX_CHARS: max size of any other segment routed to the fast model
+      - TRANSLATION_FAST_SEGMENT_TYPES: comma separated low-risk segment types
+    """
+
+    def __init__(
+        self,
+        default_model_id: Optional[str] = None,
+        fast_model_id: Optional[str] = None,
+        fast_max_chars: Optional[int] = None,
+        short_max_chars: Optional[int] = None,
+        fast_segment_types: Optional[Iterable[str]] = None,
+    ):
+        self.default_model_id = default_model_id or os.getenv("TRANSLATION_MODEL_ID", DEFAULT_MODEL_ID)
+        self.fast_model_id = fast_model_id if fast_model_id is not None else os.getenv(
+            "TRANSLATION_FAST_MODEL_ID", DEFAULT_FAST_MODEL_ID
+        )
+        self.fast_max_chars = fast_max_chars if fast_max_chars is not None else int(
+            os.getenv("TRANSLATION_FAST_MAX_CHARS", "300")
+        )
+        self.short_max_chars = short_max_chars if short_max_chars is not None else int(
+            os.getenv("TRANSLATION_SHORT_MAX_CHARS", "80")
+        )
+        self.fast_segment_types = tuple(fast_segment_types) if fast_segment_types is not None else _env_list(
+            "TRANSLATION_FAST_SEGMENT_TYPES", DEFAULT_FAST_SEGMENT_TYPES
+        )
+        self.quality_segment_types = DEFAULT_QUALITY_SEGMENT_TYPES
+
+    def select(self, text, segment_type: Optional[str] = None) -> str:
+        """Return the model id to use for a segment.
+
+        Args:
+            text: The segment to translate. Either a str or a list of [str, wr.InlineCode, ...].
+            segment_type: "title", "description" or the block type name (e.g. "H2", "P").
+        Returns:
+            Bedrock model id.
+        """
+        if not self.fast_model_id or segment_type in self.quality_segment_types:
+            return self.default_model_id
+        length = _segment_length(text)
+        if segment_type in self.fast_segment_types and length <= self.fast_max_chars:
+            return self.fast_model_id
+        if length <= self.short_max_chars:
+            return self.fast_model_id
+        return self.default_model_id
@@ -0,0 +1,228 @@
+"""
+Dry-run planning of a report translation.
+
+plan_translation() loads a report and classifies every segment with the same rules
+as the translator (checkpointed, passed through, or sent to a routed model), then
+estimates the Bedrock calls, tokens, cost and wall time of the job without calling
+Bedrock. Wall time is simulated with the translator's block concurrency and call
+latencies measured by earlier translations in the same process.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from typing import Dict, List, Tuple
+
+from checkpoint import checkpoint_key, source_digest
+from language_filter import needs_translation
+
+# USD per million tokens (input, output), matched by substring of the model id.
+# Override with TRANSLATION_PRICES, e.g. '{"claude-3-7-sonnet": [3.0, 15.0]}'.
+DEFAULT_PRICES = {
+    "claude-3-7-sonnet": (3.0, 15.0),
+    "claude-3-5-sonnet": (3.0, 15.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "claude-3-haiku": (0.25, 1.25),
+}
+# Cache reads and writes relative to the input price (Bedrock prompt caching)
+CACHE_READ_FACTOR = 0.1
+CACHE_WRITE_FACTOR = 1.25
+# Bedrock only caches prompt prefixes of at least this many tokens
+MIN_CACHEABLE_TOKENS = 1024
+
+# Latency before measurements exist: (seconds per call, seconds per output token)
+DEFAULT_LATENCY = {
+    "claude-3-7-sonnet": (0.8, 1 / 55),
+    "claude-3-5-haiku": (0.5, 1 / 90),
+}
+FALLBACK_LATENCY = (0.8, 1 / 50)
+
+# Output tokens per input token of the source text, by target language
+OUTPUT_RATIO = {"jp": 1.3, "ko": 1.4, "en": 0.9}
+
+MAX_OUTPUT_TOKENS = 2000
+
+_WIDE_CHARS = re.compile(r"[぀-ヿ㐀-鿿가-힯＀-￯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: one token per CJK or Hangul character, one per four other characters."""
+    if not text:
+        return 0
+    wide = len(_WIDE_CHARS.findall(text))
+    return max(1, wide + math.ceil((len(text) - wide) / 4))
+
+
+def _lookup(table: dict, model_id: str, default=None):
+    for key, value in table.items():
+        if key in model_id:
+            return value
+    return default
+
+
+def model_prices() -> dict:
+    prices = dict(DEFAULT_PRICES)
+    override = os.getenv("TRANSLATION_PRICES")
+    if override:
+        prices.update({k: tuple(v) for k, v in json.loads(override).items()})
+    return prices
+
+
+class LatencyModel:
+    """Per-model fit of call latency as seconds = base + per_token * output_tokens.
+
+    Fitted by least squares over the calls recorded so far; the defaults are used
+    until a model has min_samples calls.
+    """
+
+    def __init__(self, min_samples: int = 5):
+        self.min_samples = min_samples
+        # model id -> [n, sum x, sum y, sum xy, sum xx]
+        self._sums: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_id: str, output_tokens: int, seconds: float):
+        with self._lock:
+            sums = self._sums.setdefault(model_id, [0.0] * 5)
+            sums[0] += 1
+            sums[1] += output_tokens
+            sums[2] += seconds
+            sums[3] += output_tokens * seconds
+            sums[4] += output_tokens * output_tokens
+
+    def coefficients(self, model_id: str) -> Tuple[float, float]:
+        default = _lookup(DEFAULT_LATENCY, model_id, FALLBACK_LATENCY)
+        with self._lock:
+            sums = self._sums.get(model_id)
+            if not sums or sums[0] < self.min_samples:
+                return default
+            n, sx, sy, sxy, sxx = sums
+        denominator = n * sxx - sx * sx
+        if denominator <= 0:
+            return (sy / n, default[1])
+        per_token = max(0.0, (n * sxy - sx * sy) / denominator)
+        base = max(0.0, (sy - per_token * sx) / n)
+        return base, per_token
+
+    def predict(self, model_id: str, output_tokens: int) -> float:
+        base, per_token = self.coefficients(model_id)
+        return base + per_token * output_tokens
+
+
+# Shared by every translator in the process; fed by WandBReportTranslator._call_translation_api
+latency_model = LatencyModel()
+
+
+def simulate_wall_time(durations: List[float], workers: int) -> float:
+    """Finish time of tasks started in order on the first free of `workers` workers."""
+    finish = [0.0] * max(1, workers)
+    for duration in durations:
+        slot = finish.index(min(finish))
+        finish[slot] += duration
+    return max(finish) if durations else 0.0
+
+
+def expected_output_tokens(text_tokens: int, language: str) -> int:
+    return min(MAX_OUTPUT_TOKENS, math.ceil(text_tokens * OUTPUT_RATIO.get(language, 1.2)))
+
+
+def expected_seconds(translator, segment, segment_type: str, language: str) -> float:
+    """Predicted Bedrock time of one segment, or 0 for a segment passed through without a call."""
+    if not needs_translation(segment, language):
+        return 0.0
+    flat, _ = translator._flatten_segment(segment)
+    model_id = translator.model_router.select(segment, segment_type)
+    return latency_model.predict(model_id, expected_output_tokens(estimate_tokens(flat), language))
+
+
+def plan_translation(translator, original_report_url: str, language: str) -> dict:
+    """Estimate the Bedrock calls, tokens, cost and wall time of translating a report.
+
+    Args:
+        translator: WandBReportTranslator whose routing, checkpoints and settings are used
+        original_report_url: URL of the source report
+        language: Target language (e.g. 'jp', 'ko', 'en')
+
+    Returns:
+        Dict with segment counts, per-model totals, estimated cost in USD and wall time in seconds.
+    """
+    if original_report_url and "---" in original_report_url:
+        original_report_url = original_report_url.replace("---", "--")
+    source_report = translator._load_source_report(original_report_url)
+    system_tokens = estimate_tokens(translator._get_system_prompt(language))
+    segments = list(translator._report_segments(source_report, original_report_url))
+    job_key = checkpoint_key(original_report_url, language, translator._prompt_version())
+    sources = {key: source_digest(segment.text) for key, segment in segments}
+    done = translator.checkpoint_store.load(job_key, sources) if translator.checkpoint_store else {}
+    prices = model_prices()
+    cacheable = translator.prompt_caching and system_tokens >= MIN_CACHEABLE_TOKENS
+
+    counts = {"segments": 0, "resumed": 0, "skipped": 0, "calls": 0}
+    by_model: Dict[str, dict] = {}
+    seconds: List[float] = []
+    for key, segment in segments:
+        counts["segments"] += 1
+        if key in done:
+            counts["resumed"] += 1
+            continue
+        if not needs_translation(segment.text, language):
+            counts["skipped"] += 1
+            continue
+        text_tokens = estimate_tokens(segment.text)
+        output_tokens = expected_output_tokens(text_tokens, language)
+        model_id = translator.model_router.select(segment.text, segment.kind)
+        input_price, output_price = _lookup(prices, model_id, (0.0, 0.0))
+
+        totals = by_model.setdefault(model_id, {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0})
+        if cacheable:
+            # The first call of a model writes the prompt to the cache, later calls read it
+            factor = CACHE_WRITE_FACTOR if totals["calls"] == 0 else CACHE_READ_FACTOR
+            input_cost = (text_tokens + system_tokens * factor) * input_price
+        else:
+            input_cost = (text_tokens + system_tokens) * input_price
+        totals["calls"] += 1
+        totals["input_tokens"] += text_tokens + system_tokens
+        totals["output_tokens"] += output_tokens
+        totals["cost_usd"] += (input_cost + output_tokens * output_price) / 1_000_000
+        counts["calls"] += 1
+
+        seconds.append(latency_model.predict(model_id, output_tokens))
+
+    # Title, description and blocks share one pool, longest expected call first
+    workers = translator.block_workers
+    budget = getattr(translator.bedrock_client, "budget", None)
+    if budget is not None:
+        workers = min(workers, budget.max_concurrency)
+    wall_seconds = simulate_wall_time(sorted(seconds, reverse=True), workers)
+
+    for totals in by_model.values():
+        totals["cost_usd"] = round(totals["cost_usd"], 4)
+    return {
+        "url": original_report_url,
+        "language": language,
+        **counts,
+        "input_tokens": sum(t["input_tokens"] for t in by_model.values()),
+        "output_tokens": sum(t["output_tokens"] for t in by_model.values()),
+        "cost_usd": round(sum(t["cost_usd"] for t in by_model.values()), 4),
+        "wall_seconds": round(wall_seconds, 1),
+        "serial_seconds": round(sum(seconds), 1),
+        "workers": workers,
+        "by_model": by_model,
+    }
+
+
+def format_plan(plan: dict) -> str:
+    """Human-readable summary of a plan, for the Lambda response and the CLI."""
+    lines = [
+        f"Dry run for {plan['url']} ({plan['language']}):",
+        f"Segments: {plan['segments']} ({plan['calls']} to translate, {plan['skipped']} passed through, "
+        f"{plan['resumed']} already in the checkpoint)",
+        f"Estimated tokens: input {plan['input_tokens']}, output {plan['output_tokens']}",
+        f"Estimated cost: ${plan['cost_usd']:.4f}",
+        f"Estimated time: {plan['wall_seconds']:.0f}s with {plan['workers']} parallel blocks",
+    ]
+    for model_id, totals in sorted(plan["by_model"].items()):
+        lines.append(f"  {model_id}: {totals['calls']} calls, ${totals['cost_usd']:.4f}")
+    return "\n".join(lines)
@@ -0,0 +1,195 @@
+"""
+Progress of a report translation.
+
+WandBReportTranslator reports what it is doing through a progress callback. Each
+event is a dict with the job id, the stage ("loading", "translating", "saving",
+"done", "cached" or "failed"), blocks done and total, and the estimated
+seconds remaining. The Lambda handler writes the latest event of each job to a
+progress store, from which the translation_status function answers status queries;
+the Slack app polls it to edit its status message while a translation runs.
+
+Concurrent Lambda invocations do not share /tmp, so deployments should keep progress
+in S3 (the translation cache bucket by default).
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Callable, Optional
+
+from translation_cache import LocalTranslationCache, S3TranslationCache
+
+def progress_job_id(report_url: str, language: str) -> str:
+    """Job id of a translation started without an explicit job_id."""
+    return hashlib.sha256(f"{report_url}\n{language}".encode("utf-8")).hexdigest()[:16]
+
+
+def safe_job_id(job_id: str) -> str:
+    # Job ids come from the caller and become file names or S3 keys
+    return re.sub(r"[^\w.-]", "_", job_id)[:128]
+
+
+class ProgressTracker:
+    """Turns stage changes and finished blocks into progress events. Safe to call from worker threads."""
+
+    def __init__(self, callback: Optional[Callable[[dict], None]], job_id: Optional[str] = None, clock=time.monotonic):
+        """
+        Args:
+            callback: Receives every event; None disables progress reporting
+            job_id: Id put in every event
+            clock: Time source for the estimated time remaining
+        """
+        self.callback = callback
+        self.job_id = job_id
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.stage_name = None
+        self.done = 0
+        self.total = 0
+        # Blocks finished in this run, which exclude those restored from a checkpoint
+        self._finished = 0
+        self._started_at = None
+
+    def stage(self, stage: str, **fields):
+        with self._lock:
+            self.stage_name = stage
+            event = self._event(**fields)
+        self._emit(event)
+
+    def start_blocks(self, total: int, done: int = 0):
+        """Enter the "translating" stage with `done` of `total` blocks already finished."""
+        with self._lock:
+            self.stage_name = "translating"
+            self.total = total
+            self.done = done
+            self._finished = 0
+            self._started_at = self._clock()
+            event = self._event()
+        self._emit(event)
+
+    def block_done(self):
+        with self._lock:
+            self.done += 1
+            self._finished += 1
+            event = self._event()
+        self._emit(event)
+
+    def eta_seconds(self) -> Optional[float]:
+        """Remaining blocks at the rate of the blocks finished so far in this run, or None before the first."""
+        if self.stage_name != "translating" or not self._finished:
+            return None
+        elapsed = self._clock() - self._started_at
+        return max(0.0, (self.total - self.done) * elapsed / self._finished)
+
+    def _event(self, **fields) -> dict:
+        event = {
+            "job_id": self.job_id,
+            "stage": self.stage_name,
+            "done": self.done,
+            "total": self.total,
+            "eta_seconds": self.eta_seconds(),
+            "updated_at": time.time(),
+        }
+        event.update(fields)
+        return event
+
+    def _emit(self, event: dict):
+        if self.callback is None:
+            return
+        try:
+            self.callback(event)
+        except Exception as e:
+            # Progress reporting never fails the translation
+            print(f"Could not report progress: {e}")
+
+
+class StoredProgress:
+    """Progress callback that keeps the latest event of a job in a progress store.
+
+    Block events are written at most every `interval` seconds; stage changes and the
+    final event are always written.
+    """
+
+    def __init__(self, store, job_id: str, interval: Optional[float] = None, clock=time.monotonic):
+        self.store = store
+        self.key = safe_job_id(job_id)
+        self.interval = interval if interval is not None else float(os.getenv("TRANSLATION_PROGRESS_INTERVAL", "2"))
+        self._clock = clock
+        self._last_stage = None
+        self._last_write = None
+
+    def __call__(self, event: dict):
+        now = self._clock()
+        if (
+            event["stage"] == self._last_stage
+            and self._last_write is not None
+            and now - self._last_write < self.interval
+        ):
+            return
+        self.store.put(self.key, event)
+        self._last_stage = event["stage"]
+        self._last_write = now
+
+
+def load_progress(store, job_id: str) -> Optional[dict]:
+    return store.get(safe_job_id(job_id))
+
+
+def _format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return ""
+    if seconds < 60:
+        return ", less than a minute left"
+    return f", about {round(seconds / 60)} min left"
+
+
+def format_progress(event: Optional[dict], now: Optional[float] = None) -> str:
+    """One-line status of a translation for Slack or the agent."""
+    if not event:
+        return "No progress has been reported for this translation."
+    stage = event.get("stage")
+    if stage == "loading":
+        text = "Loading the source report..."
+    elif stage == "translating":
+        done, total = event.get("done", 0), event.get("total", 0)
+        percent = round(100 * done / total) if total else 100
+        text = f"Translating: {done}/{total} blocks ({percent}%){_format_eta(event.get('eta_seconds'))}"
+    elif stage == "saving":
+        text = "Saving the translated report..."
+    elif stage == "done":
+        return f"Translation finished: {event.get('url')}"
+    elif stage == "cached":
+        return f"The source report has not changed since its last translation: {event.get('url')}"
+    elif stage == "failed":
+        return f"Translation failed: {event.get('error')}"
+    else:
+        text = f"Translation {stage}"
+    quiet = (now if now is not None else time.time()) - event.get("updated_at", 0)
+    if quiet > 120:
+        text += f" (no progress for {round(quiet / 60)} min)"
+    return text
+
+
+def progress_store_from_env(shared_only: bool = False):
+    """Progress store from environment variables, or None if TRANSLATION_PROGRESS is turned off.
+
+    Uses the same JSON-per-key stores as the translation cache:
+      - TRANSLATION_PROGRESS_BUCKET: S3 bucket (default TRANSLATION_CACHE_BUCKET); a local directory is used if unset
+      - TRANSLATION_PROGRESS_PREFIX: key prefix in the bucket (default "progress/")
+      - TRANSLATION_PROGRESS_DIR: local directory (default /tmp/translation_progress)
+
+    Args:
+        shared_only: Only return a store every status query can read: the bucket, or a TRANSLATION_PROGRESS_DIR
+            set explicitly (e.g. an EFS mount). The default /tmp directory is private to one Lambda container.
+    """
+    if os.getenv("TRANSLATION_PROGRESS", "true").lower() in ("0", "false", "no", "off"):
+        return None
+    bucket = os.getenv("TRANSLATION_PROGRESS_BUCKET") or os.getenv("TRANSLATION_CACHE_BUCKET")
+    if bucket:
+        return S3TranslationCache(bucket, os.getenv("TRANSLATION_PROGRESS_PREFIX", "progress/"))
+    root = os.getenv("TRANSLATION_PROGRESS_DIR")
+    if root is None and shared_only:
+        return None
+    return LocalTranslationCache(root or "/tmp/translation_progress")
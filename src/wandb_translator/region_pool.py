@@ -0,0 +1,228 @@
+"""
+Bedrock runtime clients spread over several regions.
+
+RegionalBedrockPool sends each request to the region with the fewest outstanding
+requests relative to its weight. A region that throttles or fails several times in a
+row is ejected for a while, and a request that hits a throttle or a server error is
+retried once in each other region before the error is raised.
+
+Every region of the pool must serve the configured model ids. The default ids are
+"us." cross-region inference profiles, which are only available in US regions; a pool
+that includes other regions needs model ids that are valid there (e.g. the "eu." or
+"apac." profile of the same model, with regions from that geography only).
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from streaming import release_with_body
+
+# Error codes worth retrying in another region. Anything else (validation, access) is raised as is.
+FAILOVER_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+}
+
+
+def is_failover_error(error: Exception) -> bool:
+    """Whether an error is a throttle, a server error or a connection problem, rather than a bad request."""
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") in FAILOVER_ERROR_CODES
+    return isinstance(error, BotoCoreError)
+
+
+class RegionState:
+    """Load and health of one region in the pool."""
+
+    def __init__(self, region: str, client, weight: float = 1.0):
+        self.region = region
+        self.client = client
+        self.weight = weight
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "weight": self.weight,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+        }
+
+
+class RegionalBedrockPool:
+    """bedrock-runtime client that load-balances model invocations over several regional clients.
+
+    Other attributes are passed through to the client of the first region.
+    """
+
+    def __init__(
+        self,
+        clients: Dict[str, object],
+        weights: Optional[Dict[str, float]] = None,
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            clients: bedrock-runtime client per region, in order of preference
+            weights: Relative share of traffic per region (default 1.0 each)
+            eject_after: Consecutive failures after which a region is ejected
+            eject_seconds: How long an ejected region receives no traffic
+            clock: Time source, for tests
+        """
+        if not clients:
+            raise ValueError("RegionalBedrockPool needs at least one region")
+        weights = weights or {}
+        for region, weight in weights.items():
+            if weight <= 0:
+                raise ValueError(f"Weight of region {region} must be positive, got {weight}")
+        self.regions: List[RegionState] = [
+            RegionState(region, client, weights.get(region, 1.0)) for region, client in clients.items()
+        ]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def _acquire(self, tried) -> Optional[RegionState]:
+        """Pick the least loaded healthy region not tried yet and count the request against it."""
+        with self._lock:
+            now = self._clock()
+            candidates = [r for r in self.regions if r.region not in tried]
+            if not candidates:
+                return None
+            healthy = [r for r in candidates if r.ejected_until <= now]
+            if healthy:
+                state = min(healthy, key=lambda r: (r.outstanding + 1) / r.weight)
+            elif len(tried) == 0:
+                # Every region is ejected: use the one that comes back first rather than failing outright
+                state = min(candidates, key=lambda r: r.ejected_until)
+            else:
+                return None
+            state.outstanding += 1
+            state.requests += 1
+            return state
+
+    def _release(self, state: RegionState, error: Optional[Exception] = None):
+        with self._lock:
+            state.outstanding -= 1
+            if error is None:
+                state.consecutive_failures = 0
+                return
+            state.failures += 1
+            state.consecutive_failures += 1
+            if state.consecutive_failures >= self.eject_after and len(self.regions) > 1:
+                state.ejected_until = self._clock() + self.eject_seconds
+                state.consecutive_failures = 0
+                state.ejections += 1
+                print(f"Ejecting Bedrock region {state.region} for {self.eject_seconds:.0f}s after repeated errors")
+
+    def invoke_model(self, **kwargs):
+        return self._invoke("invoke_model", kwargs)
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        # Failover covers opening the stream; the request counts against its region until the body is read or closed
+        return self._invoke("invoke_model_with_response_stream", kwargs, stream=True)
+
+    def _invoke(self, method: str, kwargs: dict, stream: bool = False):
+        tried = set()
+        last_error: Optional[Exception] = None
+        while True:
+            state = self._acquire(tried)
+            if state is None:
+                raise last_error
+            tried.add(state.region)
+            try:
+                response = getattr(state.client, method)(**kwargs)
+            except Exception as e:
+                if not is_failover_error(e):
+                    self._release(state)
+                    raise
+                self._release(state, e)
+                last_error = e
+                continue
+            if stream:
+                return release_with_body(response, lambda state=state: self._release(state))
+            self._release(state)
+            return response
+
+    def metrics(self) -> Dict[str, dict]:
+        with self._lock:
+            return {r.region: r.to_dict() for r in self.regions}
+
+    def __getattr__(self, name):
+        return getattr(self.regions[0].client, name)
+
+
+def parse_regions(value: str) -> Dict[str, float]:
+    """Parse "us-east-1:2,us-west-2" into {"us-east-1": 2.0, "us-west-2": 1.0}.
+
+    Raises:
+        ValueError: A weight is not a positive number
+    """
+    regions: Dict[str, float] = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        region, _, weight = item.partition(":")
+        try:
+            parsed = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight {weight!r} for region {region.strip()} in BEDROCK_REGIONS") from None
+        # A zero weight would divide by zero when picking a region; leave the region out instead
+        if not parsed > 0:
+            raise ValueError(f"Weight of region {region.strip()} in BEDROCK_REGIONS must be positive, got {weight}")
+        regions[region.strip()] = parsed
+    return regions
+
+
+def bedrock_client_from_env(max_concurrency: Optional[int] = None):
+    """bedrock-runtime client for the regions in BEDROCK_REGIONS, or AWS_REGION if it is not set.
+
+    The connection pool of every regional client is sized to max_concurrency
+    (default BEDROCK_MAX_CONCURRENCY), so parallel block calls do not wait for a
+    free connection. With a single region a plain client is returned, which retries
+    up to BEDROCK_MAX_ATTEMPTS times. The clients of a pool make a single attempt:
+    the pool fails over to another region instead of retrying (and waiting out
+    backoff) in the region that just throttled.
+
+    The default model ids are "us." inference profiles and only work in US regions
+    (see the module docstring).
+    """
+    max_concurrency = max_concurrency or int(os.getenv("BEDROCK_MAX_CONCURRENCY", "16"))
+    regions = parse_regions(os.getenv("BEDROCK_REGIONS", ""))
+    if len(regions) <= 1:
+        region = next(iter(regions), None) or os.getenv("AWS_REGION")
+        config = Config(
+            max_pool_connections=max_concurrency,
+            retries={"mode": "adaptive", "total_max_attempts": int(os.getenv("BEDROCK_MAX_ATTEMPTS", "3"))},
+        )
+        return boto3.Session(region_name=region).client("bedrock-runtime", config=config)
+    # botocore's "max_attempts" counts retries only; "total_max_attempts" includes the first attempt
+    config = Config(max_pool_connections=max_concurrency, retries={"mode": "standard", "total_max_attempts": 1})
+    clients = {region: boto3.Session(region_name=region).client("bedrock-runtime", config=config) for region in regions}
+    return RegionalBedrockPool(
+        clients,
+        weights=regions,
+        eject_after=int(os.getenv("BEDROCK_REGION_EJECT_AFTER", "3")),
+        eject_seconds=float(os.getenv("BEDROCK_REGION_EJECT_SECONDS", "30")),
+    )
@@ -0,0 +1,144 @@
+"""
+Snapshot cache of source reports.
+
+Loading a report fetches and parses its whole viewspec. The cache keeps the raw
+viewspec of every source report on local disk, keyed by report id. Before a
+snapshot is reused, a small GraphQL query compares the report's updatedAt with the
+snapshot's; the full viewspec is only fetched again when the report has changed.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import wandb_workspaces.reports.v2 as wr
+from wandb_workspaces.reports.v2 import interface as wr_interface
+from wandb_workspaces.reports.v2 import internal as wr_internal
+
+# Cache outcomes recorded in the job statistics
+HIT = "hit"
+MISS = "miss"
+STALE = "stale"
+
+REPORT_UPDATED_AT_QUERY = """
+    query ReportUpdatedAt($reportId: ID!) {
+        view(id: $reportId) {
+            id
+            updatedAt
+        }
+    }
+"""
+
+
+def _execute_graphql(query: str, variables: dict) -> dict:
+    api = wr_interface._get_api()
+    execute = getattr(wr_interface, "execute_graphql", None)
+    if execute is not None:
+        return execute(api, query, variables)
+    from wandb_gql import gql
+    return api.client.execute(gql(query), variable_values=variables)
+
+
+def fetch_updated_at(report_id: str) -> Optional[str]:
+    """updatedAt of a report, without fetching its spec."""
+    view = _execute_graphql(REPORT_UPDATED_AT_QUERY, {"reportId": report_id}).get("view") or {}
+    return view.get("updatedAt")
+
+
+def report_from_viewspec(viewspec: dict):
+    """Build a report object from a raw viewspec, the same way Report.from_url does."""
+    return wr.Report._from_model(wr_internal.ReportViewspec.model_validate(viewspec))
+
+
+class ReportSnapshotCache:
+    """Source report viewspecs on local disk, revalidated against the report's updatedAt.
+
+    Settings default to environment variables:
+      - REPORT_CACHE_DIR: snapshot directory (default /tmp/report_snapshots)
+      - REPORT_CACHE_TRUST_SECONDS: age below which a snapshot is used without checking updatedAt (default 0)
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        trust_seconds: Optional[float] = None,
+        fetch_viewspec: Callable[[str], dict] = wr_interface._url_to_viewspec,
+        fetch_updated_at: Callable[[str], Optional[str]] = fetch_updated_at,
+    ):
+        self.root = root or os.getenv("REPORT_CACHE_DIR", "/tmp/report_snapshots")
+        self.trust_seconds = trust_seconds if trust_seconds is not None else float(
+            os.getenv("REPORT_CACHE_TRUST_SECONDS", "0")
+        )
+        self._fetch_viewspec = fetch_viewspec
+        self._fetch_updated_at = fetch_updated_at
+        self._lock = threading.Lock()
+        self.counts = {HIT: 0, MISS: 0, STALE: 0}
+
+    def _path(self, report_id: str) -> str:
+        return os.path.join(self.root, hashlib.sha256(report_id.encode("utf-8")).hexdigest()[:32] + ".json")
+
+    def _read(self, report_id: str) -> Optional[dict]:
+        try:
+            with open(self._path(report_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, report_id: str, viewspec: dict):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(report_id)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"report_id": report_id, "stored_at": time.time(), "viewspec": viewspec}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def load_viewspec(self, url: str) -> Tuple[dict, str]:
+        """Return (viewspec, outcome), where outcome is "hit", "miss" or "stale"."""
+        report_id = wr_interface._url_to_report_id(url)
+        entry = self._read(report_id)
+        outcome = MISS
+        if entry is not None:
+            fresh = time.time() - entry.get("stored_at", 0) <= self.trust_seconds
+            if not fresh:
+                try:
+                    fresh = self._fetch_updated_at(report_id) == entry["viewspec"].get("updatedAt")
+                except Exception as e:
+                    # Without the freshness signal the snapshot cannot be trusted; fall back to a full load
+                    print(f"Could not check whether report {report_id} changed: {e}")
+            if fresh:
+                self._count(HIT)
+                return entry["viewspec"], HIT
+            outcome = STALE
+        viewspec = self._fetch_viewspec(url)
+        try:
+            self._write(report_id, viewspec)
+        except OSError as e:
+            print(f"Could not store report snapshot: {e}")
+        self._count(outcome)
+        return viewspec, outcome
+
+    def load(self, url: str):
+        """Return (report, outcome). The report is rebuilt from the viewspec on every call, so callers may modify it."""
+        viewspec, outcome = self.load_viewspec(url)
+        return report_from_viewspec(viewspec), outcome
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        counts["hit_rate"] = round(counts[HIT] / total, 3) if total else 0.0
+        return counts
+
+
+def report_cache_from_env() -> Optional[ReportSnapshotCache]:
+    """Snapshot cache under REPORT_CACHE_DIR, or None if REPORT_CACHE is turned off."""
+    if os.getenv("REPORT_CACHE", "true").lower() in ("0", "false", "no", "off"):
+        return None
+    return ReportSnapshotCache()
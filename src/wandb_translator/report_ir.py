@@ -0,0 +1,250 @@
+"""
+Compact intermediate representation (IR) of a report for translation.
+
+normalize_report() turns a loaded wr.Report into a ReportIR: the title, the
+description and one BlockIR per block. A BlockIR holds only what translation needs:
+the block kind, the text to translate (inline code replaced by __INLINECODE_i__
+placeholders), the inline code and links it contained, and an opaque payload (the
+block's JSON model) for blocks that are kept as they are or carry more than text.
+The IR serializes to compact JSON bytes, so it can be cached, checkpointed or fanned
+out to several languages without holding on to the SDK objects, and build_block()
+turns a translated BlockIR back into a wr block.
+"""
+
+import json
+import re
+from typing import Iterator, List, Optional, Tuple, Union
+
+import wandb_workspaces.reports.v2 as wr
+from wandb_workspaces.reports.v2 import internal as wr_internal
+from wandb_workspaces.reports.v2.interface import _lookup
+
+IR_VERSION = 1
+
+TEXT_BLOCK_TYPES = ["P", "H1", "H2", "H3", "BlockQuote", "CalloutBlock", "MarkdownBlock", "MarkdownPanel"]
+# Text blocks whose text is Markdown source rather than inline text
+MARKDOWN_BLOCK_TYPES = ("MarkdownBlock", "MarkdownPanel")
+
+SegmentKey = Union[int, str]
+
+
+class BlockIR:
+    """One block (or the title or description) of a report.
+
+    Attributes:
+        kind: Block type name (e.g. "P", "H2", "UnknownBlock"), or "title" / "description"
+        text: Text to translate with __INLINECODE_i__ placeholders, or None if the block is kept as is
+        code: (placeholder, code) pairs of the inline code in the text
+        links: (text, url) pairs of the links in the text; their text is translated with the rest
+        payload: JSON model of the block ({"model": class name, "data": ...}) when it cannot be
+            rebuilt from kind and text alone
+    """
+
+    __slots__ = ("kind", "text", "code", "links", "payload")
+
+    def __init__(
+        self,
+        kind: str,
+        text: Optional[str] = None,
+        code: Tuple[Tuple[str, str], ...] = (),
+        links: Tuple[Tuple[str, str], ...] = (),
+        payload: Optional[dict] = None,
+    ):
+        self.kind = kind
+        self.text = text
+        self.code = code
+        self.links = links
+        self.payload = payload
+
+    @property
+    def translatable(self) -> bool:
+        return self.text is not None
+
+    def source_text(self) -> Optional[str]:
+        """The text with inline code put back as plain text."""
+        return restore_code(self.text, self.code)
+
+    def to_list(self) -> list:
+        return [self.kind, self.text, [list(c) for c in self.code], [list(l) for l in self.links], self.payload]
+
+    @classmethod
+    def from_list(cls, values: list) -> "BlockIR":
+        kind, text, code, links, payload = values
+        return cls(kind, text, tuple(tuple(c) for c in code), tuple(tuple(l) for l in links), payload)
+
+    def __eq__(self, other):
+        return isinstance(other, BlockIR) and self.to_list() == other.to_list()
+
+    def __repr__(self):
+        return f"BlockIR({self.kind!r}, {self.text!r})"
+
+
+class ReportIR:
+    """Title, description and blocks of a source report."""
+
+    __slots__ = ("title", "description", "blocks")
+
+    def __init__(self, title: BlockIR, description: BlockIR, blocks: List[BlockIR]):
+        self.title = title
+        self.description = description
+        self.blocks = blocks
+
+    def segments(self) -> Iterator[Tuple[SegmentKey, BlockIR]]:
+        """Yield (key, BlockIR) for the title, the description and every translatable block."""
+        yield "title", self.title
+        yield "description", self.description
+        for i, block in enumerate(self.blocks):
+            if block.translatable:
+                yield i, block
+
+    def to_bytes(self) -> bytes:
+        data = [IR_VERSION, self.title.to_list(), self.description.to_list(), [b.to_list() for b in self.blocks]]
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ReportIR":
+        version, title, description, blocks = json.loads(data)
+        if version != IR_VERSION:
+            raise ValueError(f"Unsupported report IR version {version}")
+        return cls(BlockIR.from_list(title), BlockIR.from_list(description), [BlockIR.from_list(b) for b in blocks])
+
+
+def _plain(text) -> str:
+    if isinstance(text, list):
+        return "".join(_plain(t) for t in text if t is not None)
+    return "" if text is None else str(getattr(text, "text", text))
+
+
+def _unknown_block_items(children) -> list:
+    """Inline items of a default UnknownBlock's raw children dicts."""
+    if not isinstance(children, list):
+        return [str(children)]
+    items = []
+    for child in children:
+        if not isinstance(child, dict):
+            items.append(str(child))
+        elif child.get("inlineCode"):
+            items.append(wr.InlineCode(child.get("text", "")))
+        elif child.get("type") == "link":
+            text = "".join(c["text"] for c in child.get("children", []) if isinstance(c, dict) and "text" in c)
+            items.append(wr.Link(text, url=child.get("url", "")) if child.get("url") else text)
+        elif "text" in child:
+            items.append(child["text"])
+        else:
+            items.append(str(child))
+    return items
+
+
+def flatten_inline(items) -> Tuple[Optional[str], Tuple[Tuple[str, str], ...], Tuple[Tuple[str, str], ...]]:
+    """Flatten a str or a list of [str, wr.InlineCode, wr.Link, ...] to (text, code, links)."""
+    if not isinstance(items, list):
+        return items, (), ()
+    text = ""
+    code = []
+    links = []
+    for i, item in enumerate(items):
+        if item is None:
+            continue
+        if isinstance(item, wr.InlineCode):
+            placeholder = f"__INLINECODE_{i}__"
+            text += placeholder
+            code.append((placeholder, _plain(item.text)))
+        elif isinstance(item, wr.Link):
+            link_text = _plain(item.text)
+            text += link_text
+            if link_text and item.url:
+                links.append((link_text, item.url))
+        else:
+            text += str(item)
+    return text, tuple(code), tuple(links)
+
+
+def block_payload(block) -> dict:
+    model = block._to_model()
+    return {"model": type(model).__name__, "data": json.loads(model.model_dump_json(by_alias=True, exclude_none=True))}
+
+
+def block_from_payload(payload: dict):
+    return _lookup(getattr(wr_internal, payload["model"]).model_validate(payload["data"]))
+
+
+def block_to_ir(block) -> BlockIR:
+    kind = type(block).__name__
+    if kind == "UnknownBlock":
+        if getattr(block, "type", None) == "default":
+            return BlockIR(kind, *flatten_inline(_unknown_block_items(getattr(block, "children", []))))
+        # Images and other unknown blocks are kept as is
+        return BlockIR(kind, payload=block_payload(block))
+    if kind in TEXT_BLOCK_TYPES:
+        text, code, links = flatten_inline(block.text)
+        # Headings with collapsed blocks need more than their text to be rebuilt
+        payload = block_payload(block) if getattr(block, "collapsed_blocks", None) else None
+        return BlockIR(kind, text, code, links, payload)
+    # CheckedListItem, OrderedListItem, UnorderedListItemはそのまま
+    return BlockIR(kind, payload=block_payload(block))
+
+
+def normalize_report(source_report, title, description) -> ReportIR:
+    return ReportIR(
+        BlockIR("title", *flatten_inline(title)),
+        BlockIR("description", *flatten_inline(description)),
+        [block_to_ir(block) for block in source_report.blocks],
+    )
+
+
+def restore_code(text: Optional[str], code) -> Optional[str]:
+    """Put inline code back into a text as plain text."""
+    if not text or not code:
+        return text
+    mapping = dict(code)
+    return re.sub("|".join(re.escape(ph) for ph, _ in code), lambda m: mapping[m.group(0)], text)
+
+
+def inline_items(text: str, code, links, dropped: Optional[list] = None) -> list:
+    """Split a translated text into [str, wr.InlineCode, wr.Link, ...] again.
+
+    A link comes back where its text still appears verbatim in the translation (URLs,
+    product and code names); a link whose text was translated is left as plain text and
+    its (text, url) appended to `dropped`, if given.
+    """
+    mapping = dict(code)
+    items: list = []
+    parts = re.split("(" + "|".join(re.escape(ph) for ph, _ in code) + ")", text) if code else [text]
+    for part in parts:
+        if part in mapping:
+            items.append(wr.InlineCode(mapping[part]))
+        elif part:
+            items.append(part)
+    for link_text, url in links:
+        for i, item in enumerate(items):
+            if isinstance(item, str) and link_text in item:
+                before, _, after = item.partition(link_text)
+                items[i:i + 1] = [p for p in (before, wr.Link(link_text, url=url), after) if not isinstance(p, str) or p]
+                break
+        else:
+            if dropped is not None:
+                dropped.append((link_text, url))
+    return items
+
+
+def build_block(block: BlockIR, translated: Optional[str] = None, dropped: Optional[list] = None):
+    """Build the wr block of a BlockIR, with its text replaced by `translated` if given.
+
+    Links that could not be put back are appended to `dropped` (see inline_items).
+    """
+    if not block.translatable:
+        return block_from_payload(block.payload)
+    items = inline_items(block.text if translated is None else translated, block.code, block.links, dropped)
+    if not items:
+        text = ""
+    elif len(items) == 1 and isinstance(items[0], str):
+        text = items[0]
+    else:
+        text = items
+    if block.payload is not None:
+        rebuilt = block_from_payload(block.payload)
+        rebuilt.text = text
+        return rebuilt
+    if block.kind == "UnknownBlock":
+        return wr.P(text=text)
+    return getattr(wr, block.kind)(text=text)
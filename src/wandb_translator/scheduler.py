@@ -0,0 +1,101 @@
+"""
+Shared Bedrock concurrency and rate budget.
+
+BudgetedBedrockClient wraps a bedrock-runtime client so that every translator using
+it shares one limit on in-flight requests and one requests-per-minute budget, no
+matter how many reports are translated in parallel.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+from streaming import release_with_body
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate_per_second`, holding at most `capacity` tokens."""
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        self.rate = rate_per_second
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class BedrockBudget:
+    """Limits on concurrent Bedrock requests and requests per minute.
+
+    Settings default to environment variables:
+      - BEDROCK_MAX_CONCURRENCY: requests in flight at once (default 16)
+      - BEDROCK_REQUESTS_PER_MINUTE: request rate; 0 for no rate limit (default 0)
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, requests_per_minute: Optional[float] = None):
+        self.max_concurrency = max_concurrency or int(os.getenv("BEDROCK_MAX_CONCURRENCY", "16"))
+        if requests_per_minute is None:
+            requests_per_minute = float(os.getenv("BEDROCK_REQUESTS_PER_MINUTE", "0"))
+        self.requests_per_minute = requests_per_minute
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._bucket = TokenBucket(requests_per_minute / 60.0) if requests_per_minute else None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = 0
+
+    def __enter__(self):
+        if self._bucket:
+            self._bucket.acquire()
+        self._slots.acquire()
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+        return False
+
+
+class BudgetedBedrockClient:
+    """bedrock-runtime client whose model invocations go through a shared BedrockBudget.
+
+    Other attributes are passed through to the wrapped client.
+    """
+
+    def __init__(self, client, budget: BedrockBudget):
+        self._client = client
+        self.budget = budget
+
+    def invoke_model(self, **kwargs):
+        with self.budget:
+            return self._client.invoke_model(**kwargs)
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        # The budget covers the whole call: the slot is freed once the body is read or closed
+        self.budget.__enter__()
+        try:
+            response = self._client.invoke_model_with_response_stream(**kwargs)
+        except BaseException:
+            self.budget.__exit__(None, None, None)
+            raise
+        return release_with_body(response, lambda: self.budget.__exit__(None, None, None))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
@@ -0,0 +1,379 @@
+"""
+Long-running translation service.
+
+The Lambda builds a new translator for every invocation: Bedrock and W&B clients,
+caches and the translation prompt are set up again each time, and a translation must
+finish within the Lambda timeout. This service keeps one process running (e.g. as a
+sidecar of the Slack app on ECS) and serves the same action-group events over HTTP,
+with state shared across requests:
+  - one Bedrock client (or regional pool) with pooled keep-alive connections, behind
+    one BedrockBudget for all translations
+  - one wandb.Api, and with it one HTTP session, for loading and saving reports (on
+    the wandb_workspaces versions this was checked against, see wandb_api.py)
+  - one Weave client, initialized when the service starts
+  - the report snapshot cache, the translation cache, the glossary and the prompt
+  - translation progress in memory, so status queries are answered by the process
+    that runs the translation
+  - the translations in flight: a request for a translation that is already running
+    waits for it instead of translating the report a second time, and an interactive
+    request cancels a running pre-translation and resumes from its checkpoint
+The latency history used for hedging and for scheduling segments longest first is
+process-wide too, so it is no longer lost between requests.
+
+Usage:
+python service.py --port 8080
+
+Endpoints:
+  POST /invoke   Bedrock action-group event in, action response out (as lambda_handler)
+  GET  /health   {"status": "ok", ...}
+  GET  /metrics  request counts and latencies, Bedrock budget, region, hedging and cache metrics
+
+The service listens on 127.0.0.1 by default. To serve other hosts (e.g. the Lambda
+shim), set TRANSLATION_SERVICE_TOKEN: /invoke and /metrics then require the header
+"Authorization: Bearer <token>", which the Lambda shim and the Slack app send when
+the same variable is set on them. The service does not start on another address
+without a token.
+"""
+
+import argparse
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+import weave
+from dotenv import load_dotenv
+
+# Add src/wandb_translator to sys.path to allow module import
+sys.path.append(os.path.dirname(__file__))
+
+from handler import TRANSLATE_PROMPT_REF, WandBReportTranslator, _action_response, run_action
+from checkpoint import checkpoint_store_from_env
+from glossary import glossary_from_env
+from hedging import HedgedBedrockClient, LatencyTracker, hedged_client_from_env
+from progress import progress_store_from_env
+from region_pool import RegionalBedrockPool, bedrock_client_from_env
+from report_cache import report_cache_from_env
+from scheduler import BedrockBudget, BudgetedBedrockClient
+from translation_cache import MemoryTranslationCache, translation_cache_from_env
+from wandb_api import share_wandb_api
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class RequestStats:
+    """Requests, errors and latencies per action-group function."""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._latencies = LatencyTracker(window=window, min_samples=1)
+        self.in_flight = 0
+        self.counts = {}
+
+    def started(self, function: str):
+        with self._lock:
+            self.in_flight += 1
+            self.counts.setdefault(function, {"requests": 0, "errors": 0})["requests"] += 1
+
+    def finished(self, function: str, seconds: float, error: bool):
+        self._latencies.record(function, seconds)
+        with self._lock:
+            self.in_flight -= 1
+            if error:
+                self.counts[function]["errors"] += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            counts = {function: dict(c) for function, c in self.counts.items()}
+            in_flight = self.in_flight
+        for function, c in counts.items():
+            c["p50_seconds"] = self._latencies.percentile(function, 0.5)
+            c["p95_seconds"] = self._latencies.percentile(function, 0.95)
+        return {"in_flight": in_flight, "functions": counts}
+
+
+class InFlightTranslation:
+    """A running translation that identical requests wait for instead of starting their own."""
+
+    def __init__(self, speculative: bool):
+        self.speculative = speculative
+        self.done = threading.Event()
+        self.result: Optional[Tuple[str, bool]] = None
+        self._lock = threading.Lock()
+        self._translator: Optional[WandBReportTranslator] = None
+        self._cancelled = False
+
+    def attach(self, translator: WandBReportTranslator) -> WandBReportTranslator:
+        with self._lock:
+            self._translator = translator
+            if self._cancelled:
+                translator.cancelled.set()
+        return translator
+
+    def cancel(self):
+        """Stop the translation before its next segment; finished segments stay in the checkpoint."""
+        with self._lock:
+            self._cancelled = True
+            if self._translator is not None:
+                self._translator.cancelled.set()
+
+
+class TranslationService:
+    """Clients, caches and the Bedrock budget shared by all requests of the service.
+
+    Settings default to environment variables:
+      - TRANSLATION_SERVICE_PROMPT_TTL: seconds the translation prompt is reused before it is read from Weave again (default 300)
+      - TRANSLATION_SERVICE_CACHE_ENTRIES: translations and progress events kept in memory (default 10000)
+    """
+
+    def __init__(
+        self,
+        bedrock_client=None,
+        budget: Optional[BedrockBudget] = None,
+        prompt_ttl: Optional[float] = None,
+        clock=time.monotonic,
+    ):
+        """
+        Args:
+            bedrock_client: bedrock-runtime client (or regional pool). Created from BEDROCK_REGIONS or AWS_REGION if omitted
+            budget: Concurrency and rate budget of all translations. Defaults to BedrockBudget()
+            prompt_ttl: Seconds the translation prompt is reused
+        """
+        self.budget = budget or BedrockBudget()
+        self.regional_client = bedrock_client or bedrock_client_from_env(self.budget.max_concurrency)
+        # Hedges go through the budget like any other request
+        self.bedrock_client = hedged_client_from_env(BudgetedBedrockClient(self.regional_client, self.budget))
+        max_entries = int(os.getenv("TRANSLATION_SERVICE_CACHE_ENTRIES", "10000"))
+        self.report_cache = report_cache_from_env()
+        translation_cache = translation_cache_from_env()
+        # Every request of the Slack app, pre-translations included, comes to this process, so it sees all entries
+        self.translation_cache = MemoryTranslationCache(translation_cache, max_entries, shared=True) if translation_cache else None
+        progress_store = progress_store_from_env()
+        self.progress_store = MemoryTranslationCache(progress_store, max_entries) if progress_store else None
+        self.checkpoint_store = checkpoint_store_from_env()
+        self.glossary = glossary_from_env()
+        self.prompt_ttl = prompt_ttl if prompt_ttl is not None else float(os.getenv("TRANSLATION_SERVICE_PROMPT_TTL", "300"))
+        self._clock = clock
+        self._prompt_lock = threading.Lock()
+        self._prompt_template = None
+        self._prompt_loaded_at = None
+        self.started_at = clock()
+        self.stats = RequestStats()
+        self._jobs_lock = threading.Lock()
+        self._jobs: Dict[Tuple[str, str, str], InFlightTranslation] = {}
+        # Translators are created per request without initializing Weave again
+        self.target_project = f"{os.environ['WANDB_ENTITY']}/{os.environ['WANDB_PROJECT']}"
+        weave.init(self.target_project)
+
+    def _prompt(self) -> Optional[str]:
+        """The translation prompt, read from Weave again once it is older than prompt_ttl."""
+        with self._prompt_lock:
+            now = self._clock()
+            if self._prompt_template is None or now - self._prompt_loaded_at >= self.prompt_ttl:
+                try:
+                    self._prompt_template = weave.ref(TRANSLATE_PROMPT_REF).get().content
+                    self._prompt_loaded_at = now
+                except Exception as e:
+                    # Keep the last prompt; without one the translator reads it itself
+                    print(f"Could not refresh the translation prompt: {e}")
+            return self._prompt_template
+
+    def make_translator(self) -> WandBReportTranslator:
+        translator = WandBReportTranslator(
+            notify=False,
+            bedrock_client=self.bedrock_client,
+            checkpoint_store=self.checkpoint_store,
+            report_cache=self.report_cache,
+            glossary=self.glossary,
+            translation_cache=self.translation_cache,
+            init_weave=False,
+        )
+        translator._prompt_template = self._prompt()
+        return translator
+
+    def handle(self, event: dict) -> dict:
+        """Run one action-group event, as lambda_handler would."""
+        function = event.get("function") or "unknown"
+        started = time.monotonic()
+        self.stats.started(function)
+        error = True
+        try:
+            result_text, error = self._run_once(event)
+            return _action_response(event, result_text)
+        finally:
+            self.stats.finished(function, time.monotonic() - started, error)
+
+    def _job_key(self, event: dict) -> Optional[Tuple[str, str, str]]:
+        """(report URL, language, prompt version) of a translation, or None for any other action."""
+        params = {p["name"]: p["value"] for p in event.get("parameters", [])}
+        url = params.get("original_report_url")
+        dry_run = str(params.get("dry_run", "")).lower() in ("1", "true", "yes")
+        if event.get("function") != "translate_report" or dry_run or not url:
+            return None
+        return url.replace("---", "--"), params.get("language"), self.make_translator()._prompt_version()
+
+    def _run_once(self, event: dict) -> Tuple[str, bool]:
+        """run_action, sharing the result of an identical translation that is already running."""
+        key = self._job_key(event)
+        if key is None:
+            return run_action(event, self.make_translator, self.progress_store)
+        speculative = any(
+            p["name"] == "speculative" and str(p["value"]).lower() in ("1", "true", "yes")
+            for p in event.get("parameters", [])
+        )
+        while True:
+            with self._jobs_lock:
+                job = self._jobs.get(key)
+                if job is None:
+                    job = self._jobs[key] = InFlightTranslation(speculative)
+                    break
+            if speculative:
+                return "Speculative translation skipped: the same translation is already running.", False
+            if job.speculative:
+                # Interactive requests do not wait for a low-priority job: stop it and resume from its checkpoint
+                print(f"Cancelling the speculative translation of {key[0]} ({key[1]})")
+                job.cancel()
+                job.done.wait()
+                continue
+            job.done.wait()
+            return job.result
+        try:
+            job.result = run_action(event, lambda: job.attach(self.make_translator()), self.progress_store)
+            return job.result
+        except Exception as e:
+            job.result = (f"Error during translation: {e}", True)
+            raise
+        finally:
+            with self._jobs_lock:
+                del self._jobs[key]
+            job.done.set()
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "uptime_seconds": round(self._clock() - self.started_at, 1),
+            "in_flight": self.stats.in_flight,
+        }
+
+    def metrics(self) -> dict:
+        metrics = self.health()
+        metrics["requests"] = self.stats.to_dict()
+        metrics["bedrock"] = {
+            "max_concurrency": self.budget.max_concurrency,
+            "requests_per_minute": self.budget.requests_per_minute,
+            "in_flight": self.budget.in_flight,
+            "requests": self.budget.requests,
+        }
+        if isinstance(self.regional_client, RegionalBedrockPool):
+            metrics["regions"] = self.regional_client.metrics()
+        if isinstance(self.bedrock_client, HedgedBedrockClient):
+            metrics["hedging"] = self.bedrock_client.metrics()
+        if self.report_cache is not None:
+            metrics["report_cache"] = self.report_cache.metrics()
+        return metrics
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front of a TranslationService (set as the `service` attribute of the server)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, data: dict):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        """True if the server has no token or the request carries it; otherwise answers 401."""
+        token = self.server.token
+        if not token or hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {token}"):
+            return True
+        self._send_json(401, {"error": "Missing or invalid token"})
+        return False
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.server.service.health())
+        elif self.path == "/metrics":
+            if self._authorized():
+                self._send_json(200, self.server.service.metrics())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/invoke":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        if not self._authorized():
+            return
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+            event = json.loads(self.rfile.read(length))
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid action-group event: {e}"})
+            return
+        if not isinstance(event, dict):
+            self._send_json(400, {"error": "Invalid action-group event: expected a JSON object"})
+            return
+        try:
+            response = self.server.service.handle(event)
+        except Exception as e:
+            print(f"Error handling {event.get('function')}: {e}")
+            self._send_json(500, {"error": str(e)})
+            return
+        try:
+            self._send_json(200, response)
+        except (BrokenPipeError, ConnectionResetError):
+            # The caller (e.g. a Lambda shim) gave up; the translation is finished and cached anyway
+            print(f"Caller disconnected before the response of {event.get('function')}")
+
+    def log_message(self, format, *args):
+        # Health checks would flood the log
+        if not self.path.startswith("/health"):
+            print(f"{self.address_string()} {format % args}")
+
+
+def make_server(service: TranslationService, host: str, port: int, token: Optional[str] = None) -> ThreadingHTTPServer:
+    """HTTP server for service; with a token, /invoke and /metrics require it as a bearer token."""
+    server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.token = token
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve report translations over HTTP as a long-running process.")
+    parser.add_argument("--host", default=None, help="Address to listen on (default: TRANSLATION_SERVICE_HOST or 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=None, help="Port to listen on (default: TRANSLATION_SERVICE_PORT or 8080)")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    host = args.host or os.getenv("TRANSLATION_SERVICE_HOST", "127.0.0.1")
+    port = args.port or int(os.getenv("TRANSLATION_SERVICE_PORT", "8080"))
+    token = os.getenv("TRANSLATION_SERVICE_TOKEN")
+    if host not in LOOPBACK_HOSTS and not token:
+        # Anyone who can reach the port could translate and save reports with the service's credentials
+        print(f"Refusing to listen on {host} without TRANSLATION_SERVICE_TOKEN")
+        return 2
+    share_wandb_api()
+    server = make_server(TranslationService(), host, port, token)
+    print(f"Translation service listening on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
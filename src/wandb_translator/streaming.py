@@ -0,0 +1,170 @@
+"""
+Streaming Bedrock calls for the translator.
+
+stream_message() reads an Anthropic Messages response from
+invoke_model_with_response_stream and builds the text as it arrives. A call that
+sends no first token within first_token_timeout, or stalls between tokens for longer
+than stall_timeout, is abandoned with StreamStalled instead of holding the worker
+until the client's read timeout. An output that hits max_tokens (or runs far longer
+than the input could justify) raises OutputTruncated as soon as it is known, so the
+caller can split the segment and translate the halves.
+"""
+
+import json
+import queue
+import threading
+from typing import Optional, Tuple
+
+_END = object()
+
+
+class OutputTruncated(Exception):
+    """The model stopped at max_tokens (or was cut off) before finishing the translation."""
+
+    # The same segment is cut off again at the same size
+    retryable = False
+
+    def __init__(self, message: str, partial_text: str = ""):
+        super().__init__(message)
+        self.partial_text = partial_text
+
+
+class StreamStalled(TimeoutError):
+    """No token arrived within the first-token or stall timeout."""
+
+
+class ReleasingStream:
+    """Event stream of a streamed response that calls `release` once it is exhausted, fails or is closed.
+
+    Most of a streamed call is spent reading the body, so concurrency limits (BedrockBudget,
+    the outstanding requests of a RegionalBedrockPool) keep the request counted until then.
+    """
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+        self._released = False
+        self._lock = threading.Lock()
+
+    def _done(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._release()
+
+    def __iter__(self):
+        try:
+            for event in self._stream:
+                yield event
+        finally:
+            self._done()
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._done()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def release_with_body(response: dict, release) -> dict:
+    """Return the response with its body wrapped in a ReleasingStream (or call release now if it has none)."""
+    if response.get("body") is None:
+        release()
+        return response
+    return dict(response, body=ReleasingStream(response["body"], release))
+
+
+def _close(stream):
+    try:
+        stream.close()
+    except Exception:
+        pass
+
+
+def stream_message(
+    client,
+    model_id: str,
+    body: str,
+    first_token_timeout: Optional[float] = None,
+    stall_timeout: Optional[float] = None,
+    max_output_chars: Optional[int] = None,
+) -> Tuple[str, dict, Optional[str]]:
+    """Invoke a model with a streamed response.
+
+    Args:
+        client: bedrock-runtime client
+        model_id: Bedrock model id
+        body: JSON payload (Anthropic Messages format)
+        first_token_timeout: Seconds to wait for the first text token (None: no limit)
+        stall_timeout: Seconds to wait between events once text is flowing (None: no limit)
+        max_output_chars: Abandon the call as truncated once the text grows past this length
+
+    Returns:
+        Tuple of (text, usage, stop_reason).
+    """
+    response = client.invoke_model_with_response_stream(
+        modelId=model_id, contentType="application/json", accept="application/json", body=body
+    )
+    stream = response["body"]
+    events: "queue.Queue" = queue.Queue()
+
+    def pump():
+        # The event stream blocks on the socket, so it is read on its own thread
+        try:
+            for event in stream:
+                events.put(event)
+        except Exception as e:
+            events.put(e)
+        finally:
+            events.put(_END)
+
+    threading.Thread(target=pump, daemon=True, name="bedrock-stream").start()
+
+    parts = []
+    length = 0
+    usage: dict = {}
+    stop_reason = None
+    while True:
+        timeout = stall_timeout if parts else first_token_timeout
+        try:
+            event = events.get(timeout=timeout)
+        except queue.Empty:
+            _close(stream)
+            stage = "between tokens" if parts else "before the first token"
+            raise StreamStalled(f"No data from {model_id} for {timeout:.0f}s {stage}")
+        if event is _END:
+            break
+        if isinstance(event, Exception):
+            raise event
+        chunk = event.get("chunk")
+        if chunk is None:
+            # Errors arrive as events such as {"throttlingException": {"message": ...}}
+            name, detail = next(iter(event.items()))
+            _close(stream)
+            raise RuntimeError(f"{name}: {detail.get('message', detail) if isinstance(detail, dict) else detail}")
+        data = json.loads(chunk["bytes"])
+        kind = data.get("type")
+        if kind == "message_start":
+            usage.update(data.get("message", {}).get("usage") or {})
+        elif kind == "content_block_delta" and data.get("delta", {}).get("type") == "text_delta":
+            text = data["delta"].get("text", "")
+            parts.append(text)
+            length += len(text)
+            if max_output_chars and length > max_output_chars:
+                _close(stream)
+                raise OutputTruncated(f"Output of {model_id} ran past {max_output_chars} characters", "".join(parts))
+        elif kind == "message_delta":
+            stop_reason = data.get("delta", {}).get("stop_reason")
+            usage.update(data.get("usage") or {})
+            if stop_reason == "max_tokens":
+                _close(stream)
+                raise OutputTruncated(f"Output of {model_id} stopped at max_tokens", "".join(parts))
+        elif kind == "message_stop":
+            break
+    # Frees the budget and region slot of the call right away
+    _close(stream)
+    return "".join(parts), usage, stop_reason
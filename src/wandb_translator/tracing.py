@@ -0,0 +1,104 @@
+"""
+Weave tracing policy for translation jobs.
+
+Every block of a report goes through several weave ops, and each traced call
+serializes and uploads its inputs and outputs. The policy decides how much of that
+happens:
+
+  - "full": every op of every segment is traced (the default)
+  - "sampled": a share of the segments is traced end to end
+  - "report": only the report-level call is traced
+
+Traced payloads are truncated to a maximum number of characters per string, and the
+translator instance is logged by name instead of being serialized.
+"""
+
+import contextlib
+import os
+import random
+from typing import Any, Iterator, Optional
+
+from weave.trace.context.call_context import tracing_disabled
+
+FULL = "full"
+SAMPLED = "sampled"
+REPORT = "report"
+LEVELS = (FULL, SAMPLED, REPORT)
+
+
+class TracingPolicy:
+    """How much of a translation job is traced.
+
+    Settings default to environment variables:
+      - WEAVE_TRACE_LEVEL: "full", "sampled" or "report" (default "full")
+      - WEAVE_TRACE_SAMPLE_RATE: share of segments traced at the "sampled" level (default 0.1)
+      - WEAVE_TRACE_MAX_CHARS: longest string logged in a traced input or output; 0 for no limit (default 2000)
+    """
+
+    def __init__(
+        self,
+        level: Optional[str] = None,
+        sample_rate: Optional[float] = None,
+        max_chars: Optional[int] = None,
+        random_source=random.random,
+    ):
+        self.level = (level or os.getenv("WEAVE_TRACE_LEVEL", FULL)).lower()
+        if self.level not in LEVELS:
+            raise ValueError(f"Invalid tracing level: {self.level}")
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv("WEAVE_TRACE_SAMPLE_RATE", "0.1"))
+        self.max_chars = max_chars if max_chars is not None else int(os.getenv("WEAVE_TRACE_MAX_CHARS", "2000"))
+        self._random = random_source
+
+    def trace_segment(self) -> bool:
+        if self.level == FULL:
+            return True
+        if self.level == SAMPLED:
+            return self._random() < self.sample_rate
+        return False
+
+    def truncate(self, value: Any) -> Any:
+        if isinstance(value, str):
+            if self.max_chars and len(value) > self.max_chars:
+                return value[:self.max_chars] + f"... [truncated, {len(value)} chars]"
+            return value
+        if isinstance(value, dict):
+            return {k: self.truncate(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.truncate(v) for v in value]
+        return value
+
+
+_policy = TracingPolicy()
+
+
+def configure(policy: TracingPolicy):
+    """Replace the process-wide policy (e.g. in benchmarks and tests)."""
+    global _policy
+    _policy = policy
+
+
+def current_policy() -> TracingPolicy:
+    return _policy
+
+
+@contextlib.contextmanager
+def segment_span() -> Iterator[bool]:
+    """Trace the ops of one segment, or run them untraced, according to the policy. Yields whether it is traced."""
+    if _policy.trace_segment():
+        yield True
+        return
+    with tracing_disabled():
+        yield False
+
+
+def trace_inputs(inputs: dict) -> dict:
+    """postprocess_inputs for weave ops: log the translator by name and truncate long strings."""
+    logged = {k: v for k, v in inputs.items() if k != "self"}
+    if "self" in inputs:
+        logged["self"] = type(inputs["self"]).__name__
+    return _policy.truncate(logged)
+
+
+def trace_output(output: Any) -> Any:
+    """postprocess_output for weave ops: truncate long strings."""
+    return _policy.truncate(output)
@@ -0,0 +1,162 @@
+"""
+Cache of finished translations.
+
+Every saved translation is recorded under its source report, target language and
+prompt version, together with the source report's updatedAt at the time it was
+translated. A later request for the same translation returns the saved report right
+away as long as the source report has not changed since. Speculative translations of
+reports posted in watched Slack channels fill the cache before anyone asks.
+
+Lambda containers do not share /tmp, so deployments should use the S3 store.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TranslationCache:
+    """Interface of a translation cache. Entries are dicts with url, title, source_updated_at and stored_at.
+
+    `shared` tells whether every later request sees the entries, e.g. those handled by other
+    Lambda containers. Speculative translations only pay off in a shared cache.
+    """
+
+    shared = False
+
+    def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def put(self, key: str, entry: dict):
+        raise NotImplementedError
+
+
+class LocalTranslationCache(TranslationCache):
+    """One JSON file per translation in a local directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, entry: dict):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+class S3TranslationCache(TranslationCache):
+    """One JSON object per translation under an S3 prefix, shared by all Lambda containers."""
+
+    shared = True
+
+    def __init__(self, bucket: str, prefix: str = "translations/", client=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        if client is None:
+            import boto3
+            client = boto3.client("s3")
+        self.client = client
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=f"{self.prefix}{key}.json")
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return json.loads(response["Body"].read().decode("utf-8"))
+
+    def put(self, key: str, entry: dict):
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=f"{self.prefix}{key}.json",
+            Body=json.dumps(entry, ensure_ascii=False).encode("utf-8"),
+            ContentType="application/json",
+        )
+
+
+class MemoryTranslationCache(TranslationCache):
+    """Recent entries in process memory, optionally in front of a persistent store.
+
+    Reads are answered from memory and fall back to the backend; writes go to both.
+    At most `max_entries` entries are kept, least recently used first out. Used by the
+    long-running translation service, where requests share one process.
+    """
+
+    def __init__(self, backend: Optional[TranslationCache] = None, max_entries: int = 10000, shared: Optional[bool] = None):
+        """
+        Args:
+            backend: Persistent store behind the memory, if any
+            max_entries: Entries kept in memory
+            shared: Whether all later requests see this cache. Defaults to whether the backend is shared
+        """
+        self.backend = backend
+        self.shared = shared if shared is not None else bool(backend is not None and backend.shared)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.backend is None:
+            return None
+        entry = self.backend.get(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, entry: dict):
+        self._remember(key, entry)
+        if self.backend is not None:
+            self.backend.put(key, entry)
+
+
+def report_updated_at(report) -> Optional[str]:
+    """updatedAt of a loaded source report, or None if it is not known (e.g. a report built locally)."""
+    updated_at = getattr(report, "_updated_at", None)
+    if updated_at is None:
+        return None
+    return updated_at.isoformat() if hasattr(updated_at, "isoformat") else str(updated_at)
+
+
+def cache_entry(url: str, title: str, updated_at: Optional[str]) -> dict:
+    return {"url": url, "title": title, "source_updated_at": updated_at, "stored_at": time.time()}
+
+
+def translation_cache_from_env() -> Optional[TranslationCache]:
+    """Translation cache from environment variables, or None if TRANSLATION_CACHE is turned off.
+
+      - TRANSLATION_CACHE_BUCKET: S3 bucket of the cache; a local directory is used if unset
+      - TRANSLATION_CACHE_PREFIX: key prefix in the bucket (default "translations/")
+      - TRANSLATION_CACHE_DIR: local directory (default /tmp/translations)
+    """
+    if os.getenv("TRANSLATION_CACHE", "true").lower() in ("0", "false", "no", "off"):
+        return None
+    bucket = os.getenv("TRANSLATION_CACHE_BUCKET")
+    if bucket:
+        return S3TranslationCache(bucket, os.getenv("TRANSLATION_CACHE_PREFIX", "translations/"))
+    return LocalTranslationCache(os.getenv("TRANSLATION_CACHE_DIR", "/tmp/translations"))
@@ -0,0 +1,56 @@
+"""
+One shared wandb.Api for the reports SDK.
+
+wandb_workspaces creates a new wandb.Api, and with it a new HTTP session, each time a
+report is loaded or saved. A long-running process can make the SDK reuse one instead,
+but the only hook is the private `interface._get_api`, so the patch is applied only to
+the wandb_workspaces versions it was checked against. With any other version the SDK
+is left as it is: every call still works, it just opens its own session.
+"""
+
+import threading
+from importlib import metadata
+from typing import Optional
+
+from wandb_workspaces.reports.v2 import interface as wr_interface
+
+# wandb_workspaces releases whose interface._get_api() is known to take no arguments
+# and return a wandb.Api; extend after checking a new release
+TESTED_VERSIONS = ("0.4.",)
+
+
+def _installed_version() -> str:
+    try:
+        return metadata.version("wandb-workspaces")
+    except metadata.PackageNotFoundError:
+        return ""
+
+
+def share_wandb_api(version: Optional[str] = None) -> bool:
+    """Make the reports SDK reuse one wandb.Api (and its HTTP session) instead of creating one per call.
+
+    Args:
+        version: wandb_workspaces version to check against TESTED_VERSIONS (default: the installed one)
+
+    Returns:
+        True if the SDK now shares one wandb.Api, False if it was left unpatched
+    """
+    version = version if version is not None else _installed_version()
+    get_api = getattr(wr_interface, "_get_api", None)
+    if getattr(get_api, "shared", False):
+        return True
+    if get_api is None or not version.startswith(TESTED_VERSIONS):
+        print(f"Not sharing wandb.Api: wandb_workspaces {version or 'unknown'} is not a tested version")
+        return False
+    lock = threading.Lock()
+    api = []
+
+    def shared_api():
+        with lock:
+            if not api:
+                api.append(get_api())
+            return api[0]
+
+    shared_api.shared = True
+    wr_interface._get_api = shared_api
+    return True
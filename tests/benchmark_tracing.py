@@ -0,0 +1,134 @@
+"""
+Benchmark of the Weave tracing overhead per translated block.
+
+A synthetic report is translated with a stub Bedrock client under each tracing level
+("full", "sampled", "report") and with tracing switched off entirely. Nothing is sent
+to Bedrock and no report is saved; the time left is the translator's own work plus
+tracing (serialization and upload, including the final flush).
+
+Usage:
+python -m tests.benchmark_tracing --blocks 200 --sample-rate 0.1 --max-chars 2000
+python -m tests.benchmark_tracing --local   # trace to a local SQLite database instead of WANDB_PROJECT
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import weave
+import wandb_workspaces.reports.v2 as wr
+from dotenv import load_dotenv
+from weave.trace.context import weave_client_context
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import tracing
+from handler import WandBReportTranslator
+from tracing import LEVELS, TracingPolicy
+
+URL = "https://wandb.ai/benchmark/benchmark/reports/Benchmark--VmlldzoxMjM0NTY3"
+PARAGRAPH = "We fine-tune the model on 10k labelled examples and compare it with the zero-shot baseline. " * 4
+
+
+class StubBedrockClient:
+    """Answers every request at once with a canned translation."""
+
+    def invoke_model(self, modelId, contentType, accept, body):
+        text = json.loads(body)["messages"][0]["content"]
+        response = {"content": [{"type": "text", "text": "翻訳: " + text}], "usage": {"output_tokens": len(text) // 4}}
+        return {"body": io.BytesIO(json.dumps(response).encode("utf-8"))}
+
+
+class SyntheticReports:
+    """Stands in for the report cache: every load returns a fresh report with `blocks` paragraphs and headings."""
+
+    def __init__(self, blocks: int):
+        self.blocks = blocks
+
+    def load(self, url):
+        blocks = [wr.H2(f"Section {i}") if i % 5 == 0 else wr.P(PARAGRAPH) for i in range(self.blocks)]
+        return wr.Report(project="benchmark", entity="benchmark", title="Benchmark", description="Synthetic", blocks=blocks), "miss"
+
+
+def init_tracing(local: bool):
+    if not local:
+        weave.init(f"{os.environ['WANDB_ENTITY']}/{os.environ['WANDB_PROJECT']}")
+        return
+    # Needs the optional dependencies of Weave's local trace server
+    from weave.trace.weave_client import WeaveClient
+    from weave.trace_server.sqlite_trace_server import SqliteTraceServer
+
+    server = SqliteTraceServer(os.path.join(tempfile.mkdtemp(), "weave.db"))
+    server.setup_tables()
+    weave_client_context.set_weave_client_global(WeaveClient("benchmark", "benchmark", server, ensure_project_exists=False))
+
+
+def run_once(translator: WandBReportTranslator) -> tuple:
+    started_wall, started_cpu = time.perf_counter(), time.process_time()
+    url, title = translator._wandb_report_transformation(URL, "jp")
+    if title is None:
+        raise RuntimeError(url)
+    client = weave_client_context.get_weave_client()
+    if client is not None:
+        client.flush()
+    return time.perf_counter() - started_wall, time.process_time() - started_cpu
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure Weave tracing overhead per block under each tracing level.")
+    parser.add_argument("--blocks", type=int, default=200, help="Blocks in the synthetic report (default: 200)")
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="Sample rate of the 'sampled' level (default: 0.1)")
+    parser.add_argument("--max-chars", type=int, default=2000, help="Payload truncation (default: 2000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per level; the fastest is reported (default: 3)")
+    parser.add_argument("--local", action="store_true", help="Trace to a local SQLite database")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    os.environ.setdefault("WANDB_ENTITY", "benchmark")
+    os.environ.setdefault("WANDB_PROJECT", "benchmark")
+    init_tracing(args.local)
+    # No report is saved
+    wr.Report.save = lambda self, *a, **kw: self
+    wr.Report.url = property(lambda self: "https://wandb.ai/benchmark/reports/translated")
+
+    # Keep the client set up above when the translator initializes Weave
+    weave.init = lambda *a, **kw: weave_client_context.get_weave_client()
+    translator = WandBReportTranslator(bedrock_client=StubBedrockClient(), report_cache=SyntheticReports(args.blocks))
+    translator.checkpoint_store = None
+    translator._prompt_template = "Translate the following text to {prompt_language}."
+
+    results = {}
+    for level in ("off",) + LEVELS:
+        # With tracing switched off ("off") the policy level does not matter
+        policy_level = tracing.FULL if level == "off" else level
+        tracing.configure(TracingPolicy(level=policy_level, sample_rate=args.sample_rate, max_chars=args.max_chars))
+        best = None
+        for _ in range(args.repeat):
+            if level == "off":
+                # Without a client nothing is traced, on any thread
+                client = weave_client_context.get_weave_client()
+                weave_client_context.set_weave_client_global(None)
+                try:
+                    timing = run_once(translator)
+                finally:
+                    weave_client_context.set_weave_client_global(client)
+            else:
+                timing = run_once(translator)
+            best = timing if best is None or timing[0] < best[0] else best
+        results[level] = best
+
+    base_wall, _ = results["off"]
+    print(f"{'level':<8} {'wall s':>8} {'cpu s':>8} {'ms/block':>9} {'overhead ms/block':>18}")
+    for level, (wall, cpu) in results.items():
+        per_block = 1000 * wall / args.blocks
+        overhead = 1000 * (wall - base_wall) / args.blocks
+        print(f"{level:<8} {wall:>8.2f} {cpu:>8.2f} {per_block:>9.2f} {overhead:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
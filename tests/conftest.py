@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+import wandb_workspaces.reports.v2 as wr
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import handler
+
+from tests.stubs import StubPromptRef
+
+
+@pytest.fixture
+def offline_weave(monkeypatch, tmp_path):
+    monkeypatch.setenv("WANDB_ENTITY", "test-entity")
+    # Checkpoints left by one test must not be resumed by another
+    monkeypatch.setenv("TRANSLATION_CHECKPOINT_DIR", str(tmp_path / "translation_checkpoints"))
+    monkeypatch.setenv("WANDB_PROJECT", "test-project")
+    monkeypatch.setenv("REPORT_CACHE", "false")
+    monkeypatch.setenv("TRANSLATION_CACHE", "false")
+    monkeypatch.setattr(handler.weave, "init", lambda *args, **kwargs: None)
+    monkeypatch.setattr(handler.weave, "ref", lambda *args, **kwargs: StubPromptRef())
+
+
+@pytest.fixture
+def offline_reports(monkeypatch):
+    """Serve a fixed source report and make save() a no-op."""
+    def source_report(url):
+        return wr.Report(
+            project="source-project",
+            entity="source-entity",
+            title="Sentiment classification",
+            description="A short study",
+            blocks=[
+                wr.H1("Introduction"),
+                wr.P("We classify Reddit posts by sentiment."),
+                wr.P("This paragraph FAILS on the first attempt."),
+                wr.MarkdownBlock("## Results\nThe model reaches 91% accuracy."),
+            ],
+        )
+
+    monkeypatch.setattr(handler.wr.Report, "from_url", staticmethod(source_report))
+    monkeypatch.setattr(handler.wr.Report, "save", lambda self, *args, **kwargs: self)
+    monkeypatch.setattr(handler.wr.Report, "url", property(lambda self: "https://wandb.ai/test/reports/translated"))
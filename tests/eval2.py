@@ -16,6 +16,7 @@ from weave.flow.eval_imperative import EvaluationLogger
 from wandb_translator.handler import WandBReportTranslator
 # Import app after adding to path
 from app import invoke_bedrock_agent
+from slack_agent.action_schema import function_index, load_snapshot
 
 # Load environment variables from .env file
 env_path = Path(__file__).parent.parent / '.env'
@@ -24,6 +25,8 @@ load_dotenv(env_path, override=True)
 
 # Example input data (replace with your actual dataset if needed)
 evaluation_dataset_path = "weave:///wandb-japan/fc-agent-dev/object/fc-agent-tool-use-evaluation:1HMiNW1wV2G0QUwYYqMRuRmnuLepw2CYnYl5j2a4664"
+# Functions the agent can call, from the saved action-group schema (python src/print_action_groups.py --save)
+VALID_FUNCTIONS = sorted(function_index(load_snapshot())) or ["translate_report", "show_prompt", "update_prompt"]
 current_prompt = weave.ref("weave:///wandb-japan/fc-agent/object/translate_prompt:latest").get().content
 
 def get_eval_samples():
@@ -233,15 +236,14 @@ def extract_function_name(eval_info: list) -> str:
             "temperature": 0,
             "messages": [{
                 "role": "user", 
-                "content": f"Extract the function name from this text. Return ONLY one of these exact values: translate_report, show_prompt, or update_prompt. No other text or explanation. If you cannot find the function name, return None:\n\n{eval_info_text}"
+                "content": f"Extract the function name from this text. Return ONLY one of these exact values: {', '.join(VALID_FUNCTIONS)}. No other text or explanation. If you cannot find the function name, return None:\n\n{eval_info_text}"
             }]
         })
     )
     response_body = json.loads(response["body"].read())
     function_name = response_body["content"][0]["text"].strip()
     
-    valid_functions = ["translate_report", "show_prompt", "update_prompt"]
-    if function_name in valid_functions:
+    if function_name in VALID_FUNCTIONS:
         return function_name
         
     print(f"Warning: Invalid function name extracted: {function_name}")
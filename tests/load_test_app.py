@@ -0,0 +1,249 @@
+"""
+Load test of the Slack app's event handlers (app.py).
+
+Synthetic app_mention and reaction_added events are fed into the handlers at a
+stepped rate, with Slack, the Bedrock agent and Weave replaced by stubs of fixed
+latency. The stub agent blocks the calling thread for its latency, as the boto3
+client does, and so does the stub weave.init used by the reaction handler. Nothing
+is sent to Slack, Bedrock or W&B.
+
+For each rate the harness reports the time to the first reply ("ack"), the time to
+the agent's answer in the thread ("reply"), reaction handling time, rejected
+requests and event-loop lag. A rate is sustained when nothing is rejected, every
+reply arrives, and the p95 reply time stays under --slo seconds; the highest
+sustained rate is reported at the end.
+
+Usage:
+python -m tests.load_test_app --rates 1,2,5,10 --duration 15 --agent-latency 2.0 --slack-latency 0.05
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+BOT_USER = "UBOT"
+AGENT_REPLY = "Here is what I can do."
+
+# app.py reads its settings at import time; the stubs make the credentials unused
+for name, value in {
+    "SLACK_BOT_TOKEN": "xoxb-load-test",
+    "SLACK_APP_TOKEN": "xapp-load-test",
+    "AGENT_ID": "load-test-agent",
+    "AGENT_ALIAS_ID": "load-test-alias",
+    "AWS_REGION": "us-east-1",
+    "WANDB_ENTITY": "load-test",
+    "WANDB_PROJECT": "load-test",
+}.items():
+    os.environ.setdefault(name, value)
+# Every mention goes to the (stub) agent
+os.environ["AGENT_FAST_PATH"] = "false"
+
+import app as slack_app  # noqa: E402
+from slack_agent.loop_monitor import EventLoopLagMonitor  # noqa: E402
+from slack_agent.stats import percentile  # noqa: E402
+
+
+class StubSlackClient:
+    """The Slack Web API calls made by the handlers, each taking `latency` seconds."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def auth_test(self):
+        await asyncio.sleep(self.latency)
+        return {"user_id": BOT_USER}
+
+    async def reactions_add(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return {"ok": True}
+
+    async def conversations_replies(self, channel, ts, **kwargs):
+        await asyncio.sleep(self.latency)
+        return {"messages": [{"ts": ts, "thread_ts": ts}]}
+
+    async def chat_postMessage(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return {"ts": f"{time.time():.6f}"}
+
+    async def chat_update(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return {"ok": True}
+
+
+class StubAgentClient:
+    """bedrock-agent-runtime stand-in. Like boto3, invoke_agent blocks the calling thread."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke_agent(self, **kwargs):
+        time.sleep(self.latency)
+        return {"completion": [{"chunk": {"bytes": AGENT_REPLY.encode("utf-8")}}]}
+
+
+class StubFeedback(dict):
+    def add_reaction(self, reaction):
+        pass
+
+
+class StubCall:
+    def __init__(self):
+        self.feedback = StubFeedback()
+
+
+class StubWeaveClient:
+    """Returned by the stubbed weave.init; the reaction handler scans `calls` calls."""
+
+    def __init__(self, calls: int):
+        self.calls = [StubCall() for _ in range(calls)]
+
+    def get_calls(self):
+        return self.calls
+
+
+def install_stubs(args):
+    slack_app.app._async_client = StubSlackClient(args.slack_latency)
+    slack_app.br_client = StubAgentClient(args.agent_latency)
+    weave_client = StubWeaveClient(args.weave_calls)
+
+    def weave_init(*a, **kw):
+        time.sleep(args.weave_latency)
+        return weave_client
+
+    slack_app.weave.init = weave_init
+
+
+class StepResult:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.mentions = 0
+        self.rejected = 0
+        self.ack: List[float] = []
+        self.reply: List[float] = []
+        self.reaction: List[float] = []
+        self.loop: Dict[str, float] = {}
+
+    def sustained(self, slo: float) -> bool:
+        return self.rejected == 0 and len(self.reply) + self.rejected == self.mentions and percentile(self.reply, 0.95) <= slo
+
+    def to_dict(self) -> dict:
+        return {
+            "rate": self.rate,
+            "mentions": self.mentions,
+            "reactions": len(self.reaction),
+            "rejected": self.rejected,
+            "ack_p50": round(percentile(self.ack, 0.5), 3),
+            "ack_p95": round(percentile(self.ack, 0.95), 3),
+            "reply_p50": round(percentile(self.reply, 0.5), 3),
+            "reply_p95": round(percentile(self.reply, 0.95), 3),
+            "reply_p99": round(percentile(self.reply, 0.99), 3),
+            "reaction_p95": round(percentile(self.reaction, 0.95), 3),
+            **self.loop,
+        }
+
+
+async def run_step(rate: float, args, monitor) -> StepResult:
+    result = StepResult(rate)
+    pending = []
+    monitor.reset()
+    started = time.monotonic()
+
+    async def mention(n: int):
+        sent_at = time.monotonic()
+        replied = asyncio.Event()
+
+        async def say(text, channel, thread_ts):
+            await asyncio.sleep(args.slack_latency)
+            if text == AGENT_REPLY:
+                result.reply.append(time.monotonic() - sent_at)
+                replied.set()
+            elif text.startswith(("Sorry", "You already")):
+                result.rejected += 1
+                replied.set()
+            return {"ts": f"{time.time():.6f}"}
+
+        event = {
+            "user": f"U{n % args.users}",
+            "text": f"<@{BOT_USER}> what can you do?",
+            "channel": f"C{n % args.channels}",
+            "ts": f"{time.time():.6f}",
+        }
+        await slack_app.handle_app_mention(event=event, say=say)
+        result.ack.append(time.monotonic() - sent_at)
+        try:
+            await asyncio.wait_for(replied.wait(), timeout=args.drain)
+        except asyncio.TimeoutError:
+            pass
+
+    async def reaction(n: int):
+        sent_at = time.monotonic()
+        event = {"user": f"U{n % args.users}", "reaction": "thumbsup", "item": {"type": "message", "channel": "C0", "ts": "1.0"}}
+        await slack_app.handle_reaction(event=event)
+        result.reaction.append(time.monotonic() - sent_at)
+
+    total = int(rate * args.duration)
+    for n in range(total):
+        # Open loop: events arrive on schedule whether or not earlier ones are done
+        await asyncio.sleep(max(0.0, started + n / rate - time.monotonic()))
+        # Spread the reactions evenly over the mentions
+        if int((n + 1) * args.reaction_share) > int(n * args.reaction_share):
+            pending.append(asyncio.create_task(reaction(n)))
+        else:
+            result.mentions += 1
+            pending.append(asyncio.create_task(mention(n)))
+    await asyncio.gather(*pending)
+    result.loop = monitor.metrics()
+    return result
+
+
+async def main_async(args):
+    install_stubs(args)
+    slack_app.job_queue.start()
+    log = (lambda message: print(message, file=sys.stderr)) if args.verbose else (lambda message: None)
+    monitor = EventLoopLagMonitor(threshold=args.lag_threshold / 1000, log=log)
+    monitor.start()
+    results = []
+    for rate in args.rates:
+        # The handlers print every event; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            step = await run_step(rate, args, monitor)
+        results.append(step)
+        print(json.dumps(step.to_dict()))
+        if not step.sustained(args.slo) and not args.all_rates:
+            break
+    await monitor.stop()
+    await slack_app.job_queue.stop()
+    sustained = [r.rate for r in results if r.sustained(args.slo)]
+    print(f"Peak sustained rate: {max(sustained) if sustained else 0} events/s "
+          f"(p95 reply under {args.slo}s, nothing rejected)")
+    print("Job queue metrics:", slack_app.job_queue.metrics())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Slack app's event handlers with stubbed Slack and agent.")
+    parser.add_argument("--rates", type=lambda s: [float(r) for r in s.split(",")], default=[1, 2, 5, 10],
+                        help="Comma separated event rates (events/s) to step through (default: 1,2,5,10)")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per rate (default: 15)")
+    parser.add_argument("--reaction-share", type=float, default=0.3, help="Share of events that are reactions (default: 0.3)")
+    parser.add_argument("--users", type=int, default=100, help="Distinct users sending events (default: 100)")
+    parser.add_argument("--channels", type=int, default=10, help="Distinct channels (default: 10)")
+    parser.add_argument("--agent-latency", type=float, default=2.0, help="Seconds per agent call (default: 2.0)")
+    parser.add_argument("--slack-latency", type=float, default=0.05, help="Seconds per Slack API call (default: 0.05)")
+    parser.add_argument("--weave-latency", type=float, default=0.2, help="Seconds per weave.init in the reaction handler (default: 0.2)")
+    parser.add_argument("--weave-calls", type=int, default=200, help="Calls scanned by the reaction handler (default: 200)")
+    parser.add_argument("--slo", type=float, default=10.0, help="p95 reply time in seconds a sustained rate must meet (default: 10)")
+    parser.add_argument("--drain", type=float, default=120.0, help="Seconds to wait for a reply before counting it lost (default: 120)")
+    parser.add_argument("--lag-threshold", type=float, default=250, help="Event-loop lag in ms counted as blocked (default: 250)")
+    parser.add_argument("--all-rates", action="store_true", help="Keep stepping after the first rate that is not sustained")
+    parser.add_argument("--verbose", action="store_true", help="Log every blocked-loop sample to stderr")
+    asyncio.run(main_async(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
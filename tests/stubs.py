@@ -0,0 +1,37 @@
+import io
+import json
+
+PROMPT_TEMPLATE = "Translate the following text to {prompt_language}."
+
+
+class StubBedrockClient:
+    """Records invoke_model payloads and answers with a canned translation."""
+
+    def __init__(self, usage=None, fail_on=None, failures=None):
+        self.requests = []
+        self.usage = usage or {}
+        self.fail_on = fail_on
+        # Number of times a matching request fails before it succeeds (None: always)
+        self.failures = failures
+
+    def invoke_model(self, modelId, contentType, accept, body):
+        payload = json.loads(body)
+        self.requests.append({"modelId": modelId, "payload": payload})
+        if self.fail_on and self.fail_on in payload["messages"][0]["content"]:
+            if self.failures is None or self.failures > 0:
+                self.failures = None if self.failures is None else self.failures - 1
+                raise RuntimeError("ThrottlingException")
+        response = {
+            "content": [{"type": "text", "text": "翻訳: " + payload["messages"][0]["content"]}],
+            "usage": self.usage,
+        }
+        return {"body": io.BytesIO(json.dumps(response).encode("utf-8"))}
+
+
+class StubPromptRef:
+    def get(self):
+        return type("Prompt", (), {"content": PROMPT_TEMPLATE})()
+
+
+def sent_texts(client):
+    return [r["payload"]["messages"][0]["content"] for r in client.requests]
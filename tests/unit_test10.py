@@ -0,0 +1,113 @@
+import os
+import sys
+
+import pytest
+from botocore.exceptions import ClientError
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+from region_pool import RegionalBedrockPool, bedrock_client_from_env, parse_regions
+
+
+def client_error(code):
+    return ClientError({"Error": {"Code": code, "Message": code}}, "InvokeModel")
+
+
+class RegionClient:
+    """Answers with its region name, or raises the queued errors first."""
+
+    def __init__(self, region, errors=None):
+        self.region = region
+        self.errors = list(errors or [])
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.region
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_regions():
+    assert parse_regions("us-east-1:2, us-west-2") == {"us-east-1": 2.0, "us-west-2": 1.0}
+    assert parse_regions("") == {}
+    for value in ("us-east-1:0,us-west-2", "us-east-1:-1", "us-east-1:abc"):
+        with pytest.raises(ValueError):
+            parse_regions(value)
+    with pytest.raises(ValueError):
+        RegionalBedrockPool({"us-east-1": RegionClient("us-east-1")}, weights={"us-east-1": 0.0})
+
+
+def test_pooled_clients_fail_over_instead_of_retrying(monkeypatch):
+    monkeypatch.setenv("BEDROCK_REGIONS", "us-east-1,us-west-2")
+    monkeypatch.setenv("BEDROCK_MAX_ATTEMPTS", "5")
+
+    pool = bedrock_client_from_env(4)
+
+    assert [r.client.meta.config.retries["total_max_attempts"] for r in pool.regions] == [1, 1]
+
+
+def test_requests_follow_region_weights():
+    east, west = RegionClient("us-east-1"), RegionClient("us-west-2")
+    pool = RegionalBedrockPool({"us-east-1": east, "us-west-2": west}, weights={"us-east-1": 2.0})
+
+    # Hold requests open so outstanding counts drive the choice
+    picked = [pool._acquire(set()).region for _ in range(6)]
+
+    assert picked.count("us-east-1") == 4
+    assert picked.count("us-west-2") == 2
+
+
+def test_throttled_request_fails_over_to_another_region():
+    east = RegionClient("us-east-1", errors=[client_error("ThrottlingException")])
+    west = RegionClient("us-west-2")
+    pool = RegionalBedrockPool({"us-east-1": east, "us-west-2": west})
+
+    assert pool.invoke_model(modelId="m") == "us-west-2"
+    assert pool.metrics()["us-east-1"]["failures"] == 1
+    assert all(m["outstanding"] == 0 for m in pool.metrics().values())
+
+
+def test_bad_requests_are_not_retried_elsewhere():
+    east = RegionClient("us-east-1", errors=[client_error("ValidationException")])
+    west = RegionClient("us-west-2")
+    pool = RegionalBedrockPool({"us-east-1": east, "us-west-2": west})
+
+    with pytest.raises(ClientError):
+        pool.invoke_model(modelId="m")
+    assert west.calls == 0
+
+
+def test_region_is_ejected_after_repeated_errors_and_comes_back():
+    clock = Clock()
+    east = RegionClient("us-east-1", errors=[client_error("ServiceUnavailableException")] * 2)
+    west = RegionClient("us-west-2")
+    pool = RegionalBedrockPool(
+        {"us-east-1": east, "us-west-2": west}, eject_after=2, eject_seconds=30, clock=clock
+    )
+
+    pool.invoke_model(modelId="m")
+    pool.invoke_model(modelId="m")
+    assert pool.metrics()["us-east-1"]["ejections"] == 1
+
+    calls = east.calls
+    for _ in range(3):
+        assert pool.invoke_model(modelId="m") == "us-west-2"
+    assert east.calls == calls
+
+    clock.now = 31
+    results = {pool.invoke_model(modelId="m") for _ in range(2)}
+    assert "us-east-1" in results
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,98 @@
+import io
+import json
+
+import pytest
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from slack_agent.intent_router import ActionFailed, ActionInvoker, ActionNotStarted, Intent, route_intent
+
+URL = "https://wandb.ai/wandb-japan/fc-agent/reports/Sentiment-study--VmlldzoxMjM0NTY3"
+
+
+@pytest.mark.parametrize("text, language", [
+    (f"translate {URL} to Japanese", "jp"),
+    (f"<{URL}> を日本語に翻訳して", "jp"),
+    (f"<{URL}|Sentiment study> 韓国語でお願いします", "ko"),
+    (f"{URL} ko", "ko"),
+    (f"please translate this into English: {URL}", "en"),
+])
+def test_translate_requests_take_the_fast_path(text, language):
+    assert route_intent(text) == Intent("translate_report", {"original_report_url": URL, "language": language})
+
+
+@pytest.mark.parametrize("text", [
+    "What is the current prompt?",
+    "show me the translation prompt",
+    "現在のプロンプトを見せて",
+])
+def test_show_prompt_requests_take_the_fast_path(text):
+    assert route_intent(text) == Intent("show_prompt", {"action": "show_prompt"})
+
+
+@pytest.mark.parametrize("text", [
+    f"translate {URL}",  # no language
+    f"translate {URL} to Japanese and Korean",  # several languages
+    f"translate {URL} and {URL.replace('Sentiment', 'Other')} to Japanese",  # several reports
+    f"Is there a Japanese version of {URL}?",  # no translation request
+    "Update the prompt to: always keep code comments in English",
+    "show the diff between the last two prompt versions",
+    "How do I log a table in W&B?",
+])
+def test_everything_else_goes_to_the_agent(text):
+    assert route_intent(text) is None
+
+
+def test_action_invoker_sends_the_agent_event_format():
+    class StubLambda:
+        def __init__(self):
+            self.calls = []
+
+        def invoke(self, FunctionName, InvocationType, Payload):
+            self.calls.append((FunctionName, json.loads(Payload)))
+            body = {"response": {"functionResponse": {"responseBody": {"TEXT": {"body": "Translation completed!"}}}}}
+            return {"Payload": io.BytesIO(json.dumps(body).encode("utf-8"))}
+
+    client = StubLambda()
+    invoker = ActionInvoker(client, functions={"translate_report": "translator"})
+
+    text = invoker.invoke(Intent("translate_report", {"original_report_url": URL, "language": "jp"}))
+
+    assert text == "Translation completed!"
+    name, event = client.calls[0]
+    assert name == "translator"
+    assert {p["name"]: p["value"] for p in event["parameters"]} == {"original_report_url": URL, "language": "jp"}
+
+
+class FailingLambda:
+    def __init__(self, error=None, function_error=None):
+        self.error = error
+        self.function_error = function_error
+
+    def invoke(self, FunctionName, InvocationType, Payload):
+        if self.error:
+            raise self.error
+        body = {"errorMessage": self.function_error}
+        return {"Payload": io.BytesIO(json.dumps(body).encode("utf-8")), "FunctionError": "Unhandled"}
+
+
+def test_action_invoker_tells_rejected_calls_from_failed_actions():
+    intent = Intent("translate_report", {"original_report_url": URL, "language": "jp"})
+    throttled = ClientError({"Error": {"Code": "TooManyRequestsException", "Message": "Rate exceeded"}}, "Invoke")
+
+    with pytest.raises(ActionNotStarted):
+        ActionInvoker(FailingLambda(error=throttled), functions={"translate_report": "translator"}).invoke(intent)
+    with pytest.raises(ActionFailed) as failed:
+        ActionInvoker(FailingLambda(function_error="boom"), functions={"translate_report": "translator"}).invoke(intent)
+    assert not failed.value.timed_out
+    timeout = ReadTimeoutError(endpoint_url="https://lambda")
+    with pytest.raises(ActionFailed) as failed:
+        ActionInvoker(FailingLambda(error=timeout), functions={"translate_report": "translator"}).invoke(intent)
+    assert failed.value.timed_out
+    unreachable = ActionInvoker(None, functions={"translate_report": "translator"}, service_url="http://127.0.0.1:1")
+    with pytest.raises(ActionNotStarted):
+        unreachable.invoke(intent)
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main([__file__]))
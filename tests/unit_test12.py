@@ -0,0 +1,89 @@
+import os
+import sys
+
+import pytest
+import wandb_workspaces.reports.v2 as wr
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+from report_cache import HIT, MISS, STALE, ReportSnapshotCache
+
+URL = "https://wandb.ai/e/p/reports/Report--VmlldzoxMjM0NTY3"
+
+
+def viewspec(text, updated_at):
+    report = wr.Report(project="p", entity="e", title="Title", blocks=[wr.P(text)])
+    spec = report._to_model().model_dump(by_alias=True, mode="json", exclude_none=True)
+    spec["updatedAt"] = updated_at
+    return spec
+
+
+class FakeWandB:
+    """Serves one report whose content and updatedAt can be changed."""
+
+    def __init__(self):
+        self.text, self.updated_at = "first version", "2026-01-01T00:00:00"
+        self.full_loads = 0
+        self.freshness_checks = 0
+
+    def fetch_viewspec(self, url):
+        self.full_loads += 1
+        return viewspec(self.text, self.updated_at)
+
+    def fetch_updated_at(self, report_id):
+        self.freshness_checks += 1
+        return self.updated_at
+
+
+@pytest.fixture
+def wandb_api():
+    return FakeWandB()
+
+
+def make_cache(tmp_path, wandb_api, trust_seconds=0):
+    return ReportSnapshotCache(
+        str(tmp_path),
+        trust_seconds=trust_seconds,
+        fetch_viewspec=wandb_api.fetch_viewspec,
+        fetch_updated_at=wandb_api.fetch_updated_at,
+    )
+
+
+def test_unchanged_report_is_served_from_the_snapshot(tmp_path, wandb_api):
+    cache = make_cache(tmp_path, wandb_api)
+
+    first, first_outcome = cache.load(URL)
+    second, second_outcome = cache.load(URL)
+
+    assert (first_outcome, second_outcome) == (MISS, HIT)
+    assert wandb_api.full_loads == 1 and wandb_api.freshness_checks == 1
+    assert second.blocks[0].text == "first version"
+    # Every load gets its own report object
+    second.blocks[0].text = "changed by the caller"
+    assert cache.load(URL)[0].blocks[0].text == "first version"
+
+
+def test_updated_report_is_fetched_again(tmp_path, wandb_api):
+    cache = make_cache(tmp_path, wandb_api)
+    cache.load(URL)
+
+    wandb_api.text, wandb_api.updated_at = "second version", "2026-02-01T00:00:00"
+    report, outcome = cache.load(URL)
+
+    assert outcome == STALE
+    assert report.blocks[0].text == "second version"
+    assert cache.metrics()[STALE] == 1
+
+
+def test_recent_snapshot_is_trusted_without_a_freshness_check(tmp_path, wandb_api):
+    cache = make_cache(tmp_path, wandb_api, trust_seconds=60)
+    cache.load(URL)
+    _, outcome = cache.load(URL)
+
+    assert outcome == HIT
+    assert wandb_api.freshness_checks == 0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
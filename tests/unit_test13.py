@@ -0,0 +1,127 @@
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+from hedging import HedgedBedrockClient, LatencyTracker, size_bucket
+
+MODEL = "test-model"
+
+
+class StragglerClient:
+    """The calls listed in slow_calls take a long time; every other call answers at once."""
+
+    def __init__(self, slow_calls=(), slow_seconds=1.0):
+        self.slow_calls = set(slow_calls)
+        self.slow_seconds = slow_seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke_model(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        if n in self.slow_calls:
+            time.sleep(self.slow_seconds)
+        return f"answer {n}"
+
+
+def warmed_tracker(seconds=0.01, samples=20, bucket=0):
+    tracker = LatencyTracker(min_samples=samples)
+    for _ in range(samples):
+        tracker.record(f"{MODEL}#{bucket}", seconds)
+    return tracker
+
+
+def body(chars):
+    return json.dumps({"messages": [{"role": "user", "content": "x" * chars}]})
+
+
+def test_straggler_is_hedged_and_the_faster_answer_wins():
+    client = StragglerClient(slow_calls={1})
+    hedged = HedgedBedrockClient(client, percentile=95, max_hedge_percent=100, min_delay=0.05, tracker=warmed_tracker())
+
+    started = time.monotonic()
+    assert hedged.invoke_model(modelId=MODEL) == "answer 2"
+
+    assert time.monotonic() - started < 0.5
+    assert hedged.metrics() == {"requests": 1, "hedges": 1, "hedge_wins": 1}
+
+
+def test_no_hedge_without_latency_history():
+    client = StragglerClient(slow_calls={1}, slow_seconds=0.1)
+    hedged = HedgedBedrockClient(client, min_delay=0.01, tracker=LatencyTracker(min_samples=20))
+
+    assert hedged.invoke_model(modelId=MODEL) == "answer 1"
+    assert client.calls == 1
+
+
+def test_long_requests_are_compared_with_long_requests():
+    assert size_bucket({"body": body(100)}) == 0
+    assert size_bucket({"body": body(5000)}) == 5
+    # Short calls are fast, but a long call is not hedged just for taking longer than them
+    client = StragglerClient(slow_calls={1}, slow_seconds=0.1)
+    hedged = HedgedBedrockClient(client, max_hedge_percent=100, min_delay=0.01, tracker=warmed_tracker())
+    assert hedged.invoke_model(modelId=MODEL, body=body(5000)) == "answer 1"
+    assert hedged.metrics()["hedges"] == 0
+    # A straggler among calls of its own size still is
+    hedged = HedgedBedrockClient(client, max_hedge_percent=100, min_delay=0.01, tracker=warmed_tracker(bucket=5))
+    client.slow_calls = {2}
+    assert hedged.invoke_model(modelId=MODEL, body=body(5000)) == "answer 3"
+
+
+def test_hedges_are_capped_as_a_share_of_requests():
+    client = StragglerClient(slow_calls=set(range(1, 100)), slow_seconds=0.1)
+    hedged = HedgedBedrockClient(client, max_hedge_percent=10, min_delay=0.01, tracker=warmed_tracker())
+
+    for _ in range(5):
+        hedged.invoke_model(modelId=MODEL)
+
+    # 10% of 5 requests allows no hedge at all
+    assert hedged.metrics()["hedges"] == 0
+    assert client.calls == 5
+
+
+def test_time_waiting_for_a_worker_does_not_count():
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    client = StragglerClient()
+    hedged = HedgedBedrockClient(
+        client, max_hedge_percent=100, min_delay=0.05, tracker=warmed_tracker(), executor=executor
+    )
+    # The only worker is busy for longer than the hedge delay; the call itself is fast
+    executor.submit(time.sleep, 0.2)
+
+    assert hedged.invoke_model(modelId=MODEL) == "answer 1"
+    assert hedged.metrics()["hedges"] == 0
+    executor.shutdown()
+
+
+def test_no_hedge_while_calls_are_waiting_for_a_worker():
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    client = StragglerClient(slow_calls={1}, slow_seconds=0.2)
+    hedged = HedgedBedrockClient(
+        client, max_hedge_percent=100, min_delay=0.05, tracker=warmed_tracker(), executor=executor
+    )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as callers:
+        straggler = callers.submit(hedged.invoke_model, modelId=MODEL)
+        time.sleep(0.02)
+        queued = callers.submit(hedged.invoke_model, modelId=MODEL)
+        assert straggler.result() == "answer 1"
+        assert queued.result() == "answer 2"
+
+    # A hedge would only have queued behind the call that was already waiting
+    assert hedged.metrics()["hedges"] == 0
+    assert client.calls == 2
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pytest
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+from checkpoint import MemoryCheckpointStore, checkpoint_key, source_digest
+from handler import WandBReportTranslator
+from planner import LatencyModel, estimate_tokens, format_plan, plan_translation, simulate_wall_time
+
+from tests.stubs import StubBedrockClient
+
+URL = "https://wandb.ai/e/p/reports/Report--VmlldzoxMjM0NTY3"
+
+
+def test_estimate_tokens_counts_wide_characters_one_by_one():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("日本語") == 3
+
+
+def test_latency_model_fits_measured_calls():
+    model = LatencyModel(min_samples=3)
+    for tokens in (100, 200, 400):
+        model.record("m", tokens, 0.5 + tokens * 0.01)
+
+    base, per_token = model.coefficients("m")
+    assert base == pytest.approx(0.5)
+    assert per_token == pytest.approx(0.01)
+    assert model.predict("m", 1000) == pytest.approx(10.5)
+
+
+def test_simulated_wall_time_uses_parallel_workers():
+    assert simulate_wall_time([4, 1, 1, 1, 1], workers=2) == 4
+    assert simulate_wall_time([1, 1, 1, 1], workers=1) == 4
+
+
+def test_plan_classifies_segments_without_calling_bedrock(offline_weave, offline_reports):
+    client = StubBedrockClient()
+    store = MemoryCheckpointStore()
+    translator = WandBReportTranslator(bedrock_client=client, checkpoint_store=store)
+    store.preload(checkpoint_key(URL, "jp", translator._prompt_version()), {0: "はじめに"}, {0: source_digest("Introduction")})
+    translator.block_workers = 2
+
+    plan = plan_translation(translator, URL, "jp")
+
+    assert not client.requests
+    assert (plan["segments"], plan["calls"], plan["resumed"], plan["skipped"]) == (6, 5, 1, 0)
+    assert plan["cost_usd"] > 0
+    assert plan["wall_seconds"] < plan["serial_seconds"]
+    assert sum(t["calls"] for t in plan["by_model"].values()) == 5
+    assert "Estimated cost" in format_plan(plan)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
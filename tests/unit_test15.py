@@ -0,0 +1,63 @@
+import os
+import sys
+
+import pytest
+from weave.trace.context.call_context import get_tracing_enabled
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import tracing
+from tracing import TracingPolicy
+
+
+@pytest.fixture
+def policy():
+    """Restore the process-wide policy after the test."""
+    original = tracing.current_policy()
+    yield tracing.configure
+    tracing.configure(original)
+
+
+def traced_segments(n):
+    traced = []
+    for _ in range(n):
+        with tracing.segment_span() as is_traced:
+            assert get_tracing_enabled() == is_traced
+            traced.append(is_traced)
+    return traced
+
+
+def test_levels_decide_which_segments_are_traced(policy):
+    policy(TracingPolicy(level="full"))
+    assert traced_segments(3) == [True, True, True]
+
+    policy(TracingPolicy(level="report"))
+    assert traced_segments(3) == [False, False, False]
+
+    draws = iter([0.05, 0.5, 0.09, 0.95])
+    policy(TracingPolicy(level="sampled", sample_rate=0.1, random_source=lambda: next(draws)))
+    assert traced_segments(4) == [True, False, True, False]
+
+
+def test_payloads_are_truncated_and_self_is_not_serialized(policy):
+    policy(TracingPolicy(level="full", max_chars=10))
+
+    class Translator:
+        pass
+
+    logged = tracing.trace_inputs({"self": Translator(), "text": "x" * 50, "parts": ["short", "y" * 20]})
+
+    assert logged["self"] == "Translator"
+    assert logged["text"] == "x" * 10 + "... [truncated, 50 chars]"
+    assert logged["parts"][0] == "short"
+    assert tracing.trace_output("z" * 11).startswith("z" * 10 + "...")
+
+
+def test_invalid_level_is_rejected():
+    with pytest.raises(ValueError):
+        TracingPolicy(level="verbose")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,161 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+from failure_policy import FailurePolicy
+from handler import WandBReportTranslator
+from region_pool import RegionalBedrockPool
+from scheduler import BedrockBudget, BudgetedBedrockClient
+from streaming import OutputTruncated, StreamStalled, stream_message
+
+MODEL = "test-model"
+
+
+def event(data):
+    return {"chunk": {"bytes": json.dumps(data).encode("utf-8")}}
+
+
+def message_events(text, stop_reason="end_turn", output_tokens=5):
+    yield event({"type": "message_start", "message": {"usage": {"input_tokens": 10}}})
+    for piece in text.split(" "):
+        yield event({"type": "content_block_delta", "delta": {"type": "text_delta", "text": piece + " "}})
+    yield event({"type": "message_delta", "delta": {"stop_reason": stop_reason}, "usage": {"output_tokens": output_tokens}})
+    yield event({"type": "message_stop"})
+
+
+class EventStream:
+    """Stands in for a botocore EventStream; optionally sleeps before the event at index pause_at."""
+
+    def __init__(self, events, pause_at=None, pause_seconds=0.0):
+        self.events = list(events)
+        self.pause_at = pause_at
+        self.pause_seconds = pause_seconds
+        self.closed = False
+
+    def __iter__(self):
+        for i, e in enumerate(self.events):
+            if i == self.pause_at:
+                time.sleep(self.pause_seconds)
+            if self.closed:
+                return
+            yield e
+
+    def close(self):
+        self.closed = True
+
+
+class StreamingClient:
+    """Answers invoke_model_with_response_stream; segments longer than max_chars stop at max_tokens."""
+
+    def __init__(self, max_chars=None, stream_factory=None):
+        self.max_chars = max_chars
+        self.stream_factory = stream_factory
+        self.sent = []
+
+    def invoke_model_with_response_stream(self, modelId, contentType, accept, body):
+        text = json.loads(body)["messages"][0]["content"]
+        self.sent.append(text)
+        if self.stream_factory:
+            return {"body": self.stream_factory(text)}
+        if self.max_chars is not None and len(text) > self.max_chars:
+            return {"body": EventStream(message_events("partial", stop_reason="max_tokens"))}
+        return {"body": EventStream(message_events(f"[{text}]"))}
+
+
+def test_stream_builds_text_and_usage():
+    text, usage, stop_reason = stream_message(StreamingClient(), MODEL, json.dumps({"messages": [{"content": "a b"}]}))
+
+    assert text == "[a b] "
+    assert usage == {"input_tokens": 10, "output_tokens": 5}
+    assert stop_reason == "end_turn"
+
+
+def test_stalled_stream_fails_fast():
+    stream = EventStream(message_events("one two three"), pause_at=2, pause_seconds=1.0)
+    client = StreamingClient(stream_factory=lambda text: stream)
+
+    started = time.monotonic()
+    with pytest.raises(StreamStalled):
+        stream_message(client, MODEL, json.dumps({"messages": [{"content": "x"}]}), first_token_timeout=5, stall_timeout=0.1)
+
+    assert time.monotonic() - started < 0.5
+    assert stream.closed
+
+
+def test_max_tokens_and_runaway_output_raise_truncated():
+    body = json.dumps({"messages": [{"content": "x"}]})
+    with pytest.raises(OutputTruncated):
+        stream_message(StreamingClient(max_chars=0), MODEL, body)
+    with pytest.raises(OutputTruncated) as info:
+        stream_message(StreamingClient(), MODEL, json.dumps({"messages": [{"content": "word " * 20}]}), max_output_chars=10)
+    assert info.value.partial_text
+
+
+def test_budget_and_region_slots_are_held_until_the_stream_is_read():
+    budget = BedrockBudget(max_concurrency=2)
+    pool = RegionalBedrockPool({"us-east-1": StreamingClient()})
+    client = BudgetedBedrockClient(pool, budget)
+    body = json.dumps({"messages": [{"content": "a b"}]})
+
+    response = client.invoke_model_with_response_stream(modelId=MODEL, contentType="application/json", accept="application/json", body=body)
+    # Opened but not read yet: the call still counts
+    assert budget.in_flight == 1 and pool.regions[0].outstanding == 1
+    list(response["body"])
+    assert budget.in_flight == 0 and pool.regions[0].outstanding == 0
+
+    # A stream that is abandoned and closed is released too
+    response = client.invoke_model_with_response_stream(modelId=MODEL, contentType="application/json", accept="application/json", body=body)
+    response["body"].close()
+    assert budget.in_flight == 0 and pool.regions[0].outstanding == 0
+    assert stream_message(client, MODEL, body)[0] == "[a b] "
+    assert budget.in_flight == 0
+
+
+def test_truncated_segment_is_split_and_translated_in_halves(offline_weave, monkeypatch):
+    monkeypatch.setenv("TRANSLATION_STREAMING", "true")
+    client = StreamingClient(max_chars=30)
+    translator = WandBReportTranslator(bedrock_client=client)
+    text = "First paragraph of the text.\n\nSecond paragraph of the text."
+
+    result = translator._translation(text, "jp")
+
+    assert result == "[First paragraph of the text.] \n\n[Second paragraph of the text.] "
+    assert client.sent[1:] == ["First paragraph of the text.", "Second paragraph of the text."]
+    assert translator.stats.splits == 1
+
+
+def test_truncation_and_invalid_requests_are_not_retried():
+    policy = FailurePolicy(max_retries=2, sleep=lambda seconds: None)
+    errors = {
+        "truncated": OutputTruncated("stopped at max_tokens"),
+        "invalid": ClientError({"Error": {"Code": "ValidationException", "Message": "bad"}}, "InvokeModel"),
+        "throttled": RuntimeError("ThrottlingException"),
+    }
+    calls = {name: 0 for name in errors}
+
+    def fail(name):
+        calls[name] += 1
+        raise errors[name]
+
+    for name in errors:
+        with pytest.raises(type(errors[name])):
+            policy.call(fail, name)
+
+    assert calls == {"truncated": 1, "invalid": 1, "throttled": 3}
+
+
+def test_split_prefers_paragraphs_and_keeps_placeholders():
+    head, separator, tail = WandBReportTranslator._split_text("one two\nthree __INLINECODE_1__ four")
+    assert (head, separator, tail) == ("one two", "\n", "three __INLINECODE_1__ four")
+    assert WandBReportTranslator._split_text("__INLINECODE_0__") is None
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
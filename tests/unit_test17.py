@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+from slack_agent.loop_monitor import EventLoopLagMonitor
+
+
+def test_blocking_call_is_detected_and_logged():
+    async def scenario():
+        logged = []
+        monitor = EventLoopLagMonitor(interval=0.01, threshold=0.1, log=logged.append)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        # A synchronous call inside a handler holds up the whole loop
+        time.sleep(0.2)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        return monitor.metrics(), logged
+
+    metrics, logged = asyncio.run(scenario())
+    assert metrics["blocked"] == 1
+    assert metrics["lag_max_ms"] >= 150
+    assert metrics["lag_p50_ms"] < 100
+    assert len(logged) == 1 and logged[0].startswith("Event loop blocked")
+
+
+def test_lag_below_threshold_is_not_logged():
+    logged = []
+    monitor = EventLoopLagMonitor(interval=0.1, threshold=0.25, log=logged.append)
+    for lag in (0.0, 0.05, 0.2, -0.01):
+        monitor.record(lag)
+
+    assert not logged
+    assert monitor.metrics()["samples"] == 4
+    monitor.reset()
+    assert monitor.metrics()["samples"] == 0
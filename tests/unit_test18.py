@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+
+from slack_agent.action_schema import diff_snapshots, function_index, load_snapshot, save_snapshot
+from slack_agent.intent_router import ActionInvoker, Intent
+from src.print_action_groups import fetch_action_schema
+
+TRANSLATOR = "arn:aws:lambda:us-east-1:123456789012:function:fc-agent-wandb-translator"
+
+
+def translate_function(parameters=None):
+    return {
+        "name": "translate_report",
+        "description": "Translate a W&B report",
+        "parameters": parameters or {
+            "original_report_url": {"type": "string", "required": True, "description": "Report URL"},
+            "language": {"type": "string", "required": True, "description": "Target language"},
+        },
+    }
+
+
+class StubAgentClient:
+    """bedrock-agent stand-in; get_agent_action_group takes `latency` seconds."""
+
+    def __init__(self, groups, latency=0.1):
+        self.groups = groups
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get_agent(self, agentId):
+        return {"agent": {"agentId": agentId, "agentVersion": "DRAFT"}}
+
+    def get_agent_alias(self, agentId, agentAliasId):
+        return {"agentAlias": {"agentAliasId": agentAliasId, "routingConfiguration": [{"agentVersion": "3"}]}}
+
+    def get_paginator(self, name):
+        groups = self.groups
+        if name == "list_agent_versions":
+            class VersionPaginator:
+                def paginate(self, agentId):
+                    yield {"agentVersionSummaries": [{"agentVersion": v} for v in ("DRAFT", "2", "10", "9")]}
+
+            return VersionPaginator()
+
+        class Paginator:
+            def paginate(self, agentId, agentVersion):
+                yield {"agentActionGroupSummaries": [{"agentActionGroupId": gid} for gid in groups]}
+
+        return Paginator()
+
+    def get_agent_action_group(self, agentId, agentActionGroupId, agentVersion):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+        return {"agentActionGroup": self.groups[agentActionGroupId]}
+
+
+def agent_groups(translate=None):
+    return {
+        "g1": {
+            "agentActionGroupId": "g1",
+            "agentActionGroupName": "translator",
+            "actionGroupExecutor": {"lambda": TRANSLATOR},
+            "functionSchema": {"functions": [translate or translate_function()]},
+        },
+        "g2": {
+            "agentActionGroupId": "g2",
+            "agentActionGroupName": "prompt-manager",
+            "apiSchema": {"payload": json.dumps({"paths": {"/prompt": {"get": {
+                "operationId": "show_prompt",
+                "parameters": [{"name": "action", "in": "query", "schema": {"type": "string"}}],
+            }}}})},
+        },
+    }
+
+
+def test_action_group_details_are_fetched_in_parallel():
+    client = StubAgentClient({**agent_groups(), "g3": {**agent_groups()["g2"], "agentActionGroupName": "other"}})
+
+    started = time.monotonic()
+    snapshot = fetch_action_schema("AGENT", client=client)
+
+    assert time.monotonic() - started < 0.25
+    assert client.max_in_flight == 3
+    # The latest published version, not the DRAFT reported by get_agent
+    assert snapshot["agent_version"] == "10"
+    assert fetch_action_schema("AGENT", client=client, agent_alias_id="ALIAS")["agent_version"] == "3"
+    index = function_index(snapshot)
+    assert index["translate_report"]["lambda"] == TRANSLATOR
+    assert index["show_prompt"]["parameters"]["action"]["in"] == "query"
+
+
+def test_snapshots_are_versioned_and_diffed(tmp_path):
+    old = fetch_action_schema("AGENT", agent_version="1", client=StubAgentClient(agent_groups(), latency=0))
+    changed = translate_function({
+        "original_report_url": {"type": "string", "required": True, "description": "Report URL"},
+        "language": {"type": "string", "required": False, "description": "Target language"},
+        "glossary": {"type": "string", "required": False, "description": "Protected terms"},
+    })
+    new = fetch_action_schema("AGENT", agent_version="2", client=StubAgentClient(agent_groups(changed), latency=0))
+    save_snapshot(old, str(tmp_path))
+    save_snapshot(new, str(tmp_path))
+
+    assert load_snapshot("1", str(tmp_path))["agent_version"] == "1"
+    assert load_snapshot(directory=str(tmp_path))["agent_version"] == "2"
+    assert diff_snapshots(load_snapshot("1", str(tmp_path)), load_snapshot("2", str(tmp_path))) == [
+        "translator.translate_report: added parameter glossary (string, optional)",
+        "translator.translate_report: parameter language: required True -> False",
+    ]
+
+
+def test_fast_path_reads_lambdas_from_the_snapshot(monkeypatch):
+    monkeypatch.delenv("FAST_PATH_TRANSLATE_FUNCTION", raising=False)
+    snapshot = fetch_action_schema("AGENT", client=StubAgentClient(agent_groups(), latency=0))
+
+    invoker = ActionInvoker(lambda_client=None, snapshot=snapshot)
+
+    assert invoker.functions["translate_report"] == TRANSLATOR
+    assert invoker.action_groups["translate_report"] == "translator"
+    assert invoker.supports(Intent("show_prompt", {"action": "show_prompt"}))
+    assert not ActionInvoker(lambda_client=None, snapshot={"schema_version": 1, "action_groups": {
+        "translator": {"actions": [translate_function()]}}}).supports(Intent("show_prompt", {}))
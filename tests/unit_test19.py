@@ -0,0 +1,108 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+import wandb_workspaces.reports.v2 as wr
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+from glossary import Glossary, TermMatcher, load_glossary
+from handler import WandBReportTranslator
+
+from tests.stubs import StubBedrockClient, sent_texts
+
+
+def test_matcher_finds_leftmost_longest_whole_words():
+    matcher = TermMatcher(["W&B", "W&B Registry", "Weave", "he", "hers"])
+    text = "W&B Registry and Weave, not Weaver; ushers he"
+
+    matches = [(text[start:end], matcher.terms[index]) for start, end, index in matcher.find(text)]
+
+    assert matches == [("W&B Registry", "W&B Registry"), ("Weave", "Weave"), ("he", "he")]
+
+
+def test_terms_become_placeholders_outside_code_and_urls():
+    glossary = Glossary({"Weave": None, "experiment tracking": {"jp": "実験管理"}}, case_sensitive=False)
+
+    text, placeholders = glossary.protect(
+        "Use weave for Experiment tracking. `weave.init()` and https://wandb.ai/site/weave stay.", "jp"
+    )
+
+    assert text == "Use __TERM_0__ for __TERM_1__. `weave.init()` and https://wandb.ai/site/weave stay."
+    assert placeholders == [("__TERM_0__", "weave"), ("__TERM_1__", "実験管理")]
+    # Languages without a fixed rendering keep the term as written
+    assert glossary.protect("Experiment tracking", "ko")[1] == [("__TERM_0__", "Experiment tracking")]
+
+
+def test_translation_shields_terms_next_to_inline_code(offline_weave):
+    client = StubBedrockClient()
+    glossary = Glossary({"Weave": None, "Sweeps": {"jp": "スイープ"}})
+    translator = WandBReportTranslator(bedrock_client=client, glossary=glossary)
+
+    result = translator._translation(["Trace calls with Weave and ", wr.InlineCode("weave.op"), " in Sweeps."], "jp")
+
+    assert sent_texts(client) == ["Trace calls with __TERM_0__ and __INLINECODE_1__ in __TERM_1__."]
+    assert result == "翻訳: Trace calls with Weave and weave.op in スイープ."
+
+
+class DroppingClient(StubBedrockClient):
+    """Drops every __TERM_0__ placeholder from its first `drops` answers."""
+
+    def __init__(self, drops):
+        super().__init__()
+        self.drops = drops
+
+    def invoke_model(self, modelId, contentType, accept, body):
+        response = super().invoke_model(modelId, contentType, accept, body)
+        if self.drops > 0:
+            self.drops -= 1
+            answer = json.loads(response["body"].read())
+            answer["content"][0]["text"] = answer["content"][0]["text"].replace("__TERM_0__", "Weave")
+            response["body"] = io.BytesIO(json.dumps(answer).encode("utf-8"))
+        return response
+
+
+def test_prompt_asks_to_keep_term_placeholders(offline_weave):
+    translator = WandBReportTranslator(bedrock_client=StubBedrockClient(), glossary=Glossary({"Weave": None}))
+
+    assert "__TERM_x__" in translator._get_system_prompt("jp")
+
+
+def test_lost_term_placeholder_is_translated_again(offline_weave):
+    client = DroppingClient(drops=1)
+    translator = WandBReportTranslator(bedrock_client=client, glossary=Glossary({"Weave": {"jp": "ウィーブ"}}))
+
+    result = translator._translation("Trace calls with Weave.", "jp")
+
+    assert sent_texts(client) == ["Trace calls with __TERM_0__."] * 2
+    assert result == "翻訳: Trace calls with ウィーブ."
+
+
+def test_lost_term_placeholder_falls_back_to_unprotected_text(offline_weave):
+    client = DroppingClient(drops=2)
+    translator = WandBReportTranslator(bedrock_client=client, glossary=Glossary({"Weave": {"jp": "ウィーブ"}}))
+
+    result = translator._translation(["Trace calls with Weave and ", wr.InlineCode("weave.op"), "."], "jp")
+
+    assert sent_texts(client) == ["Trace calls with __TERM_0__ and __INLINECODE_1__."] * 2 + [
+        "Trace calls with Weave and __INLINECODE_1__."
+    ]
+    assert result == "翻訳: Trace calls with Weave and weave.op."
+
+
+def test_glossary_file_and_checkpoint_version(offline_weave, tmp_path):
+    path = tmp_path / "glossary.json"
+    path.write_text(json.dumps({"case_sensitive": True, "terms": ["Acme Corp"]}), encoding="utf-8")
+    glossary = load_glossary(str(path))
+    assert {"Acme Corp", "Weave"} <= set(glossary.renderings)
+
+    with_glossary = WandBReportTranslator(bedrock_client=StubBedrockClient(), glossary=glossary)
+    without = WandBReportTranslator(bedrock_client=StubBedrockClient(), glossary=Glossary({}))
+    assert with_glossary._prompt_version() != without._prompt_version()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+
+import pytest
+import wandb_workspaces.reports.v2 as wr
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import handler
+from handler import WandBReportTranslator
+from translation_cache import LocalTranslationCache, report_updated_at
+
+from slack_agent.job_queue import FairJobQueue
+from slack_agent.prefetch import SpeculativeTranslator
+
+from tests.stubs import StubBedrockClient
+
+URL = "https://wandb.ai/e/p/reports/Report--VmlldzoxMjM0NTY3"
+
+
+def test_unchanged_report_returns_the_saved_translation(offline_weave, offline_reports, monkeypatch, tmp_path):
+    updated_at = {"value": "2026-01-01T00:00:00"}
+    monkeypatch.setattr(handler, "report_updated_at", lambda report: updated_at["value"])
+    cache = LocalTranslationCache(str(tmp_path))
+
+    first = StubBedrockClient()
+    assert WandBReportTranslator(bedrock_client=first, translation_cache=cache)._wandb_report_transformation(URL, "jp")[0] \
+        == "https://wandb.ai/test/reports/translated"
+    assert first.requests
+
+    again = StubBedrockClient()
+    translator = WandBReportTranslator(bedrock_client=again, translation_cache=cache)
+    url, title = translator._wandb_report_transformation(URL, "jp")
+    assert (url, title) == ("https://wandb.ai/test/reports/translated", "翻訳: Sentiment classification")
+    assert not again.requests
+    assert translator.stats.cached_translation
+
+    # Another language, or a changed source report, is translated again
+    korean = StubBedrockClient()
+    WandBReportTranslator(bedrock_client=korean, translation_cache=cache)._wandb_report_transformation(URL, "ko")
+    assert korean.requests
+    updated_at["value"] = "2026-02-01T00:00:00"
+    changed = StubBedrockClient()
+    WandBReportTranslator(bedrock_client=changed, translation_cache=cache)._wandb_report_transformation(URL, "jp")
+    assert changed.requests
+
+
+def test_updated_at_comes_from_the_loaded_report():
+    report = wr.Report(entity="e", project="p")
+    assert report_updated_at(report) is None
+    report._updated_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert report_updated_at(report) == "2026-01-01T00:00:00+00:00"
+
+
+class RecordingInvoker:
+    def __init__(self):
+        self.intents = []
+
+    def invoke(self, intent):
+        self.intents.append(intent)
+        return "Translation completed!"
+
+
+def test_urls_in_watched_channels_are_pretranslated_when_the_queue_is_idle():
+    async def scenario():
+        queue = FairJobQueue(workers=1)
+        invoker = RecordingInvoker()
+        prefetcher = SpeculativeTranslator(invoker, queue, channels=["CANNOUNCE"], languages=["jp", "ko"], poll_seconds=0.01)
+        gate = asyncio.Event()
+        queue.submit(gate.wait, user="U1", channel="C1")
+        await asyncio.sleep(0)
+
+        assert prefetcher.offer(f"New report: <{URL}|Report>", "CANNOUNCE") == 2
+        assert prefetcher.offer(f"Again {URL}", "CANNOUNCE") == 0
+        assert prefetcher.offer(URL, "COTHER") == 0
+        await asyncio.sleep(0.05)
+        # An interactive job is running: nothing has started
+        assert not invoker.intents
+
+        gate.set()
+        await asyncio.sleep(0.1)
+        await prefetcher.stop()
+        await queue.stop()
+        return invoker.intents, prefetcher.metrics()
+
+    intents, metrics = asyncio.run(scenario())
+    assert [i.parameters["language"] for i in intents] == ["jp", "ko"]
+    assert all(i.parameters["speculative"] == "true" and i.parameters["original_report_url"] == URL for i in intents)
+    assert metrics["completed"] == 2 and metrics["pending"] == 0
+
+
+def test_interactive_request_takes_over_the_pretranslation_of_its_report():
+    class SlowInvoker(RecordingInvoker):
+        service_url = None
+
+        def invoke(self, intent):
+            threading.Event().wait(0.1)
+            return super().invoke(intent)
+
+    async def scenario():
+        queue = FairJobQueue(workers=1)
+        invoker = SlowInvoker()
+        prefetcher = SpeculativeTranslator(invoker, queue, channels=["CANNOUNCE"], languages=["jp", "ko"], poll_seconds=0.01)
+        prefetcher.offer(URL, "CANNOUNCE")
+        await asyncio.sleep(0.03)
+        results = []
+
+        async def interactive_request():
+            # jp is running: the request waits for it. ko has not started: it is dropped
+            results.append(await prefetcher.take_over(URL, "jp"))
+            results.append(len(invoker.intents))
+            results.append(await prefetcher.take_over(URL, "ko"))
+            results.append(await prefetcher.take_over(URL, "en"))
+
+        queue.submit(interactive_request, user="U1", channel="C1")
+        await asyncio.sleep(0.3)
+        await prefetcher.stop()
+        await queue.stop()
+        return results, invoker.intents, prefetcher.metrics()
+
+    results, intents, metrics = asyncio.run(scenario())
+    assert results == [True, 1, True, False]
+    assert [i.parameters["language"] for i in intents] == ["jp"]
+    assert metrics["taken_over"] == 2 and metrics["pending"] == 0
+
+def test_speculative_translation_needs_a_shared_cache(offline_weave, monkeypatch, tmp_path):
+    monkeypatch.setenv("AWS_REGION", "us-east-1")
+    monkeypatch.setenv("TRANSLATION_CACHE", "true")
+    monkeypatch.setenv("TRANSLATION_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("TRANSLATION_CACHE_BUCKET", raising=False)
+    event = {
+        "function": "translate_report",
+        "parameters": [
+            {"name": "original_report_url", "value": URL},
+            {"name": "language", "value": "jp"},
+            {"name": "speculative", "value": "true"},
+        ],
+    }
+
+    response = handler.lambda_handler(event, None)
+
+    # A local cache in one Lambda container would not be seen by the later request
+    assert response["response"]["functionResponse"]["responseBody"]["TEXT"]["body"].startswith(
+        "Speculative translation skipped: the translation cache is not shared"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
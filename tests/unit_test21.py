@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import handler
+from failure_policy import FailurePolicy
+from handler import WandBReportTranslator
+from progress import ProgressTracker, StoredProgress, format_progress
+from translation_cache import LocalTranslationCache
+
+from slack_agent.status_message import StatusMessage, follow_translation
+
+from tests.stubs import StubBedrockClient
+
+URL = "https://wandb.ai/e/p/reports/Report--VmlldzoxMjM0NTY3"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_translation_reports_stages_and_blocks(offline_weave, offline_reports):
+    events = []
+    translator = WandBReportTranslator(bedrock_client=StubBedrockClient(), progress_callback=events.append, job_id="job-1")
+
+    translator._wandb_report_transformation(URL, "jp")
+
+    stages = [e["stage"] for e in events]
+    assert stages[:2] == ["loading", "translating"] and stages[-2:] == ["saving", "done"]
+    blocks = [(e["done"], e["total"]) for e in events if e["stage"] == "translating"]
+    assert blocks == [(0, 4), (1, 4), (2, 4), (3, 4), (4, 4)]
+    assert events[-1]["url"] == "https://wandb.ai/test/reports/translated"
+    assert all(e["job_id"] == "job-1" for e in events)
+
+
+def test_aborted_translation_ends_with_failed(offline_weave, offline_reports):
+    events = []
+    translator = WandBReportTranslator(
+        bedrock_client=StubBedrockClient(fail_on="FAILS"),
+        failure_policy=FailurePolicy(max_retries=0, on_failure="abort"),
+        progress_callback=events.append,
+    )
+
+    translator._wandb_report_transformation(URL, "jp")
+
+    assert events[-1]["stage"] == "failed" and "ThrottlingException" in events[-1]["error"]
+
+
+def test_eta_and_throttled_store(tmp_path):
+    clock = FakeClock()
+    store = LocalTranslationCache(str(tmp_path))
+    stored = StoredProgress(store, "job/1", interval=2, clock=clock)
+    tracker = ProgressTracker(stored, "job/1", clock=clock)
+
+    tracker.start_blocks(total=10, done=2)
+    assert tracker.eta_seconds() is None
+    clock.now = 4.0
+    tracker.block_done()
+    clock.now = 5.0
+    tracker.block_done()
+    # Two blocks in 5 seconds, six to go
+    assert tracker.eta_seconds() == pytest.approx(15.0)
+
+    saved = store.get("job_1")
+    assert (saved["done"], saved["total"]) == (3, 10)
+    assert format_progress(saved, now=saved["updated_at"]) == "Translating: 3/10 blocks (30%), less than a minute left"
+    tracker.stage("saving")
+    assert store.get("job_1")["stage"] == "saving"
+
+
+def test_status_function_reads_stored_progress(monkeypatch, tmp_path):
+    monkeypatch.setenv("TRANSLATION_PROGRESS_DIR", str(tmp_path))
+    store = LocalTranslationCache(str(tmp_path))
+    store.put("abc", {"stage": "translating", "done": 5, "total": 20, "eta_seconds": 90, "updated_at": 1e12})
+
+    def status(**params):
+        event = {"function": "translation_status", "parameters": [{"name": k, "value": v} for k, v in params.items()]}
+        return handler.lambda_handler(event, None)["response"]["functionResponse"]["responseBody"]["TEXT"]["body"]
+
+    assert status(job_id="abc") == "Translating: 5/20 blocks (25%), about 2 min left"
+    assert json.loads(status(job_id="abc", format="json"))["done"] == 5
+    assert status(job_id="unknown") == "No progress has been reported for this translation."
+    assert status().startswith("Error")
+
+
+def test_lambda_keeps_progress_only_in_a_shared_store_and_does_not_trace_status(monkeypatch):
+    monkeypatch.delenv("TRANSLATION_PROGRESS_DIR", raising=False)
+    monkeypatch.delenv("TRANSLATION_PROGRESS_BUCKET", raising=False)
+    monkeypatch.delenv("TRANSLATION_CACHE_BUCKET", raising=False)
+    traced = []
+    monkeypatch.setattr(handler, "_traced_lambda_handler", lambda event, context: traced.append(event))
+    event = {"function": "translation_status", "parameters": [{"name": "job_id", "value": "abc"}]}
+
+    body = handler.lambda_handler(event, None)["response"]["functionResponse"]["responseBody"]["TEXT"]["body"]
+
+    # The default /tmp store is private to one Lambda container
+    assert body.startswith("Error: translation progress is turned off")
+    assert traced == []
+    handler.lambda_handler({"function": "translate_report", "parameters": []}, None)
+    assert len(traced) == 1
+
+
+class StubSlackClient:
+    def __init__(self):
+        self.updates = []
+
+    async def chat_postMessage(self, **kwargs):
+        return {"ts": "1.0"}
+
+    async def chat_update(self, **kwargs):
+        self.updates.append(kwargs["text"])
+        return {"ok": True}
+
+
+def test_status_message_edits_are_rate_limited():
+    async def scenario():
+        clock = FakeClock()
+        client = StubSlackClient()
+        status = StatusMessage(client, "C1", "1.0", min_interval=3, clock=clock)
+        await status.post("Handling your request...")
+        assert await status.update("Translating: 1/10 blocks")
+        clock.now = 1.0
+        assert not await status.update("Translating: 2/10 blocks")
+        assert not await status.update("Translating: 3/10 blocks")
+        clock.now = 4.0
+        assert await status.flush()
+        assert not await status.update("Translating: 3/10 blocks")
+        return client.updates
+
+    assert asyncio.run(scenario()) == ["Translating: 1/10 blocks", "Translating: 3/10 blocks"]
+
+
+def test_held_back_edit_is_sent_later_unless_replaced():
+    async def scenario():
+        client = StubSlackClient()
+        status = StatusMessage(client, "C1", "1.0", min_interval=0.05)
+        await status.post("Handling your request...")
+        await status.update("Translating: 1/10 blocks")
+        await status.update("Translating: 2/10 blocks")
+        await asyncio.sleep(0.1)
+        # The final status replaces a held-back edit, which is then never sent
+        await status.update("Translating: 3/10 blocks")
+        await status.update("Translating: 4/10 blocks")
+        await status.update("Done. See the reply below.", force=True)
+        await asyncio.sleep(0.1)
+        return client.updates
+
+    assert asyncio.run(scenario()) == [
+        "Translating: 1/10 blocks", "Translating: 2/10 blocks", "Translating: 3/10 blocks", "Done. See the reply below."
+    ]
+
+
+class StatusInvoker:
+    def __init__(self, events):
+        self.events = list(events)
+        self.intents = []
+
+    def invoke(self, intent):
+        self.intents.append(intent)
+        event = self.events.pop(0) if self.events else None
+        return json.dumps(dict(event or {}, text=format_progress(event)))
+
+
+def test_follow_translation_shows_the_latest_progress():
+    async def scenario():
+        client = StubSlackClient()
+        status = StatusMessage(client, "C1", "1.0", min_interval=0)
+        await status.post("Handling your request...")
+        invoker = StatusInvoker([None, {"stage": "loading", "updated_at": 1e12}, {"stage": "saving", "updated_at": 1e12}])
+        task = asyncio.create_task(follow_translation(invoker, "job-1", status, poll_seconds=0.01))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        return client.updates, invoker.intents[0].parameters
+
+    updates, parameters = asyncio.run(scenario())
+    # Nothing stored yet: the status message is left as it is
+    assert updates == ["Loading the source report...", "Saving the translated report..."]
+    assert parameters == {"job_id": "job-1", "format": "json"}
+
+
+def test_follow_translation_stops_without_a_progress_store():
+    class NoProgressInvoker(StatusInvoker):
+        def invoke(self, intent):
+            self.intents.append(intent)
+            return "Error: translation progress is turned off (set TRANSLATION_PROGRESS_BUCKET to store it)."
+
+    async def scenario():
+        status = StatusMessage(StubSlackClient(), "C1", "1.0", min_interval=0)
+        invoker = NoProgressInvoker([])
+        await asyncio.wait_for(follow_translation(invoker, "job-1", status, poll_seconds=0.01), timeout=1)
+        return invoker.intents
+
+    assert len(asyncio.run(scenario())) == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,104 @@
+import os
+import sys
+
+import pytest
+import wandb_workspaces.reports.v2 as wr
+from wandb_workspaces.reports.v2 import internal as wr_internal
+from wandb_workspaces.reports.v2.interface import _lookup
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import handler
+from checkpoint import MemoryCheckpointStore
+from handler import WandBReportTranslator
+from report_ir import ReportIR, build_block, normalize_report
+
+from tests.stubs import StubBedrockClient, sent_texts
+
+URL = "https://wandb.ai/e/p/reports/Report--VmlldzoxMjM0NTY3"
+
+
+def source_blocks():
+    return [
+        wr.H2("Setup", collapsed_blocks=[wr.P("Hidden details")]),
+        wr.P(["Call ", wr.InlineCode("weave.init()"), " as described in the ", wr.Link("Weave docs", url="https://weave-docs.wandb.ai"), "."]),
+        wr.Image(url="https://example.com/plot.png", caption="Loss curve"),
+        wr.UnorderedList(items=["kept", "as is"]),
+        _lookup(wr_internal.UnknownBlock.model_validate({
+            "type": "default",
+            "children": [{"text": "Run "}, {"text": "train.py", "inlineCode": True}, {"text": " first."}],
+        })),
+        wr.MarkdownBlock("## Results\nAccuracy is 91%."),
+    ]
+
+
+def test_report_is_normalized_to_a_compact_serializable_ir():
+    report = wr.Report(entity="e", project="p", title="Title", description="Description", blocks=source_blocks())
+
+    ir = normalize_report(report, "Title", "Description")
+
+    assert [b.kind for b in ir.blocks] == ["H2", "P", "Image", "UnorderedList", "UnknownBlock", "MarkdownBlock"]
+    paragraph = ir.blocks[1]
+    assert paragraph.text == "Call __INLINECODE_1__ as described in the Weave docs."
+    assert paragraph.code == (("__INLINECODE_1__", "weave.init()"),)
+    assert paragraph.links == (("Weave docs", "https://weave-docs.wandb.ai"),)
+    assert ir.blocks[4].text == "Run __INLINECODE_1__ first."
+    assert [key for key, _ in ir.segments()] == ["title", "description", 0, 1, 4, 5]
+
+    data = ir.to_bytes()
+    assert isinstance(data, bytes)
+    restored = ReportIR.from_bytes(data)
+    assert restored.blocks == ir.blocks and restored.title == ir.title
+
+    # Blocks kept as they are come back unchanged
+    assert build_block(restored.blocks[2]) == report.blocks[2]
+    assert build_block(restored.blocks[3]) == report.blocks[3]
+    assert build_block(restored.blocks[0], "準備").collapsed_blocks == [wr.P("Hidden details")]
+
+
+def test_translated_blocks_get_their_inline_code_and_links_back():
+    ir = normalize_report(wr.Report(entity="e", project="p", blocks=source_blocks()), "Title", "Description")
+
+    paragraph = build_block(ir.blocks[1], "__INLINECODE_1__ を Weave docs の説明どおりに呼び出します。")
+    unknown = build_block(ir.blocks[4], "まず __INLINECODE_1__ を実行します。")
+
+    assert paragraph == wr.P([
+        wr.InlineCode("weave.init()"), " を ", wr.Link("Weave docs", url="https://weave-docs.wandb.ai"), " の説明どおりに呼び出します。"
+    ])
+    assert unknown == wr.P(["まず ", wr.InlineCode("train.py"), " を実行します。"])
+
+
+def test_links_whose_text_was_translated_are_reported():
+    ir = normalize_report(wr.Report(entity="e", project="p", blocks=source_blocks()), "Title", "Description")
+    dropped = []
+
+    paragraph = build_block(ir.blocks[1], "__INLINECODE_1__ を Weave ドキュメントの説明どおりに呼び出します。", dropped)
+
+    assert paragraph == wr.P([wr.InlineCode("weave.init()"), " を Weave ドキュメントの説明どおりに呼び出します。"])
+    assert dropped == [("Weave docs", "https://weave-docs.wandb.ai")]
+
+
+def test_translation_runs_on_the_ir(offline_weave, monkeypatch):
+    source = wr.Report(entity="e", project="source", title="Quickstart", description="How to start", blocks=source_blocks())
+    monkeypatch.setattr(handler.wr.Report, "from_url", staticmethod(lambda url: source))
+    saved = []
+    monkeypatch.setattr(handler.wr.Report, "save", lambda self, *args, **kwargs: saved.append(self) or self)
+    monkeypatch.setattr(handler.wr.Report, "url", property(lambda self: "https://wandb.ai/test/reports/translated"))
+    client = StubBedrockClient()
+
+    url, title = WandBReportTranslator(bedrock_client=client, checkpoint_store=MemoryCheckpointStore())._wandb_report_transformation(URL, "jp")
+
+    assert title == "翻訳: Quickstart"
+    # Inline code and glossary terms go out as placeholders
+    assert "Call __INLINECODE_1__ as described in the __TERM_0__ docs." in sent_texts(client)
+    blocks = saved[0].blocks
+    assert blocks[1] == wr.P([
+        "翻訳: Call ", wr.InlineCode("weave.init()"), " as described in the ",
+        wr.Link("Weave docs", url="https://weave-docs.wandb.ai"), ".",
+    ])
+    assert blocks[2] == source.blocks[2] and blocks[3] == source.blocks[3]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,255 @@
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import handler
+import service as service_module
+import wandb_api
+from service import TranslationService, make_server
+from translation_cache import LocalTranslationCache, MemoryTranslationCache
+
+from slack_agent.intent_router import ActionInvoker, Intent
+
+from tests.stubs import StubBedrockClient, StubPromptRef
+
+URL = "https://wandb.ai/e/p/reports/Report--VmlldzoxMjM0NTY3"
+
+
+def action_event(function, **params):
+    return {
+        "messageVersion": "1.0",
+        "actionGroup": "translator",
+        "function": function,
+        "parameters": [{"name": k, "type": "string", "value": v} for k, v in params.items()],
+        "sessionAttributes": {},
+        "promptSessionAttributes": {},
+    }
+
+
+def body(response):
+    return response["response"]["functionResponse"]["responseBody"]["TEXT"]["body"]
+
+
+@pytest.fixture
+def running_service(offline_weave, offline_reports, monkeypatch, tmp_path):
+    monkeypatch.setenv("TRANSLATION_PROGRESS_DIR", str(tmp_path / "progress"))
+    monkeypatch.setenv("TRANSLATION_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    prompt_reads = []
+    monkeypatch.setattr(handler.weave, "ref", lambda *args, **kwargs: prompt_reads.append(args) or StubPromptRef())
+    client = StubBedrockClient()
+    service = TranslationService(bedrock_client=client)
+    server = make_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", service, client, prompt_reads
+    server.shutdown()
+    server.server_close()
+
+
+def get_json(url):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def test_service_serves_action_events_with_shared_state(running_service):
+    url, service, client, prompt_reads = running_service
+
+    first = handler.forward_to_service(url, action_event("translate_report", original_report_url=URL, language="jp", job_id="job-1"))
+    second = handler.forward_to_service(url, action_event("translate_report", original_report_url=URL, language="ko"))
+
+    assert body(first).startswith("Translation completed!") and body(second).startswith("Translation completed!")
+    assert first["response"]["function"] == "translate_report"
+    # Both translations went through the one shared client, and the prompt was read once
+    assert len(client.requests) == 12
+    assert len(prompt_reads) == 1
+    # Progress is answered from the process that ran the translation
+    status = handler.forward_to_service(url, action_event("translation_status", job_id="job-1", format="json"))
+    assert json.loads(body(status))["stage"] == "done"
+
+    assert get_json(url + "/health")["status"] == "ok"
+    metrics = get_json(url + "/metrics")
+    assert metrics["requests"]["functions"]["translate_report"]["requests"] == 2
+    assert metrics["requests"]["functions"]["translate_report"]["errors"] == 0
+    assert metrics["bedrock"]["requests"] == 12 and metrics["bedrock"]["in_flight"] == 0
+
+
+def test_lambda_and_slack_app_forward_to_the_service(running_service, monkeypatch):
+    url, service, client, prompt_reads = running_service
+    monkeypatch.setenv("TRANSLATION_SERVICE_URL", url)
+
+    response = handler.lambda_handler(action_event("translate_report", original_report_url=URL, language="jp", job_id="job-2"), None)
+    assert body(response).startswith("Translation completed!")
+
+    invoker = ActionInvoker(lambda_client=None, functions={"translate_report": "translator", "show_prompt": "prompts"})
+    assert invoker.invoke(Intent("translation_status", {"job_id": "job-2"})).startswith("Translation finished")
+    assert service.stats.to_dict()["functions"]["translation_status"]["requests"] == 1
+
+    request = urllib.request.Request(url + "/invoke", data=b"not json", headers={"Content-Type": "application/json"})
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request, timeout=10)
+    assert error.value.code == 400
+
+
+def test_weave_is_initialized_once_and_failed_translations_are_counted(running_service, monkeypatch):
+    url, service, client, prompt_reads = running_service
+    inits = []
+    monkeypatch.setattr(handler.weave, "init", lambda *args, **kwargs: inits.append(args))
+
+    def unreachable(report_url):
+        raise ConnectionError("W&B is unreachable")
+
+    handler.forward_to_service(url, action_event("translate_report", original_report_url=URL, language="jp"))
+    monkeypatch.setattr(handler.wr.Report, "from_url", staticmethod(unreachable))
+    failed = handler.forward_to_service(url, action_event("translate_report", original_report_url=URL, language="ko"))
+
+    assert body(failed) == "Error loading report: W&B is unreachable"
+    assert inits == []
+    assert service.stats.to_dict()["functions"]["translate_report"]["errors"] == 1
+
+
+class GatedBedrockClient(StubBedrockClient):
+    """Holds every call until the gate opens."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def invoke_model(self, **kwargs):
+        self.started.set()
+        self.gate.wait(10)
+        return super().invoke_model(**kwargs)
+
+
+def run_in_thread(service, event):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(body(service.handle(event))))
+    thread.start()
+    return thread, results
+
+
+def wait_until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("condition not met")
+
+
+def test_identical_translations_in_flight_run_once(offline_weave, offline_reports):
+    client = GatedBedrockClient()
+    service = TranslationService(bedrock_client=client)
+    event = action_event("translate_report", original_report_url=URL, language="jp")
+
+    first, first_result = run_in_thread(service, event)
+    client.started.wait(10)
+    second, second_result = run_in_thread(service, event)
+    wait_until(lambda: service.stats.in_flight == 2)
+    client.gate.set()
+    first.join(10)
+    second.join(10)
+
+    assert first_result == second_result and first_result[0].startswith("Translation completed!")
+    assert len(client.requests) == 6
+
+
+def test_interactive_request_cancels_a_running_pretranslation(offline_weave, offline_reports, monkeypatch, tmp_path):
+    monkeypatch.setenv("TRANSLATION_CACHE", "true")
+    monkeypatch.setenv("TRANSLATION_CACHE_DIR", str(tmp_path / "translations"))
+    client = GatedBedrockClient()
+    service = TranslationService(bedrock_client=client)
+
+    speculative, speculative_result = run_in_thread(
+        service, action_event("translate_report", original_report_url=URL, language="jp", speculative="true")
+    )
+    client.started.wait(10)
+    interactive, interactive_result = run_in_thread(
+        service, action_event("translate_report", original_report_url=URL, language="jp")
+    )
+    wait_until(lambda: any(job._cancelled for job in service._jobs.values()))
+    client.gate.set()
+    speculative.join(10)
+    interactive.join(10)
+
+    assert speculative_result == ["Translation cancelled"]
+    assert interactive_result[0].startswith("Translation completed!")
+    # The segments the pre-translation finished are resumed from its checkpoint, not translated again
+    assert len(client.requests) == 6
+
+
+def test_lambda_reports_an_unreachable_service(monkeypatch):
+    monkeypatch.setenv("TRANSLATION_SERVICE_URL", "http://127.0.0.1:1")
+
+    response = handler.lambda_handler(action_event("translate_report", original_report_url=URL, language="jp"), None)
+
+    assert body(response).startswith("Error calling the translation service")
+
+
+def test_memory_cache_reads_through_and_keeps_recent_entries(tmp_path):
+    backend = LocalTranslationCache(str(tmp_path))
+    backend.put("a", {"url": "u-a"})
+    cache = MemoryTranslationCache(backend, max_entries=2)
+
+    assert cache.get("a") == {"url": "u-a"}
+    cache.put("b", {"url": "u-b"})
+    cache.put("c", {"url": "u-c"})
+    # "a" was dropped from memory but is still in the backend
+    assert list(cache._entries) == ["b", "c"]
+    assert backend.get("c") == {"url": "u-c"} and cache.get("a") == {"url": "u-a"}
+    assert MemoryTranslationCache().get("missing") is None
+
+
+def test_token_is_required_when_configured(offline_weave, offline_reports, monkeypatch, tmp_path):
+    monkeypatch.setenv("TRANSLATION_PROGRESS_DIR", str(tmp_path / "progress"))
+    service = TranslationService(bedrock_client=StubBedrockClient())
+    server = make_server(service, "127.0.0.1", 0, token="s3cret")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    event = action_event("plan_translation", original_report_url=URL, language="jp")
+    try:
+        denied = handler.forward_to_service(url, event)
+        assert "401" in body(denied)
+        with pytest.raises(urllib.error.HTTPError) as error:
+            get_json(url + "/metrics")
+        assert error.value.code == 401
+        # The health check stays open for the container orchestrator
+        assert get_json(url + "/health")["status"] == "ok"
+
+        monkeypatch.setenv("TRANSLATION_SERVICE_TOKEN", "s3cret")
+        assert "401" not in body(handler.forward_to_service(url, event))
+        invoker = ActionInvoker(lambda_client=None, service_url=url)
+        assert invoker.invoke(Intent("translate_report", {"original_report_url": URL, "language": "jp"}))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_service_only_leaves_loopback_with_a_token(monkeypatch):
+    monkeypatch.delenv("TRANSLATION_SERVICE_TOKEN", raising=False)
+    monkeypatch.setattr(service_module, "load_dotenv", lambda: None)
+    monkeypatch.setattr(service_module, "make_server", lambda *args: pytest.fail("the server must not start"))
+
+    assert service_module.main(["--host", "0.0.0.0", "--port", "0"]) == 2
+
+
+def test_wandb_api_is_only_shared_on_tested_versions(monkeypatch):
+    original = lambda: "api"
+    monkeypatch.setattr(wandb_api.wr_interface, "_get_api", original)
+
+    assert wandb_api.share_wandb_api(version="9.0.0") is False
+    assert wandb_api.wr_interface._get_api is original
+
+    assert wandb_api.share_wandb_api(version=wandb_api.TESTED_VERSIONS[0] + "0") is True
+    assert wandb_api.wr_interface._get_api.shared
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import handler
+from checkpoint import LocalCheckpointStore
+from failure_policy import FailurePolicy
+from handler import WandBReportTranslator
+
+from tests.stubs import StubBedrockClient, sent_texts
+
+URL = "https://wandb.ai/e/p/reports/Report--VmlldzoxMjM0NTY3"
+
+
+def test_retry_resumes_from_checkpoint(offline_weave, offline_reports, tmp_path):
+    store = LocalCheckpointStore(str(tmp_path))
+    failing = StubBedrockClient(fail_on="FAILS")
+    abort = FailurePolicy(max_retries=0, on_failure="abort")
+    first = WandBReportTranslator(bedrock_client=failing, checkpoint_store=store, failure_policy=abort)
+    url, title = first._wandb_report_transformation(URL, "jp")
+    assert title is None and url.startswith("Error translating block")
+    checkpointed = store.load(handler.checkpoint_key(URL, "jp", first._prompt_version()))
+    assert checkpointed
+
+    retry = StubBedrockClient()
+    translator = WandBReportTranslator(bedrock_client=retry, checkpoint_store=store)
+    url, title = translator._wandb_report_transformation(URL, "jp")
+
+    assert url == "https://wandb.ai/test/reports/translated"
+    assert title == "翻訳: Sentiment classification"
+    sent = sent_texts(retry)
+    assert "This paragraph FAILS on the first attempt." in sent
+    # No checkpointed segment is sent to the API again; the others (the failed block and any
+    # segment the abort cancelled before it started) are
+    assert not {"翻訳: " + text for text in sent} & set(checkpointed.values())
+    assert sorted(map(str, translator.stats.resumed)) == sorted(map(str, checkpointed))
+    assert len(sent) == 6 - len(checkpointed)
+    assert not list(tmp_path.iterdir())
+
+
+def test_checkpoint_entries_of_edited_segments_are_ignored(offline_weave, offline_reports, monkeypatch, tmp_path):
+    store = LocalCheckpointStore(str(tmp_path))
+    keep_source = FailurePolicy(max_retries=0, on_failure="keep_source")
+    WandBReportTranslator(
+        bedrock_client=StubBedrockClient(fail_on="FAILS"), checkpoint_store=store, failure_policy=keep_source
+    )._wandb_report_transformation(URL, "jp")
+
+    # The report is edited before the retry; its URL, and so the checkpoint key, stays the same
+    load = handler.wr.Report.from_url
+    def edited_report(url):
+        report = load(url)
+        report.blocks[1] = handler.wr.P("We classify Reddit posts by topic.")
+        return report
+    monkeypatch.setattr(handler.wr.Report, "from_url", staticmethod(edited_report))
+    retry = StubBedrockClient()
+    WandBReportTranslator(bedrock_client=retry, checkpoint_store=store)._wandb_report_transformation(URL, "jp")
+
+    assert sorted(sent_texts(retry)) == ["This paragraph FAILS on the first attempt.", "We classify Reddit posts by topic."]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import handler
+from checkpoint import LocalCheckpointStore
+from failure_policy import FailurePolicy
+from handler import WandBReportTranslator
+
+from tests.stubs import StubBedrockClient, sent_texts
+
+URL = "https://wandb.ai/e/p/reports/Report--VmlldzoxMjM0NTY3"
+
+
+def test_failed_block_is_retried(offline_weave, offline_reports, tmp_path):
+    client = StubBedrockClient(fail_on="FAILS", failures=1)
+    policy = FailurePolicy(max_retries=2, backoff_seconds=0, sleep=lambda seconds: None)
+    translator = WandBReportTranslator(
+        bedrock_client=client, checkpoint_store=LocalCheckpointStore(str(tmp_path)), failure_policy=policy
+    )
+    url, _ = translator._wandb_report_transformation(URL, "jp")
+
+    assert url == "https://wandb.ai/test/reports/translated"
+    assert sent_texts(client).count("This paragraph FAILS on the first attempt.") == 2
+    assert not translator.stats.failed
+
+
+def test_failed_block_is_kept_as_source_and_report_is_saved(offline_weave, offline_reports, monkeypatch, tmp_path):
+    saved = []
+    monkeypatch.setattr(handler.wr.Report, "save", lambda self, *args, **kwargs: saved.append(self) or self)
+    client = StubBedrockClient(fail_on="FAILS")
+    policy = FailurePolicy(max_retries=1, backoff_seconds=0, on_failure="keep_source", marker="[untranslated] ")
+    translator = WandBReportTranslator(
+        bedrock_client=client, checkpoint_store=LocalCheckpointStore(str(tmp_path)), failure_policy=policy
+    )
+    url, _ = translator._wandb_report_transformation(URL, "jp")
+
+    assert url == "https://wandb.ai/test/reports/translated"
+    assert list(translator.stats.failed) == [2]
+    blocks = saved[0].blocks
+    assert blocks[2].text == "[untranslated] This paragraph FAILS on the first attempt."
+    assert blocks[1].text == "翻訳: We classify Reddit posts by sentiment."
+    # The checkpoint is kept, so a retry of the job only translates the failed block
+    job_key = handler.checkpoint_key(URL, "jp", translator._prompt_version())
+    assert 1 in translator.checkpoint_store.load(job_key) and 2 not in translator.checkpoint_store.load(job_key)
+
+
+def test_failure_marker_of_a_markdown_block_is_a_paragraph_of_its_own(offline_weave, offline_reports, monkeypatch):
+    saved = []
+    monkeypatch.setattr(handler.wr.Report, "save", lambda self, *args, **kwargs: saved.append(self) or self)
+    keep_source = FailurePolicy(max_retries=0, on_failure="keep_source")
+    WandBReportTranslator(
+        bedrock_client=StubBedrockClient(fail_on="## Results"), failure_policy=keep_source
+    )._wandb_report_transformation(URL, "jp")
+
+    assert saved[0].blocks[3].text == "[Translation failed]\n\n## Results\nThe model reaches 91% accuracy."
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
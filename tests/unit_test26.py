@@ -0,0 +1,56 @@
+from slack_agent.sessions import AgentSessionStore
+
+
+def test_threads_keep_their_agent_session():
+    sessions = AgentSessionStore(max_size=2, idle_seconds=3600)
+    first = sessions.session_id("C1", "111.1")
+    assert sessions.session_id("C1", "111.1") == first
+    assert sessions.session_id("C1", "222.2") != first
+
+
+def test_sessions_are_evicted_lru_and_on_idle():
+    sessions = AgentSessionStore(max_size=2, idle_seconds=3600)
+    first = sessions.session_id("C1", "111.1")
+    sessions.session_id("C1", "222.2")
+    sessions.session_id("C1", "333.3")
+    assert len(sessions) == 2
+    assert sessions.session_id("C1", "111.1") != first
+
+    idle = AgentSessionStore(max_size=10, idle_seconds=0)
+    first = idle.session_id("C1", "111.1")
+    assert idle.session_id("C1", "111.1") != first
+
+
+def test_fast_path_exchanges_are_handed_to_the_next_agent_call():
+    sessions = AgentSessionStore(max_size=10, idle_seconds=3600)
+    sessions.record_exchange("C1", "111.1", "translate <url> to jp", "Translation completed!")
+    first = sessions.session_id("C1", "111.1")
+
+    history = sessions.take_history("C1", "111.1")
+
+    assert [m["role"] for m in history] == ["user", "assistant"]
+    assert history[1]["content"] == [{"text": "Translation completed!"}]
+    # The agent keeps the history in its session from then on
+    assert sessions.take_history("C1", "111.1") == []
+    assert sessions.session_id("C1", "111.1") == first
+    assert sessions.take_history("C1", "999.9") == []
+
+
+def test_forgotten_threads_start_a_new_session_without_history():
+    sessions = AgentSessionStore(max_size=10, idle_seconds=3600)
+    first = sessions.session_id("C1", "111.1")
+    sessions.record_exchange("C1", "111.1", "translate <url> to jp", "Translation completed!")
+
+    sessions.forget("C1", "111.1")
+
+    assert len(sessions) == 0
+    assert sessions.take_history("C1", "111.1") == []
+    assert sessions.session_id("C1", "111.1") != first
+
+
+if __name__ == "__main__":
+    test_threads_keep_their_agent_session()
+    test_sessions_are_evicted_lru_and_on_idle()
+    test_fast_path_exchanges_are_handed_to_the_next_agent_call()
+    test_forgotten_threads_start_a_new_session_without_history()
+    print("All agent session tests passed.")
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import planner
+from checkpoint import MemoryCheckpointStore
+from handler import WandBReportTranslator
+from planner import LatencyModel, plan_translation
+
+from tests.stubs import StubBedrockClient, sent_texts
+
+URL = "https://wandb.ai/e/p/reports/Report--VmlldzoxMjM0NTY3"
+
+
+def test_longest_expected_segment_is_translated_first(offline_weave, offline_reports, monkeypatch):
+    # Default latencies only, whatever earlier tests have recorded
+    monkeypatch.setattr(planner, "latency_model", LatencyModel())
+    client = StubBedrockClient()
+    translator = WandBReportTranslator(bedrock_client=client, checkpoint_store=MemoryCheckpointStore())
+    translator.block_workers = 1
+
+    url, title = translator._wandb_report_transformation(URL, "jp")
+
+    assert title == "翻訳: Sentiment classification"
+    sent = sent_texts(client)
+    # The Markdown block goes to the slower model, so it starts before the title and description
+    assert sent[0] == "## Results\nThe model reaches 91% accuracy."
+    assert sent.index("We classify Reddit posts by sentiment.") < sent.index("Sentiment classification")
+    assert plan_translation(translator, URL, "jp")["wall_seconds"] == plan_translation(translator, URL, "jp")["serial_seconds"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
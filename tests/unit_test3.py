@@ -0,0 +1,39 @@
+import os
+import sys
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+from model_router import ModelRouter
+
+QUALITY = "quality-model"
+FAST = "fast-model"
+
+
+def make_router():
+    return ModelRouter(default_model_id=QUALITY, fast_model_id=FAST, fast_max_chars=300, short_max_chars=80)
+
+
+def test_headings_and_titles_go_to_fast_model():
+    router = make_router()
+    assert router.select("Results", "H3") == FAST
+    assert router.select("Sentiment classification with GPT-4o mini", "title") == FAST
+
+
+def test_long_and_markdown_segments_stay_on_quality_model():
+    router = make_router()
+    assert router.select("word " * 100, "P") == QUALITY
+    assert router.select("# Short", "MarkdownBlock") == QUALITY
+    assert router.select("x" * 301, "H2") == QUALITY
+
+
+def test_routing_can_be_disabled():
+    router = ModelRouter(default_model_id=QUALITY, fast_model_id="")
+    assert router.select("Results", "H3") == QUALITY
+
+
+if __name__ == "__main__":
+    test_headings_and_titles_go_to_fast_model()
+    test_long_and_markdown_segments_stay_on_quality_model()
+    test_routing_can_be_disabled()
+    print("All model routing tests passed.")
@@ -0,0 +1,45 @@
+import os
+import sys
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import handler
+from handler import WandBReportTranslator
+
+from tests.stubs import StubBedrockClient
+
+
+def test_system_prompt_is_marked_cacheable(offline_weave):
+    client = StubBedrockClient(usage={
+        "input_tokens": 12,
+        "output_tokens": 8,
+        "cache_read_input_tokens": 1500,
+        "cache_creation_input_tokens": 0,
+    })
+    translator = WandBReportTranslator(bedrock_client=client)
+
+    result = translator._call_translation_api("Hello", "jp")
+
+    assert result == "翻訳: Hello"
+    system = client.requests[0]["payload"]["system"]
+    assert system == [{
+        "type": "text",
+        # The built-in glossary is on, so the rule for its placeholders is added
+        "text": "Translate the following text to Japanese." + handler.TERM_PLACEHOLDER_RULE,
+        "cache_control": {"type": "ephemeral"},
+    }]
+    totals = translator.stats.usage_totals()
+    assert totals["cache_read_input_tokens"] == 1500
+    assert totals["cache_creation_input_tokens"] == 0
+    assert totals["input_tokens"] == 12
+
+
+def test_prompt_caching_can_be_disabled(offline_weave, monkeypatch):
+    monkeypatch.setenv("TRANSLATION_PROMPT_CACHE", "false")
+    client = StubBedrockClient()
+    translator = WandBReportTranslator(bedrock_client=client)
+
+    translator._call_translation_api("Hello", "ko")
+
+    assert client.requests[0]["payload"]["system"] == "Translate the following text to Korean." + handler.TERM_PLACEHOLDER_RULE
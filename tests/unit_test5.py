@@ -0,0 +1,54 @@
+import os
+import sys
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+from language_filter import needs_translation
+
+
+def test_text_already_in_target_language_is_skipped():
+    assert not needs_translation("W&B Weaveを使ってLLMを評価します", "jp")
+    assert not needs_translation("W&B Weave를 사용하여 LLM을 평가합니다", "ko")
+    assert not needs_translation("This report is already in English.", "en")
+
+
+def test_nothing_to_translate_is_skipped():
+    for text in [
+        "https://wandb.ai/wandb-japan/fc-agent", "42", "🚀🔥", "train_model", "wandb.init()", "`pip install wandb`",
+        "torch.nn.functional", "configs/train.yaml", "load_dataset(path)", "getModel", "--max-epochs",
+    ]:
+        assert not needs_translation(text, "jp"), text
+
+
+def test_source_language_text_is_translated():
+    assert needs_translation("Sentiment classification with GPT-4o mini", "jp")
+    assert needs_translation("Results", "ko")
+    assert needs_translation("W&B Weaveを使ってLLMを評価します", "en")
+
+
+def test_other_languages_in_the_same_script_are_translated():
+    assert needs_translation("Résultats de l'expérience et analyse", "en")
+    assert needs_translation("Ergebnisse der Experimente im Überblick", "en")
+    assert needs_translation("模型训练结果分析", "jp")
+    # Unaccented Latin text is only English with English words in it
+    assert needs_translation("Die Ergebnisse sind gut und das Modell ist schnell", "en")
+    assert needs_translation("Los resultados del modelo", "en")
+    assert needs_translation("Les resultats du modele sont bons", "en")
+    # English with an accented loanword is still English
+    assert not needs_translation("A café-style review of the experiment results", "en")
+
+
+def test_headings_with_slashes_are_not_taken_for_code():
+    assert needs_translation("Training/Evaluation", "jp")
+    assert needs_translation("Input/Output", "ko")
+    assert needs_translation("Setup.", "jp")
+
+
+if __name__ == "__main__":
+    test_text_already_in_target_language_is_skipped()
+    test_nothing_to_translate_is_skipped()
+    test_source_language_text_is_translated()
+    test_other_languages_in_the_same_script_are_translated()
+    test_headings_with_slashes_are_not_taken_for_code()
+    print("All language filter tests passed.")
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from slack_agent.job_queue import FairJobQueue, QueueFullError
+from slack_agent.stats import percentile
+
+
+def test_jobs_are_served_round_robin_across_users():
+    async def scenario():
+        queue = FairJobQueue(workers=1, high_water=10, max_pending_per_user=5)
+        order = []
+        gate = asyncio.Event()
+
+        async def blocker():
+            await gate.wait()
+
+        def job(name):
+            async def run():
+                order.append(name)
+            return run
+
+        queue.submit(blocker, user="busy", channel="C1")
+        await asyncio.sleep(0)
+        jobs = [
+            queue.submit(job("a1"), user="alice", channel="C1"),
+            queue.submit(job("a2"), user="alice", channel="C1"),
+            queue.submit(job("b1"), user="bob", channel="C2"),
+        ]
+        assert [queue.position(j) for j in jobs] == [1, 3, 2]
+        gate.set()
+        await asyncio.gather(*(j.done.wait() for j in jobs))
+        await queue.stop()
+        return order, queue.metrics()
+
+    order, metrics = asyncio.run(scenario())
+    assert order == ["a1", "b1", "a2"]
+    assert metrics["completed"] == 4
+    assert metrics["queue_depth"] == 0
+
+
+def test_new_work_is_rejected_above_high_water_mark():
+    async def scenario():
+        queue = FairJobQueue(workers=1, high_water=2, max_pending_per_user=5)
+
+        async def noop():
+            await asyncio.sleep(0)
+
+        queue.submit(noop, user="u1", channel="C1")
+        queue.submit(noop, user="u2", channel="C1")
+        with pytest.raises(QueueFullError):
+            queue.submit(noop, user="u3", channel="C1")
+        rejected = queue.metrics()["rejected"]
+        await queue.stop()
+        return rejected
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_percentile_is_the_nearest_rank():
+    assert percentile([], 0.95) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert percentile([float(n) for n in range(1, 101)], 0.95) == 95.0
+
+
+if __name__ == "__main__":
+    test_jobs_are_served_round_robin_across_users()
+    test_new_work_is_rejected_above_high_water_mark()
+    test_percentile_is_the_nearest_rank()
+    print("All request queue tests passed.")
@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+
+# Add src/prompt_manager to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "prompt_manager"))
+
+from prompt_registry import LocalSnapshotBackend, PromptRegistry, SnapshotConflict, backend_from_env
+
+
+class FakeWeave:
+    """Stands in for Weave: counts fetches and publishes."""
+
+    def __init__(self, content):
+        self.content = content
+        self.fetches = 0
+        self.publishes = 0
+
+    def fetch(self):
+        self.fetches += 1
+        return self.content, f"digest{self.fetches}"
+
+    def publish(self, content):
+        self.publishes += 1
+        self.content = content
+        return f"published{self.publishes}"
+
+
+def make_registry(tmp_path, fake):
+    return PromptRegistry("translate_prompt", LocalSnapshotBackend(str(tmp_path)), fake.fetch, fake.publish, max_age=0)
+
+
+def test_reads_are_served_from_the_snapshot(tmp_path):
+    fake = FakeWeave("Translate to {prompt_language}.")
+    registry = make_registry(tmp_path, fake)
+    assert registry.get()["content"] == "Translate to {prompt_language}."
+    assert registry.get()["version"] == 1
+    # A second process reading the same store never goes to Weave
+    assert make_registry(tmp_path, fake).get()["content"] == "Translate to {prompt_language}."
+    assert fake.fetches == 1
+
+
+def test_publish_writes_through_and_invalidates_readers(tmp_path):
+    fake = FakeWeave("v1 prompt")
+    writer = make_registry(tmp_path, fake)
+    reader = make_registry(tmp_path, fake)
+    assert reader.get()["content"] == "v1 prompt"
+
+    writer.publish("v2 prompt\nwith more rules")
+
+    assert reader.get()["content"] == "v2 prompt\nwith more rules"
+    assert [v["version"] for v in reader.list_versions()] == [2, 1]
+    diff = reader.diff()
+    assert "-v1 prompt" in diff and "+v2 prompt" in diff
+    assert fake.fetches == 1 and fake.publishes == 1
+
+
+def test_concurrent_publishes_keep_every_version(tmp_path):
+    fake = FakeWeave("v1 prompt")
+    make_registry(tmp_path, fake).get()
+    writers = [make_registry(tmp_path, fake) for _ in range(6)]
+    threads = [threading.Thread(target=w.publish, args=(f"prompt {i}",)) for i, w in enumerate(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    versions = make_registry(tmp_path, fake).list_versions(limit=20)
+    assert len(versions) == 7 and versions == sorted(versions, key=lambda v: -v["version"])
+    contents = {make_registry(tmp_path, fake)._read_version(v["version"])["content"] for v in versions}
+    assert contents == {"v1 prompt"} | {f"prompt {i}" for i in range(6)}
+
+
+def test_publish_retries_when_the_index_changed_since_it_was_read(tmp_path):
+    fake = FakeWeave("v1 prompt")
+    writer = make_registry(tmp_path, fake)
+    other = make_registry(tmp_path, fake)
+    writer.get()
+    backend = writer.backend
+    write = backend.write
+
+    def write_after_other_writer(key, data, **conditions):
+        if key.endswith("index.json") and not getattr(backend, "raced", False):
+            backend.raced = True
+            other.publish("other prompt")
+        return write(key, data, **conditions)
+
+    backend.write = write_after_other_writer
+    # A version file left behind by a writer that never updated the index is skipped
+    write("translate_prompt/versions/000004.json", b"{}", if_none_match=True)
+    snapshot = writer.publish("my prompt")
+
+    assert snapshot["version"] == 5
+    assert [v["version"] for v in other.list_versions()] == [5, 3, 1]
+    assert other.get()["content"] == "my prompt"
+    try:
+        write("translate_prompt/versions/000005.json", b"{}", if_none_match=True)
+        assert False, "an existing version must not be overwritten"
+    except SnapshotConflict:
+        pass
+
+
+def test_without_a_snapshot_store_the_prompt_is_read_live(monkeypatch):
+    monkeypatch.delenv("PROMPT_SNAPSHOT_BUCKET", raising=False)
+    monkeypatch.delenv("PROMPT_SNAPSHOT_DIR", raising=False)
+    assert backend_from_env() is None
+
+    fake = FakeWeave("v1 prompt")
+    registry = PromptRegistry("translate_prompt", None, fake.fetch, fake.publish)
+    assert registry.get()["content"] == "v1 prompt"
+    registry.publish("v2 prompt")
+    # Every read goes to Weave, so a prompt published by another container is seen straight away
+    assert registry.get() == {"version": None, "digest": "digest2", "content": "v2 prompt", "source": "weave"}
+    assert registry.list_versions() == [] and registry.diff() == ""
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as d:
+        test_reads_are_served_from_the_snapshot(Path(d) / "a")
+        test_publish_writes_through_and_invalidates_readers(Path(d) / "b")
+    print("All prompt registry tests passed.")
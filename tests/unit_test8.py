@@ -0,0 +1,128 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import batch_translate
+from job_stats import JobStats
+from scheduler import BedrockBudget, BudgetedBedrockClient
+
+URL_A = "https://wandb.ai/e/p/reports/A--VmlldzoxMTEx"
+URL_B = "https://wandb.ai/e/p/reports/B--VmlldzoyMjIy"
+
+
+def test_read_jobs_accepts_jsonl_and_text(tmp_path):
+    jsonl = tmp_path / "reports.jsonl"
+    jsonl.write_text(json.dumps({"url": URL_A, "languages": ["jp", "ko"]}) + "\n" + json.dumps({"url": URL_B}) + "\n")
+    text = tmp_path / "reports.txt"
+    text.write_text(f"# backlog\n{URL_A} ko\n{URL_B}\n")
+
+    assert batch_translate.read_jobs(str(jsonl), ["jp"]) == [(URL_A, "jp"), (URL_A, "ko"), (URL_B, "jp")]
+    assert batch_translate.read_jobs(str(text), ["jp"]) == [(URL_A, "ko"), (URL_B, "jp")]
+
+
+def test_rerun_skips_completed_jobs(tmp_path, monkeypatch):
+    output = tmp_path / "results.jsonl"
+    calls = []
+
+    def fake_translate_job(job, bedrock_client):
+        calls.append(job)
+        status = "error" if job[0] == URL_B and len(calls) < 3 else "ok"
+        return {"url": job[0], "language": job[1], "status": status}
+
+    monkeypatch.setattr(batch_translate, "translate_job", fake_translate_job)
+    jobs = [(URL_A, "jp"), (URL_B, "jp")]
+
+    first = batch_translate.run_batch(jobs, str(output), report_workers=1, bedrock_client=None)
+    second = batch_translate.run_batch(jobs, str(output), report_workers=1, bedrock_client=None)
+
+    assert first == {"ok": 1, "partial": 0, "error": 1, "skipped": 0}
+    assert second == {"ok": 1, "partial": 0, "error": 0, "skipped": 1}
+    assert calls == [(URL_A, "jp"), (URL_B, "jp"), (URL_B, "jp")]
+    assert len(output.read_text().splitlines()) == 3
+
+
+def test_partial_job_is_run_again(tmp_path, monkeypatch):
+    output = tmp_path / "results.jsonl"
+    calls = []
+
+    class FakeTranslator:
+        def __init__(self, **kwargs):
+            self.stats = JobStats()
+            if not calls:
+                self.stats.record_failed(2, "throttled")
+
+        def _wandb_report_transformation(self, url, language):
+            calls.append((url, language))
+            return "https://wandb.ai/e/p/reports/translated", "翻訳"
+
+    monkeypatch.setattr(batch_translate, "WandBReportTranslator", FakeTranslator)
+
+    first = batch_translate.run_batch([(URL_A, "jp")], str(output), report_workers=1, bedrock_client=None)
+    second = batch_translate.run_batch([(URL_A, "jp")], str(output), report_workers=1, bedrock_client=None)
+
+    assert first == {"ok": 0, "partial": 1, "error": 0, "skipped": 0}
+    assert second == {"ok": 1, "partial": 0, "error": 0, "skipped": 0}
+    assert calls == [(URL_A, "jp"), (URL_A, "jp")]
+
+
+def test_weave_is_initialized_once_per_batch(tmp_path, monkeypatch):
+    jobs_file = tmp_path / "reports.txt"
+    jobs_file.write_text(f"{URL_A} jp,ko\n{URL_B}\n")
+    inits = []
+    translator_kwargs = []
+
+    class FakeTranslator:
+        def __init__(self, **kwargs):
+            translator_kwargs.append(kwargs)
+            self.stats = JobStats()
+
+        def _wandb_report_transformation(self, url, language):
+            return "https://wandb.ai/e/p/reports/translated", "翻訳"
+
+    monkeypatch.setenv("WANDB_ENTITY", "test-entity")
+    monkeypatch.setenv("WANDB_PROJECT", "test-project")
+    monkeypatch.setattr(batch_translate.weave, "init", lambda project: inits.append(project))
+    monkeypatch.setattr(batch_translate, "make_bedrock_client", lambda budget: None)
+    monkeypatch.setattr(batch_translate, "WandBReportTranslator", FakeTranslator)
+
+    assert batch_translate.main([str(jobs_file), "--output", str(tmp_path / "results.jsonl")]) == 0
+
+    assert inits == ["test-entity/test-project"]
+    assert len(translator_kwargs) == 3
+    assert all(kwargs["init_weave"] is False for kwargs in translator_kwargs)
+
+
+def test_budget_caps_requests_in_flight():
+    class SlowClient:
+        def __init__(self):
+            self.in_flight = 0
+            self.peak = 0
+            self.lock = threading.Lock()
+
+        def invoke_model(self, **kwargs):
+            with self.lock:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+            time.sleep(0.01)
+            with self.lock:
+                self.in_flight -= 1
+
+    slow = SlowClient()
+    client = BudgetedBedrockClient(slow, BedrockBudget(max_concurrency=2, requests_per_minute=0))
+    threads = [threading.Thread(target=client.invoke_model) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert slow.peak == 2
+    assert client.budget.requests == 8
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,175 @@
+import json
+import os
+import sys
+
+import wandb_workspaces.reports.v2 as wr
+
+# Add src/wandb_translator to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "wandb_translator"))
+
+import batch_inference
+from failure_policy import FailurePolicy
+from handler import WandBReportTranslator
+
+from tests.stubs import StubBedrockClient, sent_texts
+
+URL = "https://wandb.ai/e/p/reports/Report--VmlldzoxMjM0NTY3"
+TRANSLATED_URL = "https://wandb.ai/test/reports/translated"
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def export(tmp_path):
+    records, manifest = tmp_path / "records.jsonl", tmp_path / "manifest.jsonl"
+    translator = WandBReportTranslator(bedrock_client=StubBedrockClient(), prompt_caching=False)
+    counts = batch_inference.export_records([(URL, "jp")], translator, str(records), str(manifest))
+    return counts, records, manifest
+
+
+def fake_batch_output(records, path, fail_on=None, truncate_on=None):
+    """Answer every record the way a Bedrock batch job would, optionally failing or cutting off some."""
+    with open(path, "w", encoding="utf-8") as f:
+        for record in read_lines(records):
+            text = record["modelInput"]["messages"][0]["content"]
+            if fail_on is not None and fail_on in text:
+                entry = {"recordId": record["recordId"], "error": {"errorCode": 400, "errorMessage": "failed"}}
+            else:
+                entry = {
+                    "recordId": record["recordId"],
+                    "modelInput": record["modelInput"],
+                    "modelOutput": {"content": [{"type": "text", "text": "バッチ: " + text}]},
+                }
+                if truncate_on is not None and truncate_on in text:
+                    entry["modelOutput"] = {"content": [{"type": "text", "text": "バッチ: " + text[:10]}], "stop_reason": "max_tokens"}
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def test_record_ids_are_stable_and_batch_compatible():
+    rid = batch_inference.record_id(URL, "jp", 3, "abc")
+    assert rid == batch_inference.record_id(URL, "jp", 3, "abc")
+    assert rid != batch_inference.record_id(URL, "ko", 3, "abc")
+    assert len(rid) == 11 and rid.isalnum()
+
+
+def test_export_writes_one_record_per_segment(offline_weave, offline_reports, tmp_path):
+    counts, records, manifest = export(tmp_path)
+
+    assert counts == {"records": 6, "skipped": 0, "reports": 1, "failed_reports": 0}
+    entries = read_lines(manifest)
+    assert [e["segment"] for e in entries if "recordId" in e] == ["title", "description", "0", "1", "2", "3"]
+    assert entries[-1] == {"url": URL, "language": "jp", "prompt_version": entries[0]["prompt_version"], "records": 6}
+    payload = read_lines(records)[0]["modelInput"]
+    assert payload["anthropic_version"] == "bedrock-2023-05-31"
+    assert payload["messages"][0]["content"] == "Sentiment classification"
+
+
+def test_import_assembles_report_and_translates_failed_records(offline_weave, offline_reports, tmp_path, monkeypatch):
+    _, records, manifest = export(tmp_path)
+    output = tmp_path / "records.jsonl.out"
+    fake_batch_output(records, output, fail_on="FAILS")
+
+    translations, failed = batch_inference.read_batch_output([str(output)], batch_inference.read_manifest(str(manifest)))
+    assert len(failed) == 1
+    assert translations[(URL, "jp")]["title"][0] == "バッチ: Sentiment classification"
+
+    saved = []
+    monkeypatch.setattr(wr.Report, "save", lambda self, *args, **kwargs: saved.append(self) or self)
+    online = StubBedrockClient()
+    counts = batch_inference.assemble_reports(
+        translations,
+        str(tmp_path / "results.jsonl"),
+        lambda store: WandBReportTranslator(bedrock_client=online, checkpoint_store=store),
+    )
+
+    assert counts == {"ok": 1, "partial": 0, "error": 0, "missing": 0}
+    # Only the record that failed in the batch job is translated on demand
+    assert sent_texts(online) == ["This paragraph FAILS on the first attempt."]
+    blocks = saved[0].blocks
+    assert blocks[1].text == "バッチ: We classify Reddit posts by sentiment."
+    assert blocks[2].text == "翻訳: This paragraph FAILS on the first attempt."
+    result = read_lines(tmp_path / "results.jsonl")[0]
+    assert result["status"] == "ok" and result["new_report_url"] == TRANSLATED_URL
+
+
+def test_import_translates_jobs_without_batch_translations(offline_weave, offline_reports, tmp_path, monkeypatch):
+    _, records, manifest = export(tmp_path)
+    output = tmp_path / "records.jsonl.out"
+    # Every record of the job failed, so the job is not in the batch translations at all
+    fake_batch_output(records, output, fail_on="")
+    translations, failed = batch_inference.read_batch_output([str(output)], batch_inference.read_manifest(str(manifest)))
+    assert translations == {} and len(failed) == 6
+
+    saved = []
+    monkeypatch.setattr(wr.Report, "save", lambda self, *args, **kwargs: saved.append(self) or self)
+    online = StubBedrockClient()
+    jobs = batch_inference.read_manifest_jobs(str(manifest))
+    counts = batch_inference.assemble_reports(
+        translations,
+        str(tmp_path / "results.jsonl"),
+        lambda store: WandBReportTranslator(bedrock_client=online, checkpoint_store=store),
+        jobs,
+        jobs=jobs,
+    )
+
+    assert list(jobs) == [(URL, "jp")]
+    assert counts == {"ok": 1, "partial": 0, "error": 0, "missing": 1}
+    assert len(sent_texts(online)) == 6 and len(saved) == 1
+
+
+def test_import_translates_segments_edited_since_export(offline_weave, offline_reports, tmp_path, monkeypatch):
+    _, records, manifest = export(tmp_path)
+    output = tmp_path / "records.jsonl.out"
+    fake_batch_output(records, output)
+    translations, _ = batch_inference.read_batch_output([str(output)], batch_inference.read_manifest(str(manifest)))
+
+    load = wr.Report.from_url
+    def edited_report(url):
+        report = load(url)
+        report.blocks[1] = wr.P("We classify Reddit posts by topic.")
+        return report
+    monkeypatch.setattr(wr.Report, "from_url", staticmethod(edited_report))
+    online = StubBedrockClient()
+    batch_inference.assemble_reports(
+        translations,
+        str(tmp_path / "results.jsonl"),
+        lambda store: WandBReportTranslator(bedrock_client=online, checkpoint_store=store),
+    )
+
+    assert sent_texts(online) == ["We classify Reddit posts by topic."]
+
+
+def test_truncated_records_are_translated_online_and_failures_make_the_job_partial(
+    offline_weave, offline_reports, tmp_path
+):
+    _, records, manifest = export(tmp_path)
+    output = tmp_path / "records.jsonl.out"
+    fake_batch_output(records, output, truncate_on="FAILS")
+    translations, failed = batch_inference.read_batch_output([str(output)], batch_inference.read_manifest(str(manifest)))
+    assert [f["error"] for f in failed] == ["output stopped at max_tokens"]
+
+    # Online, the segment fails for good and is kept in the source language
+    online = StubBedrockClient(fail_on="FAILS")
+    keep_source = FailurePolicy(max_retries=0, on_failure="keep_source")
+    counts = batch_inference.assemble_reports(
+        translations,
+        str(tmp_path / "results.jsonl"),
+        lambda store: WandBReportTranslator(bedrock_client=online, checkpoint_store=store, failure_policy=keep_source),
+    )
+
+    assert sent_texts(online) == ["This paragraph FAILS on the first attempt."]
+    assert counts == {"ok": 0, "partial": 1, "error": 0, "missing": 0}
+    assert read_lines(tmp_path / "results.jsonl")[0]["status"] == "partial"
+
+
+def test_import_fails_records_that_lost_a_placeholder(tmp_path):
+    manifest = {"r1": {"url": URL, "language": "jp", "segment": 0, "placeholders": [["__TERM_0__", "Weave"]]}}
+    output = tmp_path / "records.jsonl.out"
+    entry = {"recordId": "r1", "modelOutput": {"content": [{"type": "text", "text": "Weave で追跡"}]}}
+    output.write_text(json.dumps(entry, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    translations, failed = batch_inference.read_batch_output([str(output)], manifest)
+
+    assert translations == {}
+    assert failed == [{"recordId": "r1", "error": "placeholders lost"}]